@@ -5,17 +5,17 @@ from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import SystemMessage, HumanMessage
 
 from app.core.state import AgentState
-from app.utils import RobustGemini
+from app.utils import RobustGemini, CachedLLM, tagged_config
 
 # --- CONFIGURATION ---
-llm_flash = ChatGoogleGenerativeAI(
+llm_flash = CachedLLM(ChatGoogleGenerativeAI(
     model="gemini-3-flash-preview", 
     temperature=0.0, 
     google_api_key=os.getenv("GOOGLE_API_KEY")
-)
+))
 
 # Robust Polyglot Model for Coding
-llm_pro = RobustGemini(temperature=0.0)
+llm_pro = CachedLLM(RobustGemini(temperature=0.0))
 
 SYSTEM_PROMPT = """
 You are the **Lead UI/UX Architect**.
@@ -51,7 +51,7 @@ def extract_code(text):
     if match: return match.group(1).strip()
     return text.replace("```", "").strip()
 
-def architect_node(state: AgentState, config):
+async def architect_node(state: AgentState, config):
     thread_id = config.get("configurable", {}).get("thread_id", "default")
     
     # Input Source
@@ -83,7 +83,7 @@ def architect_node(state: AgentState, config):
     }}
     """
     try:
-        bp_res = llm_flash.invoke([HumanMessage(content=blueprint_prompt)])
+        bp_res = await llm_flash.ainvoke([HumanMessage(content=blueprint_prompt)])
         blueprint = extract_json(bp_res.content)
         slides = blueprint.get('slides', [])
         if not slides: raise Exception("Empty slides")
@@ -116,10 +116,10 @@ def architect_node(state: AgentState, config):
         
         try:
             # Use Pro for coding
-            code_res = llm_pro.invoke([
+            code_res = await llm_pro.ainvoke([
                 SystemMessage(content=SYSTEM_PROMPT),
                 HumanMessage(content=slide_prompt)
-            ])
+            ], config=tagged_config(config, slide=i + 1))
             code = extract_code(code_res.content)
             slide_components.append(code)
         except Exception as e:
@@ -3,13 +3,14 @@ from langchain_ollama import ChatOllama
 from langchain_core.messages import SystemMessage, HumanMessage
 
 from app.core.state import AgentState
-from app.core.rag import VectorStoreManager
+from app.core.rag import get_vector_store
+from app.utils import CachedLLM
 
 # Qwen 3 (32B) via Ollama
-llm = ChatOllama(
+llm = CachedLLM(ChatOllama(
     model="qwen3:32b", 
     temperature=0.1
-)
+))
 
 SYSTEM_PROMPT = """
 You are the **Local Archivist**.
@@ -18,34 +19,30 @@ You have access to the user's private documents via a Semantic Search Engine (RA
 Summarize what you find in the local context.
 """
 
-# Initialize RAG Manager (Persistent)
-rag_manager = VectorStoreManager()
-
-def archivist_node(state: AgentState):
+async def archivist_node(state: AgentState):
     """
     Scans local research directory using Vector Search (RAG).
     """
     topic = state.get('research_topic', 'General Project Context')
+    rag_manager = get_vector_store()  # Same shared manager the Planner uses
     local_dir = os.getenv("LOCAL_RESEARCH_DIR", "/workspace/data")
     
     print(f"📂 Archivist: Checking directory {local_dir}...")
     
-    # 1. Ingest Data (MVP: Simple check or reliable re-ingest)
-    # For a robust production app, we would check hashes.
-    # For now, we attempt to ingest. expected overhead is acceptable for small local sets.
-    # Optimization: We could add a flag in state to skip ingestion if done once.
-    if local_dir and os.path.exists(local_dir):
-        rag_log = rag_manager.ingest_directory(local_dir)
-        print(rag_log)
-    else:
+    # 1. No inline ingestion: the background indexer keeps the index fresh
+    if not local_dir:
         return {
             "local_knowledge": "No local research directory configured.",
-            "messages": [SystemMessage(content="Skipping Local Scan: Directory not found.")]
+            "messages": [SystemMessage(content="Skipping Local Scan: Directory not configured.")]
         }
 
     # 2. Semantic Search & Holistic Overview
     file_overview = rag_manager.get_file_overviews()
-    search_results = rag_manager.similarity_search(topic, k=8)
+    # Scoped to the folders configured right now (stale roots stay out of the results)
+    roots = [d.strip() for d in local_dir.split(',') if d.strip()]
+    search_results = await rag_manager.asimilarity_search(
+        topic, k=8, mode="mmr", roots=roots, token_budget=int(os.getenv("ARCHIVIST_RAG_TOKENS", "4000"))
+    )
     
     # 3. Synthesize with Qwen 3
     messages = [
@@ -54,7 +51,7 @@ def archivist_node(state: AgentState):
     ]
     
     try:
-        response = llm.invoke(messages)
+        response = await llm.ainvoke(messages)
         summary = response.content
     except Exception as e:
         summary = f"Local LLM (Ollama) failed. Raw Context:\n{search_results[:500]}..."
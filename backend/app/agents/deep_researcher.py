@@ -1,18 +1,19 @@
 import os
+import asyncio
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import SystemMessage, HumanMessage
 from app.core.state import AgentState
 from app.core.state import AgentState
-from app.utils import save_artifact
+from app.utils import save_artifact, CachedLLM
 from langchain_community.utilities import GoogleSearchAPIWrapper
 
 # SPECIALIZED DEEP RESEARCH ENGINE
 # This model is used ONLY for intensive investigative tasks.
-llm_deep = ChatGoogleGenerativeAI(
+llm_deep = CachedLLM(ChatGoogleGenerativeAI(
     model="deep-research-pro-preview-12-2025",
     temperature=0.2,
     google_api_key=os.getenv("GOOGLE_API_KEY")
-)
+))
 
 SYSTEM_PROMPT = """
 You are the **Specialized Deep Investigator**.
@@ -28,7 +29,7 @@ You will be provided with snippets or filenames from a local library. Focus your
 
 from langchain_core.runnables import RunnableConfig
 
-def deep_researcher_node(state: AgentState, config: RunnableConfig):
+async def deep_researcher_node(state: AgentState, config: RunnableConfig):
     """
     Focused Investigative Node using the specialized Deep Research model.
     """
@@ -45,7 +46,7 @@ def deep_researcher_node(state: AgentState, config: RunnableConfig):
         print(f"🌍 Performing Web Research on: {topic}")
         try:
             search = GoogleSearchAPIWrapper()
-            results = search.results(topic, 5)
+            results = await asyncio.to_thread(search.results, topic, 5)
             
             web_context = "\n\n**EXTERNAL WEB FINDINGS:**\n"
             for res in results:
@@ -81,7 +82,7 @@ def deep_researcher_node(state: AgentState, config: RunnableConfig):
     """
     
     try:
-        response = llm_deep.invoke([
+        response = await llm_deep.ainvoke([
             SystemMessage(content=SYSTEM_PROMPT),
             HumanMessage(content=prompt)
         ])
@@ -1,5 +1,6 @@
 import os
 from langchain_ollama import ChatOllama
+from app.utils import CachedLLM
 
 # Centralized Local LLM Definition
 # This allows us to easily switch the local model or config globally.
@@ -7,8 +8,8 @@ from langchain_ollama import ChatOllama
 
 MODEL_NAME = os.getenv("LOCAL_LLM_MODEL", "llama4") 
 
-local_llm = ChatOllama(
+local_llm = CachedLLM(ChatOllama(
     model=MODEL_NAME,   
     temperature=0.1,
     keep_alive="5m"      # Keep model in VRAM for 5 mins to speed up sequential agent steps
-)
+))
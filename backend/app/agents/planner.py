@@ -4,13 +4,13 @@ import json
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import SystemMessage, HumanMessage
 from app.core.state import AgentState
-from app.utils import RobustGemini
+from app.utils import RobustGemini, CachedLLM
 
 # Using Robust Model for Planning (Critical Step)
 # Using Robust Model for Planning (Critical Step)
-llm_planner = RobustGemini(
+llm_planner = CachedLLM(RobustGemini(
     temperature=0.3
-)
+))
 
 PLANNER_SYSTEM_PROMPT = """
 You are the **Lead Project Planner & Chief Librarian** for an advanced AI Agent team.
@@ -44,7 +44,7 @@ NOTE: 'assigned_to' must be one of: 'RESEARCHER', 'ARCHITECT', 'DEEP_RESEARCHER'
 Use 'DEEP_RESEARCHER' ONLY for tasks requiring intensive technical investigation or additional data searching.
 """
 
-def planner_node(state: AgentState):
+async def planner_node(state: AgentState):
     """
     Generates the initial project plan.
     """
@@ -58,24 +58,19 @@ def planner_node(state: AgentState):
             break
     
     # --- CONTEXT AWARENESS: RAG (Vector Search) ---
-    from app.core.rag import VectorStoreManager
-    rag = VectorStoreManager()
+    from app.core.rag import get_vector_store
+    rag = get_vector_store()  # Shared process-wide manager (no per-call client startup)
     
     local_files_context = ""
-    research_dirs = os.getenv("LOCAL_RESEARCH_DIR", "").split(",")
     
-    print("🧠 Planner: Initializing RAG for deep context analysis...")
-    
-    # 1. Ingest All Data
-    for d in research_dirs:
-        d = d.strip()
-        if d and os.path.exists(d):
-            print(f"   - Ingesting {d}...")
-            rag.ingest_directory(d)
+    # 1. Ingestion happens in the background indexer (app/core/indexer.py); we only query here,
+    #    so planning latency doesn't depend on corpus size.
+    print("🧠 Planner: Querying RAG index for deep context analysis...")
             
     # 2. Semantic Search for "User Goal"
     # We retrieve key chunks to understand what data exists related to the request
-    search_results = rag.similarity_search(goal, k=10)
+    # (MMR: relevant but diverse, instead of ten overlapping chunks of one file)
+    search_results = await rag.asimilarity_search(goal, k=10, mode="mmr", token_budget=int(os.getenv("PLANNER_RAG_TOKENS", "6000")))
     
     # 3. File Overview (List of ALL files)
     file_overview = rag.get_file_overviews()
@@ -102,7 +97,7 @@ def planner_node(state: AgentState):
             
     print(f"📋 Generating Project Plan... (Context: {len(found_files)} files found)")
     
-    response = llm_planner.invoke([
+    response = await llm_planner.ainvoke([
         SystemMessage(content=PLANNER_SYSTEM_PROMPT),
         HumanMessage(content=f"User Goal: {goal}{local_files_context}")
     ])
@@ -1,28 +1,30 @@
 import os
 import json
 import re
+import asyncio
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import SystemMessage, HumanMessage
 from app.core.state import AgentState
 from app.agents.local_model import local_llm
-from app.utils import RobustGemini
+from app.utils import RobustGemini, CachedLLM, tagged_config
+from app.core.extraction import EXTRACTOR_PACKAGES, get_extraction_cache
 
 # --- CONFIGURATION ---
 # Using Robust Polyglot Wrapper for Critical Operations if needed
 # But for orchestration, we use Flash for speed/cost.
-llm_flash = ChatGoogleGenerativeAI(
+llm_flash = CachedLLM(ChatGoogleGenerativeAI(
     model="gemini-3-flash-preview", 
     temperature=0.0, 
     google_api_key=os.getenv("GOOGLE_API_KEY")
-)
+))
 
 # Robust Wrapper for Final Polish or strictly following instruction if Local fails HARD
 # Standard Pro Orchestration
-llm_robust = RobustGemini(temperature=0.3)
+llm_robust = CachedLLM(RobustGemini(temperature=0.3))
 
 # SPECIALIZED DEEP RESEARCH ENGINE
 from app.utils import DeepResearcher
-deep_research_engine = DeepResearcher(temperature=0.4)
+deep_research_engine = CachedLLM(DeepResearcher(temperature=0.4))
 
 SYSTEM_PROMPT = """
 You are the **Deep Researcher & Technical Writer**.
@@ -41,7 +43,7 @@ Your goal is to build a **Comprehensive, Long-Form Report** on the user's topic.
 def read_full_docs(file_paths, research_dirs):
     """
     Reads full content of specific files for deep analysis.
-    Supports PDF and Text formats.
+    Supports PDF, DOCX and Text formats (PDF/DOCX text comes from the shared extraction cache).
     """
     full_text = ""
     for rel_path in file_paths:
@@ -61,19 +63,14 @@ def read_full_docs(file_paths, research_dirs):
             
         try:
             content = ""
-            if target_path.lower().endswith('.pdf'):
-                import pypdf
-                reader = pypdf.PdfReader(target_path)
-                for page in reader.pages:
-                    content += page.extract_text() + "\n"
-            elif target_path.lower().endswith('.docx'):
+            if target_path.lower().endswith(('.pdf', '.docx')):
+                # Shared extraction cache: parsed once, reused across chapters, re-runs and RAG ingestion
                 try:
-                    import docx
-                    doc = docx.Document(target_path)
-                    for para in doc.paragraphs:
-                        content += para.text + "\n"
-                except ImportError:
-                     content = "[Error: python-docx library not installed. Cannot read DOCX]"
+                    content = get_extraction_cache().get_text(target_path)
+                except ImportError as e:
+                    package = EXTRACTOR_PACKAGES.get(e.name, e.name or str(e))
+                    ext = os.path.splitext(target_path)[1].lstrip('.').upper()
+                    content = f"[Error: {package} library not installed. Cannot read {ext}]"
             else:
                 # Text files
                 with open(target_path, 'r', encoding='utf-8', errors='ignore') as f:
@@ -87,7 +84,7 @@ def read_full_docs(file_paths, research_dirs):
 
 from langchain_core.runnables import RunnableConfig
 
-def researcher_node(state: AgentState, config: RunnableConfig):
+async def researcher_node(state: AgentState, config: RunnableConfig):
     """
     Recursive Drafting Mode:
     1. Plan Sections (TOC).
@@ -139,7 +136,7 @@ def researcher_node(state: AgentState, config: RunnableConfig):
     # If topic requires external web search or is very complex, use Deep Research Engine
     if "web search" in topic.lower() or "external" in topic.lower() or mode == "deep_web":
         print(f"🌍 Activating Deep Research Engine for: {topic}")
-        deep_res = deep_research_engine.invoke([HumanMessage(content=topic)])
+        deep_res = await deep_research_engine.ainvoke([HumanMessage(content=topic)])
         return {
             "web_knowledge": deep_res.content,
             "shared_knowledge": f"Web Research:\n{deep_res.content}",
@@ -183,7 +180,7 @@ def researcher_node(state: AgentState, config: RunnableConfig):
     
     try:
         # Use Standard Pro model for structure (Gemini 3 Role)
-        toc_response = llm_robust.invoke([HumanMessage(content=toc_prompt)])
+        toc_response = await llm_robust.ainvoke([HumanMessage(content=toc_prompt)])
         
         # Handle Multipart/List Content
         content = toc_response.content
@@ -224,7 +221,7 @@ def researcher_node(state: AgentState, config: RunnableConfig):
         print(f"✍️ Drafting Chapter {i+1}: {title} (Refs: {len(files)} files)...")
         
         # A. Deep Read (Load Full Content)
-        chapter_context = read_full_docs(files, research_dirs)
+        chapter_context = await asyncio.to_thread(read_full_docs, files, research_dirs)
         
         # B. Draft (Local LLM) - Hybrid Cost Saving
         draft_prompt = f"""
@@ -247,17 +244,20 @@ def researcher_node(state: AgentState, config: RunnableConfig):
         - **SCOPE**: Stick to the chapter title. Do not wander into other topics.
         """
         
+        # Streamed tokens of this chapter's calls are tagged with its number (WebSocket token_stream)
+        chapter_config = tagged_config(config, chapter=i + 1, chapter_title=title)
+        
         try:
             # Local LLM Drafting
-            local_res = local_llm.invoke([
+            local_res = await local_llm.ainvoke([
                 SystemMessage(content=SYSTEM_PROMPT),
                 HumanMessage(content=draft_prompt)
-            ])
+            ], config=chapter_config)
             draft_text = local_res.content
             
             # C. Quick Check (Gemini Flash)
             check_prompt = f"Review this Korean text. Ensure it quotes local files and stays on topic. Text:\n{draft_text[:10000]}"
-            check_res = llm_flash.invoke([HumanMessage(content=check_prompt)])
+            check_res = await llm_flash.ainvoke([HumanMessage(content=check_prompt)], config=chapter_config)
             
             if len(draft_text) < 50: 
                final_text = check_res.content 
@@ -266,10 +266,10 @@ def researcher_node(state: AgentState, config: RunnableConfig):
                
         except Exception as e:
             print(f"⚠️ Local Draft Failed for {title}: {e}. Using Flash.")
-            fallback_res = llm_flash.invoke([
+            fallback_res = await llm_flash.ainvoke([
                 SystemMessage(content=SYSTEM_PROMPT), 
                 HumanMessage(content=draft_prompt)
-            ])
+            ], config=chapter_config)
             final_text = fallback_res.content
 
         full_report += f"\n## {title}\n\n{final_text}\n\n"
@@ -1,28 +1,29 @@
 import os
+import json
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import SystemMessage, HumanMessage
 from langgraph.graph import END
 
 from app.core.state import AgentState
 from app.agents.prompts import SUPERVISOR_SYSTEM_PROMPT, CONTENT_CRITIQUE_PROMPT, DESIGN_CRITIQUE_PROMPT
-from app.utils import RobustGemini
+from app.utils import RobustGemini, CachedLLM
 
 # --- TIERED MODEL STRATEGY ---
 # 1. Pro Model (Robust): Checks Quota, Falls back to Flash
-llm_pro = RobustGemini(
+llm_pro = CachedLLM(RobustGemini(
     temperature=0.2
-)
+))
 
 # 2. Flash Model: For repetitive tasks or simple routing
-llm_flash = ChatGoogleGenerativeAI(
+llm_flash = CachedLLM(ChatGoogleGenerativeAI(
     model="gemini-3-flash-preview", 
     temperature=0.0, 
     google_api_key=os.getenv("GOOGLE_API_KEY")
-)
+))
 
 from langchain_core.runnables import RunnableConfig
 
-def supervisor_node(state: AgentState, config: RunnableConfig):
+async def supervisor_node(state: AgentState, config: RunnableConfig):
     """
     The Supervisor determines the next step based on the current state.
     It acts as the Router and the Judge.
@@ -165,7 +166,7 @@ def supervisor_node(state: AgentState, config: RunnableConfig):
             """
             
             try:
-                fix_response = llm_pro.invoke([HumanMessage(content=intervention_prompt)])
+                fix_response = await llm_pro.ainvoke([HumanMessage(content=intervention_prompt)])
                 fixed_content = fix_response.content
                 
                 print("✅ Supervisor Forced Approval (30+). Moving Next.")
@@ -204,7 +205,7 @@ def supervisor_node(state: AgentState, config: RunnableConfig):
             """
              
             try:
-                fix_response = llm_pro.invoke([HumanMessage(content=intervention_prompt)])
+                fix_response = await llm_pro.ainvoke([HumanMessage(content=intervention_prompt)])
                 fixed_content = fix_response.content
                 
                 print(f"⚠️ Supervisor Sent Fixed Draft back to {assigned_to}.")
@@ -228,7 +229,7 @@ def supervisor_node(state: AgentState, config: RunnableConfig):
         # Regular Critique Path
         # Fix: Gemini API requires 'contents' (User Message). SystemMessage alone maps to system_instruction.
         # We send the prompt as a HumanMessage to ensure it's treated as input content.
-        response = llm_pro.invoke([HumanMessage(content=critique_prompt)])
+        response = await llm_pro.ainvoke([HumanMessage(content=critique_prompt)])
         
         # Handle List Content (OpenAI/Gemini Fallback)
         content = response.content
@@ -274,7 +275,7 @@ def supervisor_node(state: AgentState, config: RunnableConfig):
                 """
                 
                 try:
-                    refine_res = llm_pro.invoke([HumanMessage(content=refine_prompt)])
+                    refine_res = await llm_pro.ainvoke([HumanMessage(content=refine_prompt)])
                     refine_content = refine_res.content
                     if "no change" not in refine_content.lower() and "[" in refine_content:
                         # Attempt to parse new steps
@@ -12,6 +12,10 @@ from app.api.schemas import ChatInput, ChatOutput
 from app.api.schemas import ChatInput, ChatOutput
 # from app.core.graph import graph # REMOVED: Static import causes initialization issues
 from langchain_core.messages import HumanMessage
+from app.core.token_stream import TokenCoalescer
+
+# STREAM_TOKENS=false: only send the per-node summaries, no token-level streaming
+STREAM_TOKENS = os.getenv("STREAM_TOKENS", "true").lower() == "true"
 
 router = APIRouter()
 
@@ -31,6 +35,13 @@ class ConnectionManager:
         if client_id in self.active_connections:
             await self.active_connections[client_id].send_text(message)
 
+    async def broadcast_all(self, message: str):
+        for client_id in list(self.active_connections):
+            try:
+                await self.broadcast(message, client_id)
+            except Exception as e:
+                print(f"Broadcast to {client_id} failed: {e}")
+
 manager = ConnectionManager()
 
 
@@ -79,6 +90,10 @@ async def pick_folder():
             
             os.environ["LOCAL_RESEARCH_DIR"] = new_paths
             
+            # Index the new folder right away (in the background indexer, not this request)
+            from app.core.indexer import indexer
+            indexer.request_refresh(folder_path)
+            
             # Also invoke a log message via websocket broadcast if possible? 
             # (We don't have client_id here easily, so we just return it)
             return {"status": "success", "path": new_paths}
@@ -98,6 +113,82 @@ async def get_folders():
     folders = [f.strip() for f in raw.split(',') if f.strip()]
     return {"folders": folders}
 
+@router.get("/index/status")
+async def get_index_status():
+    """
+    Returns the background indexer's per-folder state, last result and lag.
+    """
+    from app.core.indexer import indexer
+    return indexer.status()
+
+def forward_ingest_progress(loop: asyncio.AbstractEventLoop):
+    """
+    Returns an indexer listener that relays ingest progress events to every connected
+    WebSocket. The indexer runs in its own thread, so events are handed to the server loop.
+    """
+    def listener(event: dict):
+        asyncio.run_coroutine_threadsafe(manager.broadcast_all(json.dumps(event, default=str)), loop)
+    return listener
+
+@router.post("/index/refresh")
+async def refresh_index(folder: str = None):
+    """
+    Forces a rescan of one research folder (or all of them) without waiting for the next poll.
+    """
+    from app.core.indexer import indexer
+    indexer.request_refresh(folder)
+    return {"status": "scheduled", "folder": folder or "all"}
+
+@router.post("/index/compact")
+async def compact_index():
+    """
+    Garbage-collects the RAG index (missing files, orphaned chunks) and compacts the vector
+    backend. Searches keep being served; the background indexer waits until it finishes.
+    Returns reclaimed space and search latency before/after.
+    """
+    from app.core.rag import get_vector_store
+    try:
+        report = await get_vector_store().acompact()
+        return {"status": "success", "report": report}
+    except Exception as e:
+        print(f"Error compacting index: {e}")
+        return {"status": "error", "message": str(e)}
+
+@router.get("/llm/health")
+async def llm_health():
+    """
+    Per-model circuit state, rolling latency and error rate of the LLM fallback chain,
+    provider limiter load (in flight / queued per thread), coalesced duplicate requests, and
+    response cache stats when LLM_CACHE is on.
+    """
+    from app.core.circuit_breaker import model_health
+    from app.core.llm_cache import get_llm_cache
+    from app.core.provider_limits import limiter_stats
+    from app.utils import llm_flights
+    cache = get_llm_cache()
+    return {
+        "models": model_health(),
+        "providers": limiter_stats(),
+        "coalesced_requests": llm_flights.coalesced,
+        "cache": cache.stats() if cache else None
+    }
+
+@router.get("/usage")
+async def usage_summary(thread_id: str = None, group_by: str = "thread_id,node,model", since: float = None):
+    """
+    Aggregated model usage (calls, tokens, cost, latency, cache hits, retries, errors),
+    grouped by any of thread_id / node / model / kind, optionally for one thread or since a unix timestamp.
+    """
+    from app.core.metering import get_meter
+    meter = get_meter()
+    if meter is None:
+        return {"status": "disabled", "usage": []}
+    try:
+        columns = [c.strip() for c in group_by.split(",") if c.strip()]
+        return {"status": "success", "usage": meter.summary(group_by=columns, thread_id=thread_id, since=since)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("/artifacts")
 async def list_artifacts(thread_id: str = None):
     """
@@ -317,7 +408,12 @@ async def run_graph_execution(client_id: str, user_input: str):
     if user_input == "RESUME":
         await manager.broadcast(json.dumps({"type": "log", "content": "🔄 Resuming Research from Checkpoint..."}), client_id)
 
+    # Model tokens go out as coalesced "token_stream" frames (~50ms) while the nodes are still writing
+    token_stream = TokenCoalescer(lambda frame: manager.broadcast(json.dumps(frame, ensure_ascii=False), client_id))
+
     try:
+        if STREAM_TOKENS:
+            token_stream.start()
         async for event in graph_module.graph.astream_events(
             input_data,
             config=config,
@@ -325,6 +421,9 @@ async def run_graph_execution(client_id: str, user_input: str):
         ):
             kind = event["event"]
             
+            if STREAM_TOKENS and await token_stream.handle(event):
+                continue
+            
             # Events Processing (Same as before)
             if kind == "on_chain_end":
                 data = event['data'].get('output')
@@ -391,4 +490,7 @@ async def run_graph_execution(client_id: str, user_input: str):
         import traceback
         print(f"Graph Error: {e}\n{traceback.format_exc()}")
         await manager.broadcast(json.dumps({"type": "error", "content": str(e)}), client_id)
+    finally:
+        # Also on cancel/error: the client must not be left with half-open streams
+        await token_stream.close()
 
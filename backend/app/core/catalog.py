@@ -0,0 +1,123 @@
+import os
+import time
+import sqlite3
+import threading
+from typing import List, Dict, Optional, Any
+
+
+class SourceCatalog:
+    """
+    Persistent catalog (SQLite) of every ingested source file.
+    Populated at ingest time, so listing the library is an index read with no embedding calls.
+    """
+    COLUMNS = ["path", "root", "rel_path", "file_type", "size", "mtime_ns", "chunk_count", "snippet", "summary", "ingested_at"]
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sources (
+                path TEXT PRIMARY KEY,
+                root TEXT NOT NULL,
+                rel_path TEXT NOT NULL,
+                file_type TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                chunk_count INTEGER NOT NULL,
+                snippet TEXT NOT NULL,
+                summary TEXT,
+                ingested_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sources_root ON sources (root, rel_path)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sources_type ON sources (file_type)")
+        self._conn.commit()
+
+    def upsert(self, path: str, root: str, size: int, mtime_ns: int, chunk_count: int, snippet: str):
+        """
+        Records (or refreshes) a source. A cached summary is kept only if the file is unchanged.
+        """
+        rel_path = os.path.relpath(path, root)
+        file_type = os.path.splitext(path)[1].lstrip('.').lower()
+        snippet = " ".join(snippet.split())[:200]
+        with self._lock:
+            previous = self._conn.execute(
+                "SELECT size, mtime_ns, summary FROM sources WHERE path = ?", (path,)
+            ).fetchone()
+            summary = previous[2] if previous and previous[:2] == (size, mtime_ns) else None
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sources (path, root, rel_path, file_type, size, mtime_ns, chunk_count, snippet, summary, ingested_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, os.path.abspath(root), rel_path, file_type, size, mtime_ns, chunk_count, snippet, summary, time.time())
+            )
+            self._conn.commit()
+
+    def set_summary(self, path: str, summary: str):
+        with self._lock:
+            self._conn.execute("UPDATE sources SET summary = ? WHERE path = ?", (summary, path))
+            self._conn.commit()
+
+    def has(self, path: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM sources WHERE path = ?", (path,)).fetchone() is not None
+
+    def remove(self, path: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM sources WHERE path = ?", (path,))
+            self._conn.commit()
+
+    def _where(self, file_type: str = None, root: str = None, name_contains: str = None):
+        clauses, params = [], []
+        if file_type:
+            clauses.append("file_type = ?")
+            params.append(file_type.lstrip('.').lower())
+        if root:
+            clauses.append("root = ?")
+            params.append(os.path.abspath(root))
+        if name_contains:
+            clauses.append("rel_path LIKE ?")
+            params.append(f"%{name_contains}%")
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def list(self, offset: int = 0, limit: int = 100, file_type: str = None, root: str = None,
+             name_contains: str = None) -> List[Dict[str, Any]]:
+        """
+        Returns one page of sources ordered by (root, rel_path), optionally filtered.
+        """
+        where, params = self._where(file_type, root, name_contains)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM sources{where} ORDER BY root, rel_path LIMIT ? OFFSET ?",
+                [*params, limit, offset]
+            ).fetchall()
+        return [dict(zip(self.COLUMNS, row)) for row in rows]
+
+    def count(self, file_type: str = None, root: str = None, name_contains: str = None) -> int:
+        where, params = self._where(file_type, root, name_contains)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM sources{where}", params).fetchone()[0]
+
+    def roots(self) -> List[str]:
+        """Distinct research roots that have at least one cataloged source."""
+        with self._lock:
+            return [r[0] for r in self._conn.execute("SELECT DISTINCT root FROM sources ORDER BY root").fetchall()]
+
+    def get(self, path: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM sources WHERE path = ?", (path,)
+            ).fetchone()
+        return dict(zip(self.COLUMNS, row)) if row else None
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM sources")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,142 @@
+import os
+import ast
+from typing import List, Tuple, Dict, Any, Callable
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter, MarkdownHeaderTextSplitter, Language
+
+from app.core.context_packing import count_tokens
+
+# Bump when the way files are cut into chunks changes: the index is rebuilt on the next start
+CHUNKER_VERSION = 2
+
+PYTHON_SEPARATORS = ["\nclass ", "\ndef ", "\nasync def ", "\n    def ", "\n    async def ", "\n\n", "\n", " ", ""]
+# Tried before the language's own separators: exported declarations are the natural units
+EXTRA_SEPARATORS = {ext: ["\nexport "] for ext in (".ts", ".tsx", ".js")}
+MARKDOWN_HEADERS = [("#", "h1"), ("##", "h2"), ("###", "h3")]
+LANGUAGES = {
+    ".ts": Language.TS,
+    ".tsx": Language.TS,
+    ".js": Language.JS,
+    ".html": Language.HTML,
+    ".md": Language.MARKDOWN,
+}
+
+
+class Chunker:
+    """
+    Picks a splitting strategy per file type and sizes every chunk in tokens (tiktoken),
+    so Korean and English text get comparable chunks.
+    - .py: top-level functions/classes from the AST, small neighbours packed together
+    - .md: heading sections (heading text kept, path recorded as `section`)
+    - .ts/.tsx/.js/.html: declaration-level separators
+    - PDF/DOCX: one Document per page comes in, so chunks never span pages
+    - RAG_CHUNK_TOKENS: target chunk size (default 400)
+    - RAG_CHUNK_OVERLAP_TOKENS: overlap when a unit has to be cut (default 50)
+    """
+    def __init__(self, chunk_tokens: int = None, overlap_tokens: int = None,
+                 length_function: Callable[[str], int] = count_tokens):
+        self.chunk_tokens = chunk_tokens or int(os.getenv("RAG_CHUNK_TOKENS", "400"))
+        self.overlap_tokens = overlap_tokens if overlap_tokens is not None else int(os.getenv("RAG_CHUNK_OVERLAP_TOKENS", "50"))
+        self.length = length_function
+        self._default = self._splitter(["\n\n", "\n", " ", ""])
+        self._python = self._splitter(PYTHON_SEPARATORS)
+        self._languages = {
+            ext: self._splitter(EXTRA_SEPARATORS.get(ext, []) + RecursiveCharacterTextSplitter.get_separators_for_language(language))
+            for ext, language in LANGUAGES.items()
+        }
+        self._markdown = MarkdownHeaderTextSplitter(headers_to_split_on=MARKDOWN_HEADERS, strip_headers=False)
+
+    def _splitter(self, separators: List[str]) -> RecursiveCharacterTextSplitter:
+        return RecursiveCharacterTextSplitter(
+            chunk_size=self.chunk_tokens,
+            chunk_overlap=self.overlap_tokens,
+            length_function=self.length,
+            separators=separators
+        )
+
+    def layout(self) -> Dict[str, Any]:
+        """Settings that change chunk boundaries (recorded in the index layout)."""
+        return {"chunker": CHUNKER_VERSION, "chunk_tokens": self.chunk_tokens, "overlap_tokens": self.overlap_tokens}
+
+    def split(self, documents: List[Document]) -> List[Document]:
+        chunks = []
+        for doc in documents:
+            ext = os.path.splitext(doc.metadata.get("source", ""))[1].lower()
+            if ext == ".py":
+                chunks.extend(self._split_python(doc))
+            elif ext == ".md":
+                chunks.extend(self._split_markdown(doc))
+            elif ext in self._languages:
+                chunks.extend(self._languages[ext].split_documents([doc]))
+            else:
+                chunks.extend(self._default.split_documents([doc]))
+        return [c for c in chunks if c.page_content.strip()]
+
+    def _pack(self, doc: Document, pieces: List[Tuple[str, Dict[str, Any]]], joiner: str,
+              fallback: RecursiveCharacterTextSplitter) -> List[Document]:
+        """
+        Greedily packs consecutive structural units into chunks of at most chunk_tokens.
+        A unit that is too big on its own is cut by `fallback`.
+        """
+        chunks: List[Document] = []
+        buffer: List[Tuple[str, Dict[str, Any]]] = []
+        buffer_tokens = 0
+
+        def flush():
+            nonlocal buffer, buffer_tokens
+            if buffer:
+                metadata = dict(doc.metadata)
+                for key in ("symbols", "section"):
+                    values = [m[key] for _, m in buffer if m.get(key)]
+                    if values:
+                        metadata[key] = ", ".join(values) if key == "symbols" else values[0]
+                chunks.append(Document(page_content=joiner.join(t for t, _ in buffer), metadata=metadata))
+            buffer, buffer_tokens = [], 0
+
+        for text, meta in pieces:
+            if not text.strip():
+                # Blank lines between units stay with the unit before them
+                if buffer:
+                    buffer[-1] = (buffer[-1][0] + text, buffer[-1][1])
+                continue
+            tokens = self.length(text)
+            if tokens > self.chunk_tokens:
+                flush()
+                chunks.extend(fallback.split_documents([Document(page_content=text, metadata={**doc.metadata, **meta})]))
+                continue
+            if buffer and buffer_tokens + tokens > self.chunk_tokens:
+                flush()
+            buffer.append((text, meta))
+            buffer_tokens += tokens
+        flush()
+        return chunks
+
+    def _split_python(self, doc: Document) -> List[Document]:
+        text = doc.page_content
+        try:
+            tree = ast.parse(text)
+        except (SyntaxError, ValueError):
+            return self._python.split_documents([doc])
+
+        lines = text.splitlines(keepends=True)
+        pieces: List[Tuple[str, Dict[str, Any]]] = []
+        cursor = 0
+        for node in tree.body:
+            if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                continue
+            start = min([node.lineno] + [d.lineno for d in node.decorator_list]) - 1
+            if start > cursor:
+                pieces.append(("".join(lines[cursor:start]), {}))
+            pieces.append(("".join(lines[start:node.end_lineno]), {"symbols": node.name}))
+            cursor = node.end_lineno
+        pieces.append(("".join(lines[cursor:]), {}))
+        return self._pack(doc, pieces, "", self._python)
+
+    def _split_markdown(self, doc: Document) -> List[Document]:
+        sections = self._markdown.split_text(doc.page_content)
+        pieces = []
+        for section in sections:
+            path = " > ".join(section.metadata[name] for _, name in MARKDOWN_HEADERS if name in section.metadata)
+            pieces.append((section.page_content, {"section": path} if path else {}))
+        return self._pack(doc, pieces, "\n\n", self._languages[".md"])
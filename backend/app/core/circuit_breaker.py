@@ -0,0 +1,122 @@
+import os
+import time
+import threading
+import statistics
+from collections import deque
+from typing import Dict, Any
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Per-model circuit breaker with rolling health stats (thread-safe, no I/O).
+    - closed: calls go through.
+    - open: the model is skipped until the cool-down expires (no failed round-trip per call).
+    - half_open: one probe call is let through; success closes the circuit, failure re-opens it
+      with a doubled cool-down (capped), so a model that stays quota-exhausted for hours costs
+      one probe per cool-down instead of one failed call per request.
+    - LLM_BREAKER_COOLDOWN: initial cool-down in seconds (default 60)
+    - LLM_BREAKER_MAX_COOLDOWN: cool-down cap in seconds (default 1800)
+    - LLM_HEALTH_WINDOW: seconds of calls kept for latency / error-rate stats (default 300)
+    """
+    def __init__(self, name: str, cooldown: float = None, max_cooldown: float = None, window: float = None):
+        self.name = name
+        self.base_cooldown = cooldown if cooldown is not None else float(os.getenv("LLM_BREAKER_COOLDOWN", "60"))
+        self.max_cooldown = max_cooldown if max_cooldown is not None else float(os.getenv("LLM_BREAKER_MAX_COOLDOWN", "1800"))
+        self.window = window if window is not None else float(os.getenv("LLM_HEALTH_WINDOW", "300"))
+        self.state = CLOSED
+        self.cooldown = self.base_cooldown
+        self._opened_at = 0.0
+        self._probe_started = None
+        self._calls = deque()  # (timestamp, latency_s, ok)
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float):
+        while self._calls and now - self._calls[0][0] > self.window:
+            self._calls.popleft()
+
+    def allow(self) -> bool:
+        """True if a call may be sent now. In half-open state only one probe is in flight at a time."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            now = time.monotonic()
+            if self.state == OPEN:
+                if now - self._opened_at < self.cooldown:
+                    return False
+                self.state = HALF_OPEN
+                self._probe_started = None
+            # A probe that never reported back (e.g. cancelled) doesn't block the model forever
+            if self._probe_started is not None and now - self._probe_started < self.cooldown:
+                return False
+            self._probe_started = now
+            return True
+
+    def record_success(self, latency: float):
+        with self._lock:
+            now = time.monotonic()
+            self._calls.append((now, latency, True))
+            self._expire(now)
+            if self.state != CLOSED:
+                print(f"✅ Circuit CLOSED for {self.name}: model is healthy again.")
+            self.state = CLOSED
+            self.cooldown = self.base_cooldown
+            self._probe_started = None
+
+    def record_failure(self, latency: float, trip: bool = True):
+        """Counts a failed call; `trip` opens the circuit (quota / model-not-found errors)."""
+        with self._lock:
+            now = time.monotonic()
+            self._calls.append((now, latency, False))
+            self._expire(now)
+            if not trip and self.state == CLOSED:
+                return
+            if self.state == HALF_OPEN:
+                self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+            self.state = OPEN
+            self._opened_at = now
+            self._probe_started = None
+            print(f"🔌 Circuit OPEN for {self.name}: skipping it for {self.cooldown:.0f}s.")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._expire(time.monotonic())
+            calls = list(self._calls)
+            state, cooldown = self.state, self.cooldown
+            retry_in = max(0.0, self._opened_at + cooldown - time.monotonic()) if state == OPEN else 0.0
+        latencies = [c[1] for c in calls if c[2]]
+        errors = sum(1 for c in calls if not c[2])
+        return {
+            "state": state,
+            "cooldown_s": cooldown,
+            "retry_in_s": round(retry_in, 1),
+            "calls": len(calls),
+            "errors": errors,
+            "error_rate": round(errors / len(calls), 3) if calls else 0.0,
+            "p50_latency_s": round(statistics.median(latencies), 3) if latencies else None,
+            "max_latency_s": round(max(latencies), 3) if latencies else None,
+        }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(model_name: str) -> CircuitBreaker:
+    """Process-wide breaker for a model, shared by every wrapper that calls it."""
+    with _breakers_lock:
+        breaker = _breakers.get(model_name)
+        if breaker is None:
+            breaker = CircuitBreaker(model_name)
+            _breakers[model_name] = breaker
+        return breaker
+
+
+def model_health() -> Dict[str, Dict[str, Any]]:
+    """model name -> state, rolling latency and error rate."""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {b.name: b.stats() for b in breakers}
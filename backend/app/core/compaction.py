@@ -0,0 +1,34 @@
+import os
+import sys
+import json
+import argparse
+
+# Index garbage collection & compaction (see VectorStoreManager.compact).
+# CLI, with the server stopped:
+#     cd backend && python -m app.core.compaction [--persistence-dir DIR] [--probes 20]
+# On a running server use POST /api/index/compact instead: it runs in-process, where it can
+# coordinate with the background indexer and concurrent searches.
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reconcile the RAG index with the filesystem and compact it.")
+    parser.add_argument("--persistence-dir", default=None, help="Vector store directory (default: backend/data/chroma_db)")
+    parser.add_argument("--probes", type=int, default=20, help="Stored vectors used to time searches before/after")
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    from app.core.rag import get_vector_store, shutdown_vector_stores
+    try:
+        report = get_vector_store(args.persistence_dir).compact(probe_samples=args.probes)
+    finally:
+        shutdown_vector_stores()
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    # Allow running as a plain script from backend/
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+    sys.exit(main())
@@ -0,0 +1,128 @@
+import os
+import threading
+from typing import List, Dict, Any, Optional
+
+from langchain_core.documents import Document
+
+from app.core.embedding_pipeline import estimate_tokens
+
+_encoding = None
+_encoding_lock = threading.Lock()
+_encoding_failed = False
+
+
+def _get_encoding():
+    """tiktoken encoding (TOKENIZER_ENCODING, default cl100k_base), loaded once."""
+    global _encoding, _encoding_failed
+    if _encoding is not None or _encoding_failed:
+        return _encoding
+    with _encoding_lock:
+        if _encoding is None and not _encoding_failed:
+            try:
+                import tiktoken
+                _encoding = tiktoken.get_encoding(os.getenv("TOKENIZER_ENCODING", "cl100k_base"))
+            except Exception as e:
+                # e.g. offline and the BPE file isn't cached yet
+                print(f"⚠️ Context Packing: tiktoken unavailable ({e}), falling back to a ~4 chars/token estimate.")
+                _encoding_failed = True
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    encoding = _get_encoding()
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cuts `text` to at most `max_tokens` tokens."""
+    encoding = _get_encoding()
+    if encoding is None:
+        return text[:max_tokens * 4]
+    tokens = encoding.encode(text, disallowed_special=())
+    return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+
+
+def _chunk_index(doc: Document) -> Optional[int]:
+    # Position of the chunk in its file (set at ingest); chunks handed over from another file have none
+    index = doc.metadata.get("chunk_index")
+    return index if isinstance(index, int) else None
+
+
+def _join_overlapping(first: str, second: str, max_overlap: int = 400) -> str:
+    """Concatenates two consecutive chunks, dropping the splitter overlap they share."""
+    for n in range(min(len(first), len(second), max_overlap), 0, -1):
+        if first.endswith(second[:n]):
+            return first + second[n:]
+    return first + "\n" + second
+
+
+def _render(groups: List[List[Document]]) -> str:
+    parts = []
+    for i, group in enumerate(groups):
+        source = group[0].metadata.get('source', 'Unknown')
+        alternates = group[0].metadata.get('alternate_sources')
+        if alternates:
+            source += f" (also in: {', '.join(alternates)})"
+        content = group[0].page_content
+        for doc in group[1:]:
+            content = _join_overlapping(content, doc.page_content)
+        content = content.replace('\n', ' ')
+        parts.append(f"Source [{i+1}]: {source}\nContent: {content}\n")
+    return "\n---\n".join(parts)
+
+
+def _group(selected: List[Document]) -> List[List[Document]]:
+    """
+    Merges runs of consecutive chunks of the same source, keeping the rank order of each
+    group's best chunk.
+    """
+    groups: List[List[Document]] = []
+    for doc in selected:
+        index = _chunk_index(doc)
+        for group in groups:
+            if group[0].metadata.get('source') != doc.metadata.get('source') or index is None:
+                continue
+            indexes = [_chunk_index(d) for d in group]
+            if index + 1 == indexes[0]:
+                group.insert(0, doc)
+                break
+            if index - 1 == indexes[-1]:
+                group.append(doc)
+                break
+        else:
+            groups.append([doc])
+    return groups
+
+
+def pack_context(docs: List[Document], token_budget: int) -> Dict[str, Any]:
+    """
+    Greedily packs ranked chunks (best first) into at most `token_budget` tokens.
+    Consecutive chunks of one source are merged into a single passage (header and overlap
+    counted once), and a chunk that doesn't fit is skipped so smaller, lower-ranked ones
+    can still use the room. Returns:
+    {"text", "tokens", "budget", "included": [...], "dropped": [{"source", "chunk_id", "tokens"}]}
+    """
+    selected: List[Document] = []
+    dropped = []
+    text, used = "", 0
+    for doc in docs:
+        candidate = selected + [doc]
+        candidate_text = _render(_group(candidate))
+        tokens = count_tokens(candidate_text)
+        if tokens <= token_budget:
+            selected, text, used = candidate, candidate_text, tokens
+        else:
+            dropped.append({
+                "source": doc.metadata.get('source', 'Unknown'),
+                "chunk_id": doc.metadata.get('chunk_id'),
+                "tokens": count_tokens(doc.page_content),
+            })
+    return {
+        "text": text,
+        "tokens": used,
+        "budget": token_budget,
+        "included": [{"source": d.metadata.get('source', 'Unknown'), "chunk_id": d.metadata.get('chunk_id')} for d in selected],
+        "dropped": dropped,
+    }
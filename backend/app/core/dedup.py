@@ -0,0 +1,256 @@
+import os
+import re
+import json
+import random
+import sqlite3
+import hashlib
+import threading
+from array import array
+from typing import Any, List, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.core.lexical_index import where_to_sql
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _permutations(num_perm: int) -> List[Tuple[int, int]]:
+    # Fixed seed: signatures must stay comparable across runs and processes
+    rng = random.Random(1)
+    return [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME)) for _ in range(num_perm)]
+
+
+def _mod_mersenne(x: np.ndarray) -> np.ndarray:
+    """x mod 2^61-1 for uint64 x, using 2^61 = 1 (mod p)."""
+    x = (x & _P) + (x >> np.uint64(61))
+    # x - p wraps around to a huge value when x < p
+    return np.minimum(x, x - _P)
+
+
+def _mulmod(a: np.ndarray, h: np.ndarray) -> np.ndarray:
+    """
+    Exact (a * h) mod 2^61-1 for a, h < 2^61 without overflowing uint64: both are split into
+    32-bit halves and the partial products are folded with 2^61 = 1, 2^64 = 8 (mod p).
+    Matches the pure-Python big-int result bit for bit, so stored signatures stay comparable.
+    """
+    mask32 = np.uint64(0xFFFFFFFF)
+    a1, a0 = a >> np.uint64(32), a & mask32
+    h1, h0 = h >> np.uint64(32), h & mask32
+    high = (a1 * h1) << np.uint64(3)                                  # a1*h1*2^64, < 2^61
+    mid = a1 * h0 + a0 * h1                                           # < 2^62
+    mid = (mid >> np.uint64(29)) + ((mid & np.uint64((1 << 29) - 1)) << np.uint64(32))  # mid*2^32
+    low = _mod_mersenne(a0 * h0)
+    return _mod_mersenne(_mod_mersenne(high + _mod_mersenne(mid)) + low)
+
+
+_P = np.uint64(_MERSENNE_PRIME)
+
+
+def shingles(text: str, size: int = 3) -> set:
+    """Lower-cased word n-grams; whitespace/punctuation differences between versions don't matter."""
+    words = [w.lower() for w in _WORD_RE.findall(text)]
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """
+    MinHash signatures: the fraction of equal slots between two signatures estimates the
+    Jaccard similarity of the chunks' shingle sets.
+    """
+    def __init__(self, num_perm: int = 64, shingle_size: int = 3):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self._perms = _permutations(num_perm)
+        self._a = np.array([a for a, _ in self._perms], dtype=np.uint64)[:, None]
+        self._b = np.array([b for _, b in self._perms], dtype=np.uint64)[:, None]
+
+    def signature(self, text: str) -> List[int]:
+        hashes = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little") & _MERSENNE_PRIME
+             for s in shingles(text, self.shingle_size)),
+            dtype=np.uint64
+        )
+        if not len(hashes):
+            return [_MERSENNE_PRIME] * self.num_perm
+        # All permutations x all shingles in one (num_perm, n) array instead of a Python double loop
+        return _mod_mersenne(_mulmod(self._a, hashes[None, :]) + self._b).min(axis=1).tolist()
+
+
+def similarity(sig_a: List[int], sig_b: List[int]) -> float:
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+
+class DedupIndex:
+    """
+    Persistent near-duplicate index (SQLite) over canonical chunks, scoped per research root.
+    Candidates come from LSH banding (chunks sharing any band of their signature) and are then
+    verified against the similarity threshold. Duplicates are recorded as aliases: the
+    canonical chunk plus the other source files that contain (nearly) the same text.
+    - RAG_DEDUP_THRESHOLD: estimated Jaccard similarity above which chunks are merged (default 0.85)
+    """
+    def __init__(self, db_path: str, threshold: float = None, num_perm: int = 64, bands: int = 8):
+        self.db_path = db_path
+        self.threshold = threshold if threshold is not None else float(os.getenv("RAG_DEDUP_THRESHOLD", "0.85"))
+        self.hasher = MinHasher(num_perm=num_perm)
+        self.bands = bands
+        self.rows = num_perm // bands
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS signatures (
+                chunk_id TEXT PRIMARY KEY,
+                scope TEXT NOT NULL,
+                source TEXT NOT NULL,
+                signature BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS buckets (
+                scope TEXT NOT NULL,
+                band INTEGER NOT NULL,
+                bucket TEXT NOT NULL,
+                chunk_id TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_buckets ON buckets (scope, band, bucket);
+            CREATE INDEX IF NOT EXISTS idx_buckets_chunk ON buckets (chunk_id);
+            CREATE TABLE IF NOT EXISTS aliases (
+                chunk_id TEXT NOT NULL,
+                source TEXT NOT NULL,
+                metadata TEXT NOT NULL DEFAULT '{}',
+                PRIMARY KEY (chunk_id, source)
+            );
+            CREATE INDEX IF NOT EXISTS idx_aliases_source ON aliases (source);
+            """
+        )
+        columns = [r[1] for r in self._conn.execute("PRAGMA table_info(aliases)")]
+        if "metadata" not in columns:
+            # Aliases recorded before they carried their file's filterable metadata
+            self._conn.execute("ALTER TABLE aliases ADD COLUMN metadata TEXT NOT NULL DEFAULT '{}'")
+        self._conn.commit()
+
+    def _band_keys(self, signature: List[int]) -> List[str]:
+        return [
+            hashlib.sha1(array("Q", signature[b * self.rows:(b + 1) * self.rows]).tobytes()).hexdigest()[:16]
+            for b in range(self.bands)
+        ]
+
+    def signature(self, text: str) -> List[int]:
+        return self.hasher.signature(text)
+
+    def find(self, signature: List[int], scope: str) -> Optional[str]:
+        """Returns the most similar canonical chunk in `scope` above the threshold, if any."""
+        keys = self._band_keys(signature)
+        with self._lock:
+            candidates = set()
+            for band, key in enumerate(keys):
+                candidates.update(r[0] for r in self._conn.execute(
+                    "SELECT chunk_id FROM buckets WHERE scope = ? AND band = ? AND bucket = ?", (scope, band, key)
+                ))
+            best_id, best_score = None, self.threshold
+            for cid in candidates:
+                row = self._conn.execute("SELECT signature FROM signatures WHERE chunk_id = ?", (cid,)).fetchone()
+                if row is None:
+                    continue
+                score = similarity(signature, array("Q", row[0]))
+                if score >= best_score:
+                    best_id, best_score = cid, score
+        return best_id
+
+    def add(self, chunk_id: str, scope: str, source: str, signature: List[int]):
+        """Registers a canonical chunk."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO signatures (chunk_id, scope, source, signature) VALUES (?, ?, ?, ?)",
+                (chunk_id, scope, source, array("Q", signature).tobytes())
+            )
+            self._conn.execute("DELETE FROM buckets WHERE chunk_id = ?", (chunk_id,))
+            self._conn.executemany(
+                "INSERT INTO buckets (scope, band, bucket, chunk_id) VALUES (?, ?, ?, ?)",
+                [(scope, band, key, chunk_id) for band, key in enumerate(self._band_keys(signature))]
+            )
+            self._conn.commit()
+
+    def add_alias(self, chunk_id: str, source: str, metadata: Dict[str, Any] = None):
+        """
+        Records that `source` also contains the canonical chunk's text. `metadata` is the
+        alternate file's filterable metadata (rel_path, file_type, ...), see matching_aliases.
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO aliases (chunk_id, source, metadata) VALUES (?, ?, ?)",
+                (chunk_id, source, json.dumps(metadata or {}))
+            )
+            self._conn.commit()
+
+    def matching_aliases(self, where: Dict[str, Any]) -> List[str]:
+        """
+        Canonical chunks with an alternate source whose metadata matches a Chroma-style `where`
+        filter, so filtered searches still find text that was only stored once.
+        """
+        clause, params = where_to_sql(where)
+        with self._lock:
+            return [r[0] for r in self._conn.execute(
+                f"SELECT DISTINCT chunk_id FROM aliases WHERE {clause}", params
+            )]
+
+    def remove_source_aliases(self, source: str):
+        """Forgets every alias held by `source` (before it is re-ingested or purged)."""
+        with self._lock:
+            self._conn.execute("DELETE FROM aliases WHERE source = ?", (source,))
+            self._conn.commit()
+
+    def alternates(self, chunk_ids: List[str]) -> Dict[str, List[str]]:
+        """chunk_id -> other sources containing the same text (only chunks that have any)."""
+        result: Dict[str, List[str]] = {}
+        with self._lock:
+            for start in range(0, len(chunk_ids), 500):
+                batch = chunk_ids[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                for cid, source in self._conn.execute(
+                    f"SELECT chunk_id, source FROM aliases WHERE chunk_id IN ({placeholders}) ORDER BY source", batch
+                ):
+                    result.setdefault(cid, []).append(source)
+        return result
+
+    def get(self, chunk_id: str) -> Optional[Dict[str, object]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT scope, source, signature FROM signatures WHERE chunk_id = ?", (chunk_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"scope": row[0], "source": row[1], "signature": list(array("Q", row[2]))}
+
+    def remove(self, chunk_ids: List[str]):
+        """Drops canonical chunks together with their buckets and aliases."""
+        with self._lock:
+            for start in range(0, len(chunk_ids), 500):
+                batch = chunk_ids[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                for table in ("signatures", "buckets", "aliases"):
+                    self._conn.execute(f"DELETE FROM {table} WHERE chunk_id IN ({placeholders})", batch)
+            self._conn.commit()
+
+    def chunk_ids(self) -> List[str]:
+        with self._lock:
+            return [r[0] for r in self._conn.execute("SELECT chunk_id FROM signatures").fetchall()]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            canonical = self._conn.execute("SELECT COUNT(*) FROM signatures").fetchone()[0]
+            aliases = self._conn.execute("SELECT COUNT(*) FROM aliases").fetchone()[0]
+        return {"canonical_chunks": canonical, "aliases": aliases}
+
+    def clear(self):
+        with self._lock:
+            for table in ("signatures", "buckets", "aliases"):
+                self._conn.execute(f"DELETE FROM {table}")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,141 @@
+import os
+import time
+import hashlib
+import sqlite3
+import threading
+from array import array
+from typing import List, Dict, Optional
+
+from app.core.paths import data_path
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Disk-backed (SQLite) store of embedding vectors keyed by
+    (model name, task_type, sha256 of text). Vectors are stored as packed float32.
+    Bounded by `max_bytes`; least-recently-used rows are evicted first.
+    """
+    def __init__(self, db_path: str = None, max_bytes: int = None):
+        if db_path is None:
+            db_path = data_path("embedding_cache.sqlite")
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv("EMBEDDING_CACHE_MAX_MB", "256")) * 1024 * 1024)
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        # Lets INSERT OR REPLACE fire the delete trigger for the row it replaces
+        self._conn.execute("PRAGMA recursive_triggers = ON")
+        self._conn.executescript(
+            """
+            BEGIN IMMEDIATE;
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                task_type TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (model, task_type, text_hash)
+            );
+            CREATE INDEX IF NOT EXISTS idx_embeddings_lru ON embeddings (last_access);
+            -- Running byte total, kept by triggers so eviction checks don't SUM the whole table
+            CREATE TABLE IF NOT EXISTS stats (id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER NOT NULL);
+            INSERT OR IGNORE INTO stats (id, bytes) SELECT 0, COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings;
+            CREATE TRIGGER IF NOT EXISTS embeddings_bytes_insert AFTER INSERT ON embeddings BEGIN
+                UPDATE stats SET bytes = bytes + LENGTH(NEW.vector) WHERE id = 0;
+            END;
+            CREATE TRIGGER IF NOT EXISTS embeddings_bytes_delete AFTER DELETE ON embeddings BEGIN
+                UPDATE stats SET bytes = bytes - LENGTH(OLD.vector) WHERE id = 0;
+            END;
+            CREATE TRIGGER IF NOT EXISTS embeddings_bytes_update AFTER UPDATE OF vector ON embeddings BEGIN
+                UPDATE stats SET bytes = bytes + LENGTH(NEW.vector) - LENGTH(OLD.vector) WHERE id = 0;
+            END;
+            COMMIT;
+            """
+        )
+
+    def get_many(self, model: str, task_type: str, hashes: List[str]) -> Dict[str, List[float]]:
+        """
+        Returns {text_hash: vector} for every hash present in the cache and bumps their LRU stamp.
+        """
+        found = {}
+        if not hashes:
+            return found
+        unique = list(dict.fromkeys(hashes))
+        with self._lock:
+            # SQLite caps bound parameters, so look up in slices
+            for start in range(0, len(unique), 500):
+                batch = unique[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND task_type = ? AND text_hash IN ({placeholders})",
+                    [model, task_type, *batch]
+                ).fetchall()
+                for h, blob in rows:
+                    found[h] = array("f", blob).tolist()
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE model = ? AND task_type = ? AND text_hash = ?",
+                    [(now, model, task_type, h) for h in found]
+                )
+                self._conn.commit()
+
+        self.hits += len(found)
+        self.misses += len(unique) - len(found)
+        return found
+
+    def get(self, model: str, task_type: str, h: str) -> Optional[List[float]]:
+        return self.get_many(model, task_type, [h]).get(h)
+
+    def put_many(self, model: str, task_type: str, items: Dict[str, List[float]]):
+        if not items:
+            return
+        now = time.time()
+        rows = [(model, task_type, h, array("f", vec).tobytes(), now) for h, vec in items.items()]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, task_type, text_hash, vector, last_access) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+            self._evict()
+
+    def _evict(self):
+        """Drops least-recently-used rows until the store is back under 90% of max_bytes."""
+        total = self._total_bytes()
+        if total <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+        freed = 0
+        doomed = []
+        for rowid, size in self._conn.execute("SELECT rowid, LENGTH(vector) FROM embeddings ORDER BY last_access ASC"):
+            if total - freed <= target:
+                break
+            doomed.append((rowid,))
+            freed += size
+        self._conn.executemany("DELETE FROM embeddings WHERE rowid = ?", doomed)
+        self._conn.commit()
+        print(f"🧹 Embedding Cache: Evicted {len(doomed)} vectors ({freed / 1024:.0f} KB).")
+
+    def _total_bytes(self) -> int:
+        return self._conn.execute("SELECT bytes FROM stats WHERE id = 0").fetchone()[0]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            total = self._total_bytes()
+        return {"entries": count, "bytes": total, "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,102 @@
+import os
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List
+
+from app.core.rate_limit import RateBudget
+
+
+def is_rate_limit_error(e: Exception) -> bool:
+    error_str = str(e)
+    return "429" in error_str or "ResourceExhausted" in error_str or "quota" in error_str.lower()
+
+
+def estimate_tokens(text: str) -> int:
+    # Cheap approximation (~4 chars/token) - good enough for budgeting
+    return max(1, len(text) // 4)
+
+
+class EmbeddingPipeline:
+    """
+    Embeds chunks in fixed-size batches on a bounded worker pool and commits each
+    batch to the vector store as soon as it is embedded, so progress is durable.
+    - Respects a per-minute request/token budget shared by all workers.
+    - Retries 429/quota errors with exponential backoff + jitter.
+    Workers embed through the store's (cached) embedding function; the commit then
+    re-reads those vectors from the cache instead of calling the API again.
+    """
+    def __init__(self, vector_store, embedding_model, batch_size: int = None, max_workers: int = None,
+                 budget: RateBudget = None, max_retries: int = 5, commit_guard=None):
+        self.vector_store = vector_store
+        self.embedding_model = embedding_model
+        self.batch_size = batch_size or int(os.getenv("EMBED_BATCH_SIZE", "64"))
+        self.max_workers = max_workers or int(os.getenv("EMBED_MAX_WORKERS", "4"))
+        self.budget = budget or RateBudget(
+            requests_per_minute=int(os.getenv("EMBED_REQUESTS_PER_MINUTE", "300")),
+            tokens_per_minute=int(os.getenv("EMBED_TOKENS_PER_MINUTE", "0"))
+        )
+        self.max_retries = max_retries
+        # Context-manager factory held around each store write (e.g. the manager's write lock)
+        if commit_guard is None:
+            commit_lock = threading.Lock()
+            commit_guard = lambda: commit_lock
+        self._commit_guard = commit_guard
+
+    def _embed_with_retry(self, texts: List[str]):
+        attempt = 0
+        while True:
+            self.budget.acquire(sum(estimate_tokens(t) for t in texts))
+            try:
+                return self.embedding_model.embed_documents(texts)
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt >= self.max_retries:
+                    raise
+                delay = min(60.0, (2 ** attempt)) + random.uniform(0, 1)
+                print(f"⏳ Embedding Pipeline: Rate limited, retrying batch in {delay:.1f}s (attempt {attempt + 1}/{self.max_retries})...")
+                time.sleep(delay)
+                attempt += 1
+
+    def _process_batch(self, docs, ids, vector_store):
+        self._embed_with_retry([d.page_content for d in docs])
+        # Chroma writes are serialized; the embedding work above runs in parallel
+        with self._commit_guard():
+            vector_store.add_documents(docs, ids=ids)
+        return len(docs)
+
+    def run(self, chunks, ids: List[str], vector_store=None) -> int:
+        """
+        Embeds and stores `chunks` under `ids` (in `vector_store`, default: the pipeline's store).
+        Returns the number of chunks committed.
+        Raises the first batch error after all in-flight batches settle; batches that
+        already committed stay in the store (IDs are deterministic, so a retry upserts).
+        """
+        vector_store = vector_store or self.vector_store
+        batches = [
+            (chunks[i:i + self.batch_size], ids[i:i + self.batch_size], vector_store)
+            for i in range(0, len(chunks), self.batch_size)
+        ]
+        if not batches:
+            return 0
+        if len(batches) == 1:
+            return self._process_batch(*batches[0])
+
+        committed = 0
+        first_error = None
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(batches))) as pool:
+            futures = [pool.submit(self._process_batch, *batch) for batch in batches]
+            for future in as_completed(futures):
+                try:
+                    committed += future.result()
+                except Exception as e:
+                    if first_error is None:
+                        first_error = e
+                        # Don't start batches that haven't begun yet
+                        for f in futures:
+                            f.cancel()
+
+        if first_error is not None:
+            print(f"⚠️ Embedding Pipeline: {committed}/{len(chunks)} chunks committed before failure.")
+            raise first_error
+        return committed
@@ -0,0 +1,70 @@
+import os
+import time
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from app.core.embedding_cache import EmbeddingCache, text_hash
+from app.core.embedding_pipeline import estimate_tokens
+from app.core.ttl_cache import TTLCache
+from app.core.metering import record_call
+from app.core.provider_limits import get_limiter, provider_of
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps any LangChain embedding model with the disk-backed EmbeddingCache.
+    Only texts that were never embedded before (for this model + task_type) hit the API.
+    API calls are metered (estimated tokens, see app/core/metering.py).
+    """
+    def __init__(self, inner: Embeddings, cache: EmbeddingCache = None):
+        self.inner = inner
+        self.cache = cache or EmbeddingCache()
+        self.model_name = getattr(inner, "model", inner.__class__.__name__)
+        self.task_type = getattr(inner, "task_type", None) or "default"
+        self.query_cache = TTLCache(maxsize=1024, ttl=float(os.getenv("RAG_QUERY_CACHE_TTL", "3600")))
+
+    def _embed_metered(self, texts: List[str], query: bool = False) -> List[List[float]]:
+        started = time.monotonic()
+        tokens = sum(estimate_tokens(t) for t in texts)
+        try:
+            # Same per-provider limiter as the chat models (one quota per API key)
+            with get_limiter(provider_of(self.inner)).limit(tokens):
+                vectors = [self.inner.embed_query(texts[0])] if query else self.inner.embed_documents(texts)
+        except Exception:
+            record_call("embedding", self.model_name, time.monotonic() - started, input_tokens=tokens, error=True)
+            raise
+        record_call("embedding", self.model_name, time.monotonic() - started, input_tokens=tokens)
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes = [text_hash(t) for t in texts]
+        cached = self.cache.get_many(self.model_name, self.task_type, hashes)
+
+        # Embed each missing text once, even if it appears several times in the batch
+        missing = {}
+        for h, t in zip(hashes, texts):
+            if h not in cached and h not in missing:
+                missing[h] = t
+
+        if missing:
+            vectors = self._embed_metered(list(missing.values()))
+            fresh = dict(zip(missing.keys(), vectors))
+            self.cache.put_many(self.model_name, self.task_type, fresh)
+            cached.update(fresh)
+
+        return [cached[h] for h in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        # Level 1: in-memory (repeated planner/archivist queries), Level 2: disk cache
+        vector = self.query_cache.get(text)
+        if vector is not None:
+            return vector
+        task_type = f"{self.task_type}:query"
+        h = text_hash(text)
+        vector = self.cache.get(self.model_name, task_type, h)
+        if vector is None:
+            vector = self._embed_metered([text], query=True)[0]
+            self.cache.put_many(self.model_name, task_type, {h: vector})
+        self.query_cache.set(text, vector)
+        return vector
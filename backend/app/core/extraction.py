@@ -0,0 +1,155 @@
+import os
+import json
+import zlib
+import time
+import sqlite3
+import threading
+from typing import List
+
+from app.core.manifest import hash_file
+from app.core.paths import data_path
+
+# Formats whose text extraction is expensive enough to be worth caching
+EXTRACTED_EXTS = ['.pdf', '.docx']
+
+# Import name -> pip package of each extractor (for "library not installed" messages)
+EXTRACTOR_PACKAGES = {"pypdf": "pypdf", "docx": "python-docx"}
+
+
+def _extract_pdf(file_path: str) -> List[str]:
+    import pypdf
+    reader = pypdf.PdfReader(file_path)
+    return [page.extract_text() or "" for page in reader.pages]
+
+
+def _extract_docx(file_path: str) -> List[str]:
+    # Raises ImportError if python-docx is missing; callers decide how to report it
+    import docx
+    # DOCX has no real pages, so the whole body is a single "page"
+    return [docx_text(docx.Document(file_path))]
+
+
+def docx_text(doc) -> str:
+    """Paragraphs and tables (one line per row, cells joined by " | ") of a python-docx Document."""
+    if hasattr(doc, "iter_inner_content"):
+        blocks = list(doc.iter_inner_content())  # python-docx >= 1.0: body order
+    else:
+        blocks = list(doc.paragraphs) + list(doc.tables)
+    lines = []
+    for block in blocks:
+        if hasattr(block, "rows"):
+            for row in block.rows:
+                cells = []
+                for cell in row.cells:
+                    # Merged cells are repeated once per grid column
+                    if not cells or cell.text != cells[-1]:
+                        cells.append(cell.text)
+                lines.append(" | ".join(cells))
+        else:
+            lines.append(block.text)
+    return "\n".join(lines)
+
+
+class ExtractionCache:
+    """
+    On-disk cache of extracted document text (one entry per page).
+    Keyed by absolute path and validated against (size, mtime, content hash),
+    so a file is only parsed again when its bytes actually change.
+    Shared by RAG ingestion (worker processes included) and the Researcher's deep read.
+    Files larger than EXTRACTION_MAX_MB (default 100) are refused instead of parsed.
+    """
+    def __init__(self, db_path: str = None, max_bytes: int = None):
+        self.db_path = db_path or data_path("extraction_cache.sqlite")
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv("EXTRACTION_MAX_MB", "100")) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        # Parse workers in other processes write here too, so wait on locks instead of failing
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS extracted (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                content_hash TEXT NOT NULL,
+                pages BLOB NOT NULL,
+                extracted_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get_pages(self, file_path: str, content_hash: str = None) -> List[str]:
+        """
+        Returns the extracted text of a PDF/DOCX as a list of pages, parsing only on a cache miss.
+        Pass `content_hash` if the caller already hashed the file.
+        """
+        file_path = os.path.abspath(file_path)
+        stat = os.stat(file_path)
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, content_hash, pages FROM extracted WHERE path = ?",
+                (file_path,)
+            ).fetchone()
+
+        if row:
+            size, mtime_ns, cached_hash, blob = row
+            # Fast path: stat unchanged
+            if size == stat.st_size and mtime_ns == stat.st_mtime_ns:
+                return json.loads(zlib.decompress(blob))
+            # Touched but identical bytes
+            content_hash = content_hash or hash_file(file_path)
+            if cached_hash == content_hash:
+                with self._lock:
+                    self._conn.execute(
+                        "UPDATE extracted SET size = ?, mtime_ns = ? WHERE path = ?",
+                        (stat.st_size, stat.st_mtime_ns, file_path)
+                    )
+                    self._conn.commit()
+                return json.loads(zlib.decompress(blob))
+
+        if stat.st_size > self.max_bytes:
+            raise ValueError(f"File too large to extract ({stat.st_size / 1024 / 1024:.1f} MB > EXTRACTION_MAX_MB)")
+
+        ext = os.path.splitext(file_path)[1].lower()
+        if ext == '.pdf':
+            pages = _extract_pdf(file_path)
+        elif ext == '.docx':
+            pages = _extract_docx(file_path)
+        else:
+            raise ValueError(f"Unsupported format for extraction: {ext}")
+
+        content_hash = content_hash or hash_file(file_path)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO extracted (path, size, mtime_ns, content_hash, pages, extracted_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (file_path, stat.st_size, stat.st_mtime_ns, content_hash,
+                 zlib.compress(json.dumps(pages).encode("utf-8")), time.time())
+            )
+            self._conn.commit()
+        return pages
+
+    def get_text(self, file_path: str) -> str:
+        return "\n".join(self.get_pages(file_path))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# Lazily created per process: SQLite connections must not be shared across a fork,
+# so parse workers each open their own
+_cache = None
+_cache_pid = None
+_cache_lock = threading.Lock()
+
+def get_extraction_cache() -> ExtractionCache:
+    global _cache, _cache_pid
+    with _cache_lock:
+        if _cache is None or _cache_pid != os.getpid():
+            _cache = ExtractionCache()
+            _cache_pid = os.getpid()
+        return _cache
@@ -2,6 +2,7 @@ from langgraph.graph import StateGraph, START, END
 from langgraph.checkpoint.memory import MemorySaver
 
 from app.core.state import AgentState
+from app.core.metering import metered_node
 from app.agents.supervisor import supervisor_node
 from app.agents.researcher import researcher_node
 from app.agents.archivist import archivist_node
@@ -13,13 +14,13 @@ from app.agents.deep_researcher import deep_researcher_node
 # Define the graph
 workflow = StateGraph(AgentState)
 
-# Add Nodes
-workflow.add_node("SUPERVISOR", supervisor_node)
-workflow.add_node("RESEARCHER", researcher_node)
-workflow.add_node("DEEP_RESEARCHER", deep_researcher_node)
-workflow.add_node("ARCHIVIST", archivist_node)
-workflow.add_node("ARCHITECT", architect_node)
-workflow.add_node("PLANNER", planner_node) # New Node
+# Add Nodes (metered: every model call is attributed to thread + node, see app/core/metering.py)
+workflow.add_node("SUPERVISOR", metered_node("SUPERVISOR", supervisor_node))
+workflow.add_node("RESEARCHER", metered_node("RESEARCHER", researcher_node))
+workflow.add_node("DEEP_RESEARCHER", metered_node("DEEP_RESEARCHER", deep_researcher_node))
+workflow.add_node("ARCHIVIST", metered_node("ARCHIVIST", archivist_node))
+workflow.add_node("ARCHITECT", metered_node("ARCHITECT", architect_node))
+workflow.add_node("PLANNER", metered_node("PLANNER", planner_node)) # New Node
 
 # Define Logic for Routing
 def router(state: AgentState):
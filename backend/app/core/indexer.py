@@ -0,0 +1,180 @@
+import os
+import time
+import hashlib
+import threading
+from typing import Dict, List, Any, Callable
+
+from app.core.rag import get_vector_store, iter_source_files
+
+
+def research_dirs() -> List[str]:
+    """
+    Current research folders. Read from the environment on every call so folders added
+    at runtime (/api/config/pick-folder) are picked up without a restart.
+    """
+    raw = os.environ.get("LOCAL_RESEARCH_DIR", "")
+    return [d.strip() for d in raw.split(',') if d.strip()]
+
+
+def tree_signature(directory_path: str) -> str:
+    """
+    Cheap fingerprint of a research folder: stat() of every supported file, no reads.
+    """
+    digest = hashlib.sha1()
+    for file_path in sorted(iter_source_files(directory_path)):
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            continue
+        digest.update(f"{file_path}|{stat.st_size}|{stat.st_mtime_ns}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class BackgroundIndexer:
+    """
+    Keeps the RAG index fresh off the request path.
+    Polls every research folder, debounces bursts of changes (e.g. a folder copy in progress)
+    and runs incremental ingestion in a background thread. Graph nodes only query.
+    - INDEX_POLL_INTERVAL: seconds between scans (default 5)
+    - INDEX_DEBOUNCE: quiet period after the last change before indexing (default 2)
+    """
+    def __init__(self, poll_interval: float = None, debounce: float = None):
+        self.poll_interval = poll_interval or float(os.getenv("INDEX_POLL_INTERVAL", "5"))
+        self.debounce = debounce if debounce is not None else float(os.getenv("INDEX_DEBOUNCE", "2"))
+        self._status: Dict[str, Dict[str, Any]] = {}
+        self._signatures: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+
+    def add_listener(self, listener: Callable[[Dict[str, Any]], None]):
+        """Registers a callback for live per-file ingest progress events (called from the indexer thread)."""
+        self._listeners.append(listener)
+
+    def _publish(self, event: Dict[str, Any]):
+        for listener in list(self._listeners):
+            try:
+                listener(event)
+            except Exception as e:
+                print(f"⚠️ Indexer listener failed: {e}")
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="rag-indexer", daemon=True)
+        self._thread.start()
+        print(f"INFO: Background indexer started (poll {self.poll_interval}s, debounce {self.debounce}s).")
+
+    def stop(self, timeout: float = 10.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def request_refresh(self, directory_path: str = None):
+        """Forces a rescan (of one folder, or all) on the next loop iteration, skipping the debounce."""
+        with self._lock:
+            targets = [directory_path] if directory_path else list(self._signatures)
+            for d in targets:
+                self._signatures.pop(d, None)
+                self._entry(d)["force"] = True
+        self._wake.set()
+
+    def _entry(self, directory_path: str) -> Dict[str, Any]:
+        return self._status.setdefault(directory_path, {
+            "state": "pending",
+            "changed_at": time.time(),
+            "last_indexed_at": None,
+            "last_duration_s": None,
+            "last_result": None,
+            "last_error": None,
+            "force": True,
+        })
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Snapshot for the API: per-folder state and lag (seconds since the first change not yet indexed).
+        """
+        now = time.time()
+        folders = {}
+        with self._lock:
+            for d, entry in self._status.items():
+                info = {k: v for k, v in entry.items() if k != "force"}
+                info["lag_s"] = round(now - entry["changed_at"], 1) if entry["state"] != "idle" else 0.0
+                folders[d] = info
+        return {"running": self.running, "poll_interval_s": self.poll_interval, "folders": folders}
+
+    def _scan(self):
+        """Detects changed folders and returns those whose debounce window has elapsed."""
+        now = time.time()
+        ready = []
+        dirs = research_dirs()
+        with self._lock:
+            # Forget folders that were removed from the configuration
+            for d in list(self._status):
+                if d not in dirs:
+                    self._status.pop(d, None)
+                    self._signatures.pop(d, None)
+
+        for d in dirs:
+            if not os.path.exists(d):
+                with self._lock:
+                    entry = self._entry(d)
+                    entry.update(state="error", last_error="Directory not found", force=False)
+                continue
+
+            signature = tree_signature(d)
+            with self._lock:
+                entry = self._entry(d)
+                if self._signatures.get(d) != signature:
+                    if entry["state"] in ("idle", "error"):
+                        entry["changed_at"] = now
+                    entry["state"] = "pending"
+                    entry["last_seen_change"] = now
+                    self._signatures[d] = signature
+                    if not entry.get("force"):
+                        continue  # Wait for the tree to settle
+                if entry["state"] == "pending" and (entry.get("force") or now - entry.get("last_seen_change", 0) >= self.debounce):
+                    ready.append(d)
+        return ready
+
+    def _index(self, directory_path: str):
+        with self._lock:
+            entry = self._entry(directory_path)
+            entry["state"] = "indexing"
+        started = time.time()
+        try:
+            result = get_vector_store().ingest_directory(directory_path, progress=self._publish)
+            with self._lock:
+                entry.update(state="idle", last_result=result, last_error=None, force=False,
+                             last_indexed_at=time.time(), last_duration_s=round(time.time() - started, 2))
+        except Exception as e:
+            print(f"⚠️ Indexer: Failed to index {directory_path}: {e}")
+            with self._lock:
+                entry.update(state="error", last_error=str(e), force=False)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                for d in self._scan():
+                    if self._stop.is_set():
+                        break
+                    self._index(d)
+            except Exception as e:
+                print(f"⚠️ Indexer loop error: {e}")
+            # Poll faster while something is waiting out its debounce window
+            with self._lock:
+                pending = any(e["state"] == "pending" for e in self._status.values())
+            self._wake.wait(timeout=min(self.poll_interval, self.debounce) if pending and self.debounce else self.poll_interval)
+            self._wake.clear()
+
+
+# Process-wide instance, started/stopped by the FastAPI lifespan
+indexer = BackgroundIndexer()
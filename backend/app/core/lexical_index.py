@@ -0,0 +1,180 @@
+import os
+import re
+import json
+import sqlite3
+import threading
+from typing import List, Dict, Any, Optional
+
+# Unicode-aware word pattern (Hangul, identifiers with underscores, numbers)
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def build_match_query(query: str) -> str:
+    """
+    Turns free text into an FTS5 MATCH expression: every term is quoted (so user input
+    can't inject FTS syntax) and prefix-matched, so Korean stems like "모델" also hit
+    "모델은"/"모델을". Terms are OR-ed and ranked by BM25.
+    """
+    terms = list(dict.fromkeys(t.lower() for t in TOKEN_RE.findall(query)))
+    return " OR ".join(f'"{t}"*' for t in terms)
+
+
+_WHERE_OPS = {"$eq": "=", "$ne": "!=", "$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+_FIELD_RE = re.compile(r"^\w+$")
+
+
+def where_to_sql(where: Dict[str, Any]):
+    """
+    Translates a Chroma-style `where` filter into a SQL clause over the JSON metadata column.
+    Supports {field: value}, {field: {"$eq"/"$ne"/"$gt"/"$gte"/"$lt"/"$lte"/"$in"/"$nin": v}},
+    {"$and": [...]} and {"$or": [...]}. Returns (clause, params).
+    """
+    clauses, params = [], []
+    for key, value in where.items():
+        if key in ("$and", "$or"):
+            parts = [where_to_sql(sub) for sub in value]
+            joiner = " AND " if key == "$and" else " OR "
+            clauses.append("(" + joiner.join(p[0] for p in parts) + ")")
+            for p in parts:
+                params.extend(p[1])
+            continue
+        if not _FIELD_RE.match(key):
+            raise ValueError(f"Invalid metadata field in filter: {key!r}")
+        column = f"json_extract(metadata, '$.{key}')"
+        if not isinstance(value, dict):
+            value = {"$eq": value}
+        for op, operand in value.items():
+            if op in _WHERE_OPS:
+                clauses.append(f"{column} {_WHERE_OPS[op]} ?")
+                params.append(operand)
+            elif op in ("$in", "$nin"):
+                placeholders = ",".join("?" * len(operand)) or "NULL"
+                clauses.append(f"{column} {'IN' if op == '$in' else 'NOT IN'} ({placeholders})")
+                params.extend(operand)
+            else:
+                raise ValueError(f"Unsupported filter operator: {op}")
+    return " AND ".join(clauses) or "1", params
+
+
+def reciprocal_rank_fusion(result_lists: List[List[Any]], key, k: int = 60) -> List[Any]:
+    """
+    Merges several ranked lists: score(d) = sum(1 / (k + rank)). Returns items best-first.
+    """
+    scores = {}
+    items = {}
+    for results in result_lists:
+        for rank, item in enumerate(results):
+            item_key = key(item)
+            scores[item_key] = scores.get(item_key, 0.0) + 1.0 / (k + rank + 1)
+            items.setdefault(item_key, item)
+    return [items[item_key] for item_key in sorted(scores, key=scores.get, reverse=True)]
+
+
+class LexicalIndex:
+    """
+    Local BM25 inverted index (SQLite FTS5) over the same chunks stored in the vector store.
+    Lets exact identifiers, file names and Korean terms be found without an embedding call.
+    """
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        has_row_map = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'chunk_rows'"
+        ).fetchone() is not None
+        self._conn.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS chunks USING fts5(
+                chunk_id UNINDEXED,
+                source UNINDEXED,
+                metadata UNINDEXED,
+                content,
+                tokenize = "unicode61 tokenchars '_'"
+            )
+            """
+        )
+        # FTS5 can't look up by an UNINDEXED column (every lookup would scan the table),
+        # so chunk_id -> FTS rowid is kept in an ordinary indexed table
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunk_rows (chunk_id TEXT PRIMARY KEY, fts_rowid INTEGER NOT NULL) WITHOUT ROWID"
+        )
+        if not has_row_map:
+            # Index built before the row map existed
+            self._conn.execute("INSERT OR REPLACE INTO chunk_rows (chunk_id, fts_rowid) SELECT chunk_id, rowid FROM chunks")
+        self._conn.commit()
+
+    def add(self, chunk_ids: List[str], texts: List[str], metadatas: List[Dict[str, Any]]):
+        """Indexes chunks, replacing any existing rows with the same IDs."""
+        with self._lock:
+            self._delete_locked(chunk_ids)
+            for cid, text, meta in zip(chunk_ids, texts, metadatas):
+                cursor = self._conn.execute(
+                    "INSERT INTO chunks (chunk_id, source, metadata, content) VALUES (?, ?, ?, ?)",
+                    (cid, (meta or {}).get("source", ""), json.dumps(meta or {}), text)
+                )
+                self._conn.execute("INSERT OR REPLACE INTO chunk_rows (chunk_id, fts_rowid) VALUES (?, ?)", (cid, cursor.lastrowid))
+            self._conn.commit()
+
+    def _delete_locked(self, chunk_ids: List[str]):
+        for start in range(0, len(chunk_ids), 500):
+            batch = chunk_ids[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            self._conn.execute(
+                f"DELETE FROM chunks WHERE rowid IN (SELECT fts_rowid FROM chunk_rows WHERE chunk_id IN ({placeholders}))", batch
+            )
+            self._conn.execute(f"DELETE FROM chunk_rows WHERE chunk_id IN ({placeholders})", batch)
+
+    def delete(self, chunk_ids: List[str]):
+        if not chunk_ids:
+            return
+        with self._lock:
+            self._delete_locked(chunk_ids)
+            self._conn.commit()
+
+    def ids(self) -> List[str]:
+        with self._lock:
+            return [r[0] for r in self._conn.execute("SELECT chunk_id FROM chunk_rows").fetchall()]
+
+    def has(self, chunk_id: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM chunk_rows WHERE chunk_id = ?", (chunk_id,)).fetchone() is not None
+
+    def get(self, chunk_id: str) -> Optional[Dict[str, Any]]:
+        """Stored content and metadata of one chunk, or None if it isn't indexed."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT metadata, content FROM chunks WHERE rowid = (SELECT fts_rowid FROM chunk_rows WHERE chunk_id = ?)",
+                (chunk_id,)
+            ).fetchone()
+        return {"metadata": json.loads(row[0]), "content": row[1]} if row else None
+
+    def search(self, query: str, k: int = 5, where: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        """
+        Returns up to k chunks best-first: {"chunk_id", "source", "metadata", "content", "score"}.
+        Lower BM25 score is better (SQLite convention). `where` filters on chunk metadata.
+        """
+        match = build_match_query(query)
+        if not match:
+            return []
+        where_sql, where_params = where_to_sql(where) if where else ("1", [])
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT chunk_id, source, metadata, content, bm25(chunks) AS score FROM chunks "
+                f"WHERE chunks MATCH ? AND {where_sql} ORDER BY score LIMIT ?",
+                (match, *where_params, k)
+            ).fetchall()
+        return [
+            {"chunk_id": r[0], "source": r[1], "metadata": json.loads(r[2]), "content": r[3], "score": r[4]}
+            for r in rows
+        ]
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM chunks")
+            self._conn.execute("DELETE FROM chunk_rows")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,142 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+
+from app.core.paths import data_path
+
+
+def _normalize_content(content: Any) -> str:
+    if isinstance(content, str):
+        return content.replace("\r\n", "\n").strip()
+    # Multipart content (lists of text/image parts)
+    return json.dumps(content, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def cache_key(model: str, temperature: float, messages: List[Any]) -> str:
+    """sha256 of (model, temperature, normalized messages). Plain strings count as a human message."""
+    normalized = []
+    for m in messages if isinstance(messages, list) else [messages]:
+        if isinstance(m, BaseMessage):
+            normalized.append([m.type, _normalize_content(m.content)])
+        else:
+            normalized.append(["human", _normalize_content(m)])
+    payload = json.dumps([model, float(temperature or 0.0), normalized], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    Disk-backed (SQLite) store of chat model responses keyed by cache_key().
+    Entries expire after `ttl` seconds; the store is bounded by `max_bytes`,
+    least-recently-used entries are evicted first.
+    """
+    def __init__(self, db_path: str = None, max_bytes: int = None, ttl: float = None):
+        if db_path is None:
+            db_path = data_path("llm_cache.sqlite")
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv("LLM_CACHE_MAX_MB", "128")) * 1024 * 1024)
+        if ttl is None:
+            ttl = float(os.getenv("LLM_CACHE_TTL_HOURS", "168")) * 3600
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_lru ON responses (last_access)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[BaseMessage]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return messages_from_dict([json.loads(row[0])])[0]
+
+    def put(self, key: str, model: str, response: BaseMessage):
+        now = time.time()
+        payload = json.dumps(message_to_dict(response), ensure_ascii=False, default=str)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, created, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, model, payload, now, now)
+            )
+            self._conn.commit()
+            self._evict(now)
+
+    def _evict(self, now: float):
+        """Drops expired entries, then least-recently-used ones until under 90% of max_bytes."""
+        self._conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+        total = self._conn.execute("SELECT COALESCE(SUM(LENGTH(response)), 0) FROM responses").fetchone()[0]
+        if total > self.max_bytes:
+            target = int(self.max_bytes * 0.9)
+            freed = 0
+            doomed = []
+            for rowid, size in self._conn.execute("SELECT rowid, LENGTH(response) FROM responses ORDER BY last_access ASC"):
+                if total - freed <= target:
+                    break
+                doomed.append((rowid,))
+                freed += size
+            self._conn.executemany("DELETE FROM responses WHERE rowid = ?", doomed)
+            print(f"🧹 LLM Cache: Evicted {len(doomed)} responses ({freed / 1024:.0f} KB).")
+        self._conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(response)), 0) FROM responses"
+            ).fetchone()
+        return {"entries": count, "bytes": total, "hits": self.hits, "misses": self.misses}
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_cache: Optional[LLMResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Shared process-wide cache, or None unless LLM_CACHE=true (opt-in)."""
+    global _cache
+    if os.getenv("LLM_CACHE", "false").lower() != "true":
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMResponseCache()
+        return _cache
@@ -0,0 +1,163 @@
+import os
+import time
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, List, Iterable, Iterator, Tuple, Optional
+
+from langchain_core.documents import Document
+
+from app.core.extraction import EXTRACTED_EXTS, get_extraction_cache
+
+
+def load_file(file_path: str) -> List[Document]:
+    """
+    Parses a single source file into LangChain Documents.
+    Top-level (picklable) so it can run inside a worker process.
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext in EXTRACTED_EXTS:
+        # PDF/DOCX go through the shared extraction cache (also used by read_full_docs)
+        pages = get_extraction_cache().get_pages(file_path)
+        return [
+            Document(page_content=text, metadata={"source": file_path, "page": i})
+            for i, text in enumerate(pages)
+        ]
+    # Generic text loader (imported here: spawned workers import this module on startup)
+    from langchain_community.document_loaders import TextLoader
+    loader = TextLoader(file_path, encoding='utf-8', autodetect_encoding=True)
+    return loader.load()
+
+
+class ParallelLoader:
+    """
+    Fans file parsing out to a ProcessPoolExecutor and streams results back as they finish.
+    Each file is isolated: a parser exception, a worker crash or a timeout only fails that file.
+    - max_workers: RAG_PARSE_WORKERS (default: CPU count)
+    - timeout: RAG_PARSE_TIMEOUT seconds per file (default: 120)
+    """
+    # A file that kills the worker pool this many times on its own is given up on
+    MAX_CRASHES = 2
+
+    def __init__(self, max_workers: int = None, timeout: float = None, load_fn: Callable[[str], List[Document]] = load_file):
+        self.max_workers = max_workers or int(os.getenv("RAG_PARSE_WORKERS", "0")) or os.cpu_count() or 1
+        self.timeout = timeout or float(os.getenv("RAG_PARSE_TIMEOUT", "120"))
+        # Top-level function, pickled by reference into the workers
+        self.load_fn = load_fn
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        # The pool is started from indexer/prefetch threads of a multithreaded server;
+        # forking such a process can copy held locks into the child, so never use "fork"
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        return ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+
+    def _kill_pool(self, pool: ProcessPoolExecutor):
+        # No public API to stop a running task, so terminate the workers directly
+        for process in list(getattr(pool, "_processes", {}).values()):
+            try:
+                process.terminate()
+            except Exception:
+                pass
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def iter_load(self, file_paths: Iterable[str]) -> Iterator[Tuple[str, Optional[List[Document]], Optional[Exception]]]:
+        """
+        Yields (file_path, documents, error) in completion order.
+        Exactly one of `documents` / `error` is set, and every path in `file_paths` is yielded.
+        `file_paths` may be a lazy iterable; it is pulled only as workers free up,
+        so at most `max_workers` parsed files are held in memory at once.
+        """
+        source = iter(file_paths)
+        pending = deque()
+        # Files that were in flight when the pool broke: re-run one at a time, so only the file
+        # that actually kills a worker is charged for it
+        suspects = deque()
+
+        def refill():
+            while len(pending) < self.max_workers:
+                file_path = next(source, None)
+                if file_path is None:
+                    return
+                pending.append(file_path)
+
+        refill()
+        # Not worth spinning up processes for a single file (or a single worker)
+        if len(pending) <= 1 or self.max_workers <= 1:
+            while pending:
+                file_path = pending.popleft()
+                try:
+                    yield file_path, self.load_fn(file_path), None
+                except Exception as e:
+                    yield file_path, None, e
+                refill()
+            return
+
+        crashes = {}
+        in_flight = {}  # future -> (file_path, started_at)
+        pool = self._new_pool()
+
+        try:
+            while True:
+                # Keep at most one task per worker so submit time ~= start time (for timeouts)
+                refill()
+                if not (pending or suspects or in_flight):
+                    break
+                if suspects:
+                    if not in_flight:
+                        file_path = suspects.popleft()
+                        in_flight[pool.submit(self.load_fn, file_path)] = (file_path, time.monotonic())
+                else:
+                    while pending and len(in_flight) < self.max_workers:
+                        file_path = pending.popleft()
+                        in_flight[pool.submit(self.load_fn, file_path)] = (file_path, time.monotonic())
+
+                done, _ = wait(list(in_flight), timeout=min(1.0, self.timeout), return_when=FIRST_COMPLETED)
+
+                crashed = []
+                for future in done:
+                    file_path, _ = in_flight.pop(future)
+                    try:
+                        yield file_path, future.result(), None
+                    except BrokenProcessPool:
+                        crashed.append(file_path)
+                    except Exception as e:
+                        yield file_path, None, e
+
+                if crashed:
+                    # Everything still in flight died with the pool too
+                    crashed += [file_path for file_path, _ in in_flight.values()]
+                    in_flight.clear()
+                    if len(crashed) == 1:
+                        file_path = crashed[0]
+                        crashes[file_path] = crashes.get(file_path, 0) + 1
+                        if crashes[file_path] >= self.MAX_CRASHES:
+                            yield file_path, None, BrokenProcessPool(f"Parser crashed {crashes[file_path]} times")
+                        else:
+                            suspects.appendleft(file_path)
+                    else:
+                        suspects.extend(crashed)
+                    self._kill_pool(pool)
+                    pool = self._new_pool()
+                    continue
+
+                # Per-file timeouts: fail the slow file, restart the pool, resubmit the rest
+                now = time.monotonic()
+                timed_out = [f for f, (_, started) in in_flight.items() if not f.done() and now - started > self.timeout]
+                for future in timed_out:
+                    file_path, _ = in_flight.pop(future)
+                    yield file_path, None, TimeoutError(f"Parsing exceeded {self.timeout:.0f}s")
+
+                if timed_out:
+                    for file_path, _ in in_flight.values():
+                        pending.appendleft(file_path)
+                    in_flight.clear()
+                    self._kill_pool(pool)
+                    pool = self._new_pool()
+        finally:
+            # Consumer stopped early (or we crashed) - don't wait on stragglers
+            if in_flight:
+                self._kill_pool(pool)
+            else:
+                pool.shutdown(wait=True)
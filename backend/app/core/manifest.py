@@ -0,0 +1,112 @@
+import os
+import json
+import hashlib
+import sqlite3
+import threading
+from typing import List, Dict, Optional, Any
+
+
+def hash_file(file_path: str, block_size: int = 1 << 20) -> str:
+    """
+    Returns the sha256 hex digest of a file's bytes (streamed in 1MB blocks).
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IngestManifest:
+    """
+    Persistent per-file record of what has been embedded into a vector collection.
+    One row per source file: path, size, mtime, content hash and the chunk IDs
+    that were written for it, so re-ingestion can skip, replace or purge files.
+    """
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                content_hash TEXT NOT NULL,
+                chunk_ids TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get(self, path: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT path, size, mtime_ns, content_hash, chunk_ids FROM files WHERE path = ?",
+                (path,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "path": row[0],
+            "size": row[1],
+            "mtime_ns": row[2],
+            "content_hash": row[3],
+            "chunk_ids": json.loads(row[4]),
+        }
+
+    def upsert(self, path: str, size: int, mtime_ns: int, content_hash: str, chunk_ids: List[str]):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files (path, size, mtime_ns, content_hash, chunk_ids) VALUES (?, ?, ?, ?, ?)",
+                (path, size, mtime_ns, content_hash, json.dumps(chunk_ids))
+            )
+            self._conn.commit()
+
+    def touch(self, path: str, size: int, mtime_ns: int):
+        """Updates stat info only (content hash unchanged, e.g. after a `touch`)."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE files SET size = ?, mtime_ns = ? WHERE path = ?",
+                (size, mtime_ns, path)
+            )
+            self._conn.commit()
+
+    def remove(self, path: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM files WHERE path = ?", (path,))
+            self._conn.commit()
+
+    def paths_under(self, root: str) -> List[str]:
+        """Returns every tracked path located inside `root`."""
+        root = os.path.join(os.path.abspath(root), "")
+        with self._lock:
+            rows = self._conn.execute("SELECT path FROM files").fetchall()
+        return [r[0] for r in rows if r[0].startswith(root)]
+
+    def paths(self) -> List[str]:
+        with self._lock:
+            return [r[0] for r in self._conn.execute("SELECT path FROM files").fetchall()]
+
+    def all_chunk_ids(self) -> set:
+        """Every chunk ID referenced by a tracked file."""
+        with self._lock:
+            rows = self._conn.execute("SELECT chunk_ids FROM files").fetchall()
+        return {cid for row in rows for cid in json.loads(row[0])}
+
+    def data_version(self) -> int:
+        """Changes whenever another connection (manager instance or process) commits to the manifest."""
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def clear(self):
+        """Forgets every file, so the next ingestion re-indexes everything."""
+        with self._lock:
+            self._conn.execute("DELETE FROM files")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
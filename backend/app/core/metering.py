@@ -0,0 +1,196 @@
+import os
+import json
+import time
+import inspect
+import sqlite3
+import threading
+import contextvars
+from typing import Any, Dict, List, Optional
+
+from langchain_core.runnables import RunnableConfig
+
+from app.core.paths import data_path
+
+# (thread_id, node) of the graph node currently running; copied into asyncio.to_thread workers
+_call_context: contextvars.ContextVar = contextvars.ContextVar("metering_call_context", default=(None, None))
+
+GROUP_COLUMNS = ("thread_id", "node", "model", "kind")
+
+
+def meter_db_path() -> str:
+    return os.getenv("LLM_METERING_DB") or data_path("usage.sqlite")
+
+
+def _load_prices() -> Dict[str, List[float]]:
+    """LLM_PRICES: JSON {"model": [usd per 1M input tokens, usd per 1M output tokens]}."""
+    try:
+        return json.loads(os.getenv("LLM_PRICES", "{}"))
+    except json.JSONDecodeError as e:
+        print(f"⚠️ Metering: Invalid LLM_PRICES ({e}), costs will not be computed.")
+        return {}
+
+
+def current_call_context():
+    """(thread_id, node) of the graph node making the current call, (None, None) outside the graph."""
+    return _call_context.get()
+
+
+def metered_node(name: str, fn):
+    """
+    Wraps a graph node so every model call it makes is attributed to (thread_id, node).
+    """
+    accepts_config = "config" in inspect.signature(fn).parameters
+
+    async def node(state, config: RunnableConfig):
+        thread_id = (config or {}).get("configurable", {}).get("thread_id")
+        token = _call_context.set((thread_id, name))
+        try:
+            return await fn(state, config) if accepts_config else await fn(state)
+        finally:
+            _call_context.reset(token)
+
+    node.__name__ = getattr(fn, "__name__", name)
+    return node
+
+
+class UsageMeter:
+    """
+    Append-only SQLite log of model calls (chat and embedding): thread, node, model actually
+    used, tokens, latency, cost, cache hit, retries and errors. `summary()` aggregates it.
+    Stored in LLM_METERING_DB (default: backend/data/usage.sqlite).
+    """
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or meter_db_path()
+        self.prices = _load_prices()
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        # WAL + NORMAL sync: a row per call must not cost an fsync on the request path
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS calls (
+                ts REAL NOT NULL,
+                thread_id TEXT,
+                node TEXT,
+                kind TEXT NOT NULL,
+                model TEXT NOT NULL,
+                input_tokens INTEGER NOT NULL DEFAULT 0,
+                output_tokens INTEGER NOT NULL DEFAULT 0,
+                latency_ms REAL NOT NULL,
+                cost_usd REAL,
+                cache_hit INTEGER NOT NULL DEFAULT 0,
+                retries INTEGER NOT NULL DEFAULT 0,
+                error INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_calls_thread ON calls (thread_id, ts)")
+        self._conn.commit()
+
+    def cost(self, model: str, input_tokens: int, output_tokens: int) -> Optional[float]:
+        price = self.prices.get(model)
+        if not price:
+            return None
+        return (input_tokens * price[0] + output_tokens * price[1]) / 1_000_000
+
+    def record(self, kind: str, model: str, latency_s: float, input_tokens: int = 0, output_tokens: int = 0,
+               cache_hit: bool = False, retries: int = 0, error: bool = False,
+               thread_id: str = None, node: str = None):
+        """Logs one call, attributed to the current graph node unless thread_id/node are given."""
+        ctx_thread, ctx_node = _call_context.get()
+        thread_id = thread_id or ctx_thread
+        node = node or ctx_node
+        # Cache hits cost nothing; their tokens are still logged (tokens saved)
+        cost = 0.0 if cache_hit else self.cost(model, input_tokens, output_tokens)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO calls (ts, thread_id, node, kind, model, input_tokens, output_tokens, latency_ms, cost_usd, cache_hit, retries, error) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (time.time(), thread_id, node, kind, model, int(input_tokens or 0), int(output_tokens or 0),
+                 latency_s * 1000, cost, int(cache_hit), int(retries), int(error))
+            )
+            self._conn.commit()
+
+    def summary(self, group_by: List[str] = None, thread_id: str = None, since: float = None) -> List[Dict[str, Any]]:
+        """
+        Aggregates calls by any of thread_id / node / model / kind (default: thread_id, node, model),
+        optionally for one thread and/or since a unix timestamp. Most expensive groups first.
+        """
+        group_by = group_by or ["thread_id", "node", "model"]
+        unknown = [c for c in group_by if c not in GROUP_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown group_by column(s): {unknown} (allowed: {', '.join(GROUP_COLUMNS)})")
+        clauses, params = [], []
+        if thread_id is not None:
+            clauses.append("thread_id = ?")
+            params.append(thread_id)
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(since)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        columns = ", ".join(group_by)
+        sql = f"""
+            SELECT {columns}, COUNT(*), SUM(input_tokens), SUM(output_tokens), SUM(cost_usd),
+                   AVG(latency_ms), MAX(latency_ms), SUM(latency_ms), SUM(cache_hit), SUM(retries), SUM(error)
+            FROM calls {where}
+            GROUP BY {columns}
+            ORDER BY SUM(input_tokens + output_tokens) DESC
+        """
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        result = []
+        for row in rows:
+            entry = dict(zip(group_by, row[:len(group_by)]))
+            calls, tokens_in, tokens_out, cost, avg_ms, max_ms, total_ms, hits, retries, errors = row[len(group_by):]
+            entry.update({
+                "calls": calls,
+                "input_tokens": tokens_in,
+                "output_tokens": tokens_out,
+                "cost_usd": round(cost, 6) if cost is not None else None,
+                "avg_latency_ms": round(avg_ms, 1),
+                "max_latency_ms": round(max_ms, 1),
+                "total_latency_s": round(total_ms / 1000, 2),
+                "cache_hits": hits,
+                "retries": retries,
+                "errors": errors,
+            })
+            result.append(entry)
+        return result
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_meter: Optional[UsageMeter] = None
+_meter_lock = threading.Lock()
+
+
+def get_meter() -> Optional[UsageMeter]:
+    """
+    Shared process-wide meter, or None when LLM_METERING=false.
+    Reopened if LLM_METERING_DB changes (tests point it at a temp file).
+    """
+    global _meter
+    if os.getenv("LLM_METERING", "true").lower() != "true":
+        return None
+    db_path = meter_db_path()
+    with _meter_lock:
+        if _meter is None or _meter.db_path != db_path:
+            if _meter is not None:
+                _meter.close()
+            _meter = UsageMeter(db_path)
+        return _meter
+
+
+def record_call(kind: str, model: str, latency_s: float, **kwargs):
+    """Best-effort: metering never breaks a model call."""
+    meter = get_meter()
+    if meter is None:
+        return
+    try:
+        meter.record(kind, model, latency_s, **kwargs)
+    except Exception as e:
+        print(f"⚠️ Metering: Failed to record {kind} call ({e})")
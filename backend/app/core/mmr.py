@@ -0,0 +1,41 @@
+from typing import List, Sequence
+
+import numpy as np
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def mmr_select(query_vector: Sequence[float], candidate_vectors: Sequence[Sequence[float]], k: int,
+               lambda_mult: float = 0.5) -> List[int]:
+    """
+    Maximal marginal relevance: greedily picks k candidate indices maximizing
+    lambda * sim(query, c) - (1 - lambda) * max(sim(c, already selected)).
+    lambda=1 is plain relevance ranking, lambda=0 is pure diversity. All cosine
+    similarities are computed up front as two matrix products.
+    """
+    if k <= 0 or len(candidate_vectors) == 0:
+        return []
+    candidates = _normalize(np.asarray(candidate_vectors, dtype=np.float32))
+    query = _normalize(np.asarray(query_vector, dtype=np.float32))
+
+    relevance = candidates @ query
+    pairwise = candidates @ candidates.T
+
+    selected = [int(np.argmax(relevance))]
+    # Highest similarity of every candidate to anything selected so far
+    redundancy = pairwise[selected[0]].copy()
+    available = np.ones(len(candidates), dtype=bool)
+    available[selected[0]] = False
+
+    while len(selected) < min(k, len(candidates)):
+        scores = lambda_mult * relevance - (1.0 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(redundancy, pairwise[best], out=redundancy)
+    return selected
@@ -0,0 +1,9 @@
+import os
+
+# app/core/paths.py -> app/core -> app -> backend
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def data_path(*parts: str) -> str:
+    """Path under backend/data, where the caches, indexes and usage log live."""
+    return os.path.join(BACKEND_DIR, "data", *parts)
@@ -0,0 +1,201 @@
+import os
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager, asynccontextmanager
+from typing import Dict, Any, Optional
+
+from app.core.rate_limit import RateBudget
+from app.core.metering import current_call_context
+
+# Defaults per provider: (max in-flight requests, requests/minute, tokens/minute). 0 = unlimited.
+PROVIDER_DEFAULTS = {
+    "google": (8, 0, 0),
+    "openai": (8, 0, 0),
+    "ollama": (2, 0, 0),
+}
+API_KEY_ENV = {"google": "GOOGLE_API_KEY", "openai": "OPENAI_API_KEY"}
+
+
+class _Ticket:
+    """A queued request. Woken (thread or event loop) whenever the limiter's state changes."""
+    __slots__ = ("key", "tokens", "event", "loop")
+
+    def __init__(self, key: str, tokens: int, loop: asyncio.AbstractEventLoop = None):
+        self.key = key
+        self.tokens = tokens
+        self.loop = loop
+        self.event = asyncio.Event() if loop else threading.Event()
+
+    def wake(self):
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self.event.set)
+
+
+class ProviderLimiter:
+    """
+    Shared limiter for one provider / API key, used by every LLM and embedding call:
+    - at most `max_concurrent` requests in flight,
+    - a sliding-window requests/tokens per minute budget (RateBudget),
+    - a queue that serves waiting conversation threads round-robin (FIFO within a thread),
+      so one busy session can't starve the others.
+    Requests wait their turn instead of bursting into 429s.
+    """
+    def __init__(self, name: str, max_concurrent: int = 0, requests_per_minute: int = 0, tokens_per_minute: int = 0):
+        self.name = name
+        self.max_concurrent = max_concurrent or 0
+        self.budget = RateBudget(requests_per_minute=requests_per_minute, tokens_per_minute=tokens_per_minute)
+        self.in_flight = 0
+        self.granted = 0
+        self._queues: "OrderedDict[str, deque]" = OrderedDict()  # thread key -> waiting tickets
+        self._lock = threading.Lock()
+
+    def _enqueue(self, ticket: _Ticket):
+        with self._lock:
+            self._queues.setdefault(ticket.key, deque()).append(ticket)
+
+    def _remove(self, ticket: _Ticket):
+        queue = self._queues.get(ticket.key)
+        if queue and ticket in queue:
+            queue.remove(ticket)
+            if not queue:
+                del self._queues[ticket.key]
+
+    def _wake_all(self):
+        for queue in self._queues.values():
+            for ticket in queue:
+                ticket.wake()
+
+    def _try_grant(self, ticket: _Ticket) -> Optional[float]:
+        """
+        0.0 if `ticket` was granted; a wait in seconds if it is next but over the rate budget;
+        None if it has to wait for its turn or a free slot.
+        """
+        with self._lock:
+            head_key = next(iter(self._queues))
+            if ticket.key != head_key or self._queues[head_key][0] is not ticket:
+                return None
+            if self.max_concurrent and self.in_flight >= self.max_concurrent:
+                return None
+            wait = self.budget.try_acquire(ticket.tokens)
+            if wait > 0:
+                return wait
+            self._queues[head_key].popleft()
+            if self._queues[head_key]:
+                # Round-robin: this thread goes to the back of the line
+                self._queues.move_to_end(head_key)
+            else:
+                del self._queues[head_key]
+            self.in_flight += 1
+            self.granted += 1
+            self._wake_all()
+            return 0.0
+
+    def _release(self):
+        with self._lock:
+            self.in_flight -= 1
+            self._wake_all()
+
+    def _abandon(self, ticket: _Ticket):
+        with self._lock:
+            self._remove(ticket)
+            self._wake_all()
+
+    @contextmanager
+    def limit(self, tokens: int = 0, key: str = None):
+        """Blocks until the request may be sent; the slot is held for the body of the `with`."""
+        ticket = _Ticket(key or current_call_context()[0] or "background", tokens)
+        self._enqueue(ticket)
+        try:
+            while True:
+                ticket.event.clear()
+                wait = self._try_grant(ticket)
+                if wait == 0.0:
+                    break
+                ticket.event.wait(timeout=wait)
+        except BaseException:
+            self._abandon(ticket)
+            raise
+        try:
+            yield
+        finally:
+            self._release()
+
+    @asynccontextmanager
+    async def alimit(self, tokens: int = 0, key: str = None):
+        """Async variant: waits on the event loop, no thread is held while queued."""
+        ticket = _Ticket(key or current_call_context()[0] or "background", tokens, loop=asyncio.get_running_loop())
+        self._enqueue(ticket)
+        try:
+            while True:
+                ticket.event.clear()
+                wait = self._try_grant(ticket)
+                if wait == 0.0:
+                    break
+                try:
+                    await asyncio.wait_for(ticket.event.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            self._abandon(ticket)
+            raise
+        try:
+            yield
+        finally:
+            self._release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            waiting = {key: len(q) for key, q in self._queues.items()}
+        return {
+            "in_flight": self.in_flight,
+            "max_concurrent": self.max_concurrent,
+            "waiting": waiting,
+            "granted": self.granted,
+            "window": self.budget.usage(),
+        }
+
+
+_limiters: Dict[str, ProviderLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(provider: str) -> ProviderLimiter:
+    """
+    Process-wide limiter for a provider's API key. Configured with
+    LLM_LIMIT_<PROVIDER>_CONCURRENCY / _RPM / _TPM (e.g. LLM_LIMIT_GOOGLE_RPM=150).
+    """
+    api_key = os.getenv(API_KEY_ENV.get(provider, ""), "") if provider in API_KEY_ENV else ""
+    name = f"{provider}:{hashlib.sha1(api_key.encode('utf-8')).hexdigest()[:8]}" if api_key else provider
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            concurrency, rpm, tpm = PROVIDER_DEFAULTS.get(provider, (8, 0, 0))
+            prefix = f"LLM_LIMIT_{provider.upper()}"
+            limiter = ProviderLimiter(
+                name,
+                max_concurrent=int(os.getenv(f"{prefix}_CONCURRENCY", str(concurrency))),
+                requests_per_minute=int(os.getenv(f"{prefix}_RPM", str(rpm))),
+                tokens_per_minute=int(os.getenv(f"{prefix}_TPM", str(tpm)))
+            )
+            _limiters[name] = limiter
+        return limiter
+
+
+def provider_of(client) -> str:
+    """Provider of a LangChain chat/embedding client, by class name."""
+    name = type(client).__name__.lower()
+    if "openai" in name:
+        return "openai"
+    if "ollama" in name:
+        return "ollama"
+    return "google"
+
+
+def limiter_stats() -> Dict[str, Dict[str, Any]]:
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {l.name: l.stats() for l in limiters}
@@ -1,44 +1,403 @@
 import os
+import re
+import json
+import time
+import random
+import asyncio
+import hashlib
+import threading
+import statistics
 import chromadb
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Callable, Optional
 
-from langchain_chroma import Chroma
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_core.documents import Document
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 
-# Loaders
-from langchain_community.document_loaders import TextLoader, PyPDFLoader, DirectoryLoader
+from app.core.loaders import ParallelLoader
+from app.core.manifest import IngestManifest, hash_file
+from app.core.catalog import SourceCatalog
+from app.core.ttl_cache import TTLCache
+from app.core.rwlock import ReadWriteLock
+from app.core.stream import prefetch
+from app.core.lexical_index import LexicalIndex, reciprocal_rank_fusion
+from app.core.dedup import DedupIndex
+from app.core.mmr import mmr_select
+from app.core.context_packing import pack_context
+from app.core.embedding_cache import text_hash
+from app.core.embeddings import CachedEmbeddings
+from app.core.embedding_pipeline import EmbeddingPipeline
+from app.core.vector_backends import VectorBackend, make_backend
+from app.core.chunking import Chunker
+from app.core.paths import data_path
+
+SUPPORTED_EXTS = ['.md', '.txt', '.py', '.js', '.ts', '.tsx', '.json', '.html', '.css', '.pdf', '.docx']
+SKIP_DIRS = ['node_modules', 'venv', 'dist', 'build', '__pycache__']
+
+# Single-token queries that look like code identifiers or file names
+IDENTIFIER_QUERY_RE = re.compile(r"^[\w\-]*[_./][\w\-./]*$|^[a-z]+[A-Z]\w*$|^[A-Z][a-z]+[A-Z]\w*$")
+
+COLLECTION_NAME = "research_vectors"
+
+# Filterable metadata kept for alternate sources of a deduplicated chunk
+ALIAS_METADATA_KEYS = ("source", "research_root", "rel_path", "file_type", "mtime")
+
+# One-off index migrations (VectorStoreManager._migrate_<name>), recorded in layout.json once run
+INDEX_MIGRATIONS = ("chunk_metadata", "chunk_index")
+
+def shard_collection_name(root: str) -> str:
+    """Collection holding one research root's chunks when sharding is enabled."""
+    return f"{COLLECTION_NAME}_{hashlib.sha1(os.path.abspath(root).encode('utf-8')).hexdigest()[:12]}"
+
+def chunk_metadata(file_path: str, directory_path: str, stat) -> Dict[str, Any]:
+    """
+    Filterable metadata stamped on every chunk of a file (on top of the loader's source/page).
+    """
+    root = os.path.abspath(directory_path)
+    return {
+        "research_root": root,
+        "rel_path": os.path.relpath(file_path, root),
+        "file_type": os.path.splitext(file_path)[1].lstrip('.').lower(),
+        "mtime": int(stat.st_mtime),
+    }
+
+def scoped_where(where: Optional[Dict[str, Any]], roots: Optional[List[str]]) -> Optional[Dict[str, Any]]:
+    """Combines a Chroma-style `where` filter with a research-root restriction."""
+    if not roots:
+        return where or None
+    root_filter = {"research_root": {"$in": [os.path.abspath(r) for r in roots]}}
+    return {"$and": [where, root_filter]} if where else root_filter
+
+def directory_bytes(path: str) -> int:
+    """Total size of every file below `path`."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+def chunk_id(file_path: str, index: int) -> str:
+    """Deterministic vector-store ID for the index-th chunk of a file."""
+    return f"{hashlib.sha1(file_path.encode('utf-8')).hexdigest()[:16]}-{index}"
+
+def iter_source_files(directory_path: str):
+    """
+    Yields absolute paths of supported files, skipping hidden folders and known garbage.
+    """
+    for root, _, files in os.walk(directory_path):
+        # Skip hidden folders, but allow the current directory '.'
+        if any((part.startswith('.') and part != '.') or part in SKIP_DIRS for part in root.split(os.sep)):
+            continue
+
+        for file in files:
+            if os.path.splitext(file)[1] in SUPPORTED_EXTS:
+                yield os.path.abspath(os.path.join(root, file))
 
 class VectorStoreManager:
-    def __init__(self, persistence_dir: str = None):
+    def __init__(self, persistence_dir: str = None, embedding_model: CachedEmbeddings = None):
         if persistence_dir is None:
-            # Resolve absolute path: app/core/rag.py -> app/core -> app -> backend
-            base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-            persistence_dir = os.path.join(base_dir, "data", "chroma_db")
+            persistence_dir = data_path("chroma_db")
         self.persistence_dir = persistence_dir
-        self.embedding_model = GoogleGenerativeAIEmbeddings(
+        # Searches take the read side; every index mutation takes the write side.
+        # Only one ingestion runs at a time per manager.
+        self.rw_lock = ReadWriteLock()
+        self._ingest_lock = threading.Lock()
+        
+        # Embeddings go through the shared disk cache so identical chunks are only embedded once
+        self.embedding_model = embedding_model or CachedEmbeddings(GoogleGenerativeAIEmbeddings(
             model="models/embedding-001",
             google_api_key=os.getenv("GOOGLE_API_KEY"),
             task_type="retrieval_document"
-        )
+        ))
+        
+        # Vector backend: "chroma" (HNSW, default) or "numpy" (mmap'd exact search, see vector_backends.py)
+        self.backend_kind = os.getenv("RAG_VECTOR_BACKEND", "chroma").lower()
+        self.vector_store = make_backend(self.backend_kind, self.persistence_dir, COLLECTION_NAME, self.embedding_model)
+        
+        # Optional: one collection per research root, searched in parallel and merged
+        self.shard_by_root = os.getenv("RAG_SHARD_BY_ROOT", "false").lower() == "true"
+        self._shards: Dict[str, VectorBackend] = {}
+        self._shards_lock = threading.Lock()
+        
+        # Batched, rate-limited, concurrent embedding + per-batch commits
+        self.embedding_pipeline = EmbeddingPipeline(self.vector_store, self.embedding_model, commit_guard=self.rw_lock.write)
+        
+        # Parallel (process pool) file parsing
+        self.loader = ParallelLoader()
         
-        self.vector_store = Chroma(
-            persist_directory=self.persistence_dir,
-            embedding_function=self.embedding_model,
-            collection_name="research_vectors"
+        # Per-file manifest (size, mtime, hash, chunk IDs) for incremental ingestion
+        self.manifest = IngestManifest(os.path.join(self.persistence_dir, "ingest_manifest.sqlite"))
+        
+        # BM25 inverted index over the same chunks (hybrid + lexical-only retrieval)
+        self.lexical_index = LexicalIndex(os.path.join(self.persistence_dir, "lexical.sqlite"))
+        
+        # Search results cache: (query, k, mode, collection version) -> Documents
+        self.results_cache = TTLCache(
+            maxsize=int(os.getenv("RAG_RESULTS_CACHE_SIZE", "256")),
+            ttl=float(os.getenv("RAG_RESULTS_CACHE_TTL", "600"))
         )
+        self._local_version = 0
+        
+        # Near-duplicate chunk index (MinHash + LSH): duplicates are stored once, with alternate sources
+        self.dedup_enabled = os.getenv("RAG_DEDUP", "true").lower() == "true"
+        self.dedup = DedupIndex(os.path.join(self.persistence_dir, "dedup.sqlite"))
+        
+        # Catalog of every ingested source (powers get_file_overviews without any search)
+        self.catalog = SourceCatalog(os.path.join(self.persistence_dir, "catalog.sqlite"))
+        
+        # Structure-aware, token-sized splitting per file type (see chunking.py)
+        self.chunker = Chunker()
         
-        # Splitters
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            separators=["\n\n", "\n", " ", ""]
+        self._check_layout()
+
+    def _check_layout(self):
+        """
+        The manifest only describes the layout it was built for. If the backend, int8/float32,
+        sharding or chunking setting changed, every index is reset so the next ingestion rebuilds
+        the new layout (unchanged chunks come from the embedding cache, so this costs few API calls).
+        One-off index migrations are recorded next to the layout, so each runs once per index.
+        """
+        layout = {"backend": self.backend_kind, "shard_by_root": self.shard_by_root}
+        if self.backend_kind == "numpy":
+            layout["dtype"] = self.vector_store.dtype
+        layout.update(self.chunker.layout())
+        path = os.path.join(self.persistence_dir, "layout.json")
+        # Indexes built before this file existed were always a single Chroma collection
+        previous = {"backend": "chroma", "shard_by_root": False}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                previous = json.load(f)
+        migrations = previous.pop("migrations", [])
+        if previous != layout:
+            print(f"♻️ RAG: Index layout changed ({previous} -> {layout}), the index will be rebuilt.")
+            vector_keys = ("backend", "shard_by_root", "dtype")
+            if all(previous.get(key) == layout.get(key) for key in vector_keys):
+                # Same collections, new chunk boundaries: drop the old chunks before the manifest forgets them
+                stale = self.manifest.all_chunk_ids()
+                for store in self._stores_for():
+                    for start in range(0, len(stale), 500):
+                        store.delete(ids=stale[start:start + 500])
+            for index in (self.manifest, self.catalog, self.lexical_index, self.dedup):
+                index.clear()
+            # A rebuilt index has nothing to migrate
+            migrations = list(INDEX_MIGRATIONS)
+        elif os.path.exists(path) and set(INDEX_MIGRATIONS) <= set(migrations):
+            return
+        for name in INDEX_MIGRATIONS:
+            if name not in migrations:
+                getattr(self, f"_migrate_{name}")()
+                migrations.append(name)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({**layout, "migrations": migrations}, f)
+
+    def _reindex_files(self, needs_reindex: Callable[[str, Dict[str, Any], Optional[Dict[str, Any]]], bool], reason: str):
+        """
+        Clears the content hash of every file for which needs_reindex(path, record, first stored
+        chunk) is true, so the next ingestion of its folder re-indexes it once. Its vectors come
+        back from the embedding cache, so no API calls are made.
+        """
+        invalidated = 0
+        for path in self.manifest.paths():
+            record = self.manifest.get(path)
+            if not record or not record["chunk_ids"]:
+                continue
+            if needs_reindex(path, record, self.lexical_index.get(record["chunk_ids"][0])):
+                self.manifest.upsert(path, record["size"], record["mtime_ns"], "", record["chunk_ids"])
+                invalidated += 1
+        if invalidated:
+            print(f"♻️ RAG: {invalidated} files {reason}, they will be re-indexed once.")
+
+    def _migrate_chunk_metadata(self):
+        """Files indexed before chunks carried filterable metadata, or before the catalog and lexical index existed."""
+        self._reindex_files(
+            lambda path, record, stored: stored is None or not self.catalog.has(path)
+            or not {"research_root", "chunk_id"} <= stored["metadata"].keys(),
+            "predate chunk metadata / catalog / lexical index"
         )
 
-    def ingest_directory(self, directory_path: str):
+    def _migrate_chunk_index(self):
+        """Files indexed before chunks carried their position (read by pack_context to merge neighbours)."""
+        self._reindex_files(
+            lambda path, record, stored: stored is not None and "chunk_index" not in stored["metadata"],
+            "predate the chunk_index field"
+        )
+
+    def _store_for(self, root: str = None) -> VectorBackend:
+        """The collection that holds `root`'s chunks (the shared one unless sharding is on)."""
+        if not self.shard_by_root or root is None:
+            return self.vector_store
+        root = os.path.abspath(root)
+        with self._shards_lock:
+            store = self._shards.get(root)
+            if store is None:
+                store = make_backend(self.backend_kind, self.persistence_dir, shard_collection_name(root), self.embedding_model)
+                self._shards[root] = store
+            return store
+
+    def _stores_for(self, roots: List[str] = None) -> List[VectorBackend]:
+        """Collections a search has to visit: only the requested roots' shards when sharding."""
+        if not self.shard_by_root:
+            return [self.vector_store]
+        known = self.catalog.roots()
+        if roots:
+            known = [r for r in known if r in {os.path.abspath(x) for x in roots}]
+        return [self._store_for(r) for r in known]
+
+    def _delete_chunks(self, chunk_ids: List[str], root: str = None):
+        if chunk_ids:
+            with self.rw_lock.write():
+                self._store_for(root).delete(ids=chunk_ids)
+                self.lexical_index.delete(chunk_ids)
+                self._bump_version()
+            self.dedup.remove(chunk_ids)
+
+    def _release_chunks(self, file_path: str, chunk_ids: List[str], root: str):
+        """
+        Drops a file's chunks (file changed or removed). Canonical chunks that other files
+        still share are handed over to one of those files instead of disappearing.
+        """
+        self.dedup.remove_source_aliases(file_path)
+        shared = self.dedup.alternates(chunk_ids)
+        for cid, sources in shared.items():
+            try:
+                self._hand_over(cid, sources, root)
+            except Exception as e:
+                print(f"⚠️ Failed to hand over shared chunk {cid}: {e}")
+        self._delete_chunks(chunk_ids, root)
+
+    def _hand_over(self, old_id: str, sources: List[str], root: str):
+        """
+        Re-keys a shared canonical chunk under its first alternate source. The text is unchanged,
+        so the vector comes straight from the embedding cache.
+        """
+        new_owner, others = sources[0], sources[1:]
+        stored = self.lexical_index.get(old_id)
+        entry = self.dedup.get(old_id)
+        owner_record = self.manifest.get(new_owner)
+        if stored is None or entry is None or owner_record is None or not os.path.exists(new_owner):
+            return
+        
+        new_id = chunk_id(new_owner, f"alt-{old_id}")
+        # No page / position: the chunk isn't a neighbour of the new owner's own chunks
+        metadata = {k: v for k, v in stored["metadata"].items() if k not in ("page", "chunk_index")}
+        metadata.update(chunk_metadata(new_owner, root, os.stat(new_owner)), source=new_owner, chunk_id=new_id)
+        doc = Document(page_content=stored["content"], metadata=metadata)
+        
+        self.embedding_pipeline.run([doc], [new_id], vector_store=self._store_for(root))
+        with self.rw_lock.write():
+            self.lexical_index.add([new_id], [doc.page_content], [metadata])
+            self._bump_version()
+        self.manifest.upsert(new_owner, owner_record["size"], owner_record["mtime_ns"], owner_record["content_hash"],
+                             owner_record["chunk_ids"] + [new_id])
+        self.dedup.add(new_id, entry["scope"], new_owner, entry["signature"])
+        for source in others:
+            alias_metadata = chunk_metadata(source, root, os.stat(source)) if os.path.exists(source) else {}
+            self.dedup.add_alias(new_id, source, {**alias_metadata, "source": source})
+
+    def _dedup_chunks(self, file_path: str, directory_path: str, chunks, signatures):
+        """
+        Drops chunks that nearly duplicate an already-indexed chunk of the same research root,
+        recording this file as an alternate source of the canonical one.
+        Returns (kept chunks, their IDs, number of duplicates dropped).
+        """
+        ids = [chunk_id(file_path, i) for i in range(len(chunks))]
+        for i, (chunk, cid) in enumerate(zip(chunks, ids)):
+            chunk.metadata["chunk_id"] = cid
+            chunk.metadata["chunk_index"] = i
+        if not self.dedup_enabled:
+            return chunks, ids, 0
+        
+        scope = os.path.abspath(directory_path)
+        kept, kept_ids, duplicates = [], [], 0
+        for chunk, cid, signature in zip(chunks, ids, signatures):
+            canonical = self.dedup.find(signature, scope)
+            if canonical is None:
+                self.dedup.add(cid, scope, file_path, signature)
+                kept.append(chunk)
+                kept_ids.append(cid)
+                continue
+            duplicates += 1
+            # Repeats inside the same file are just dropped
+            if self.dedup.get(canonical)["source"] != file_path:
+                # The alias keeps this file's filterable metadata (see _with_aliases)
+                self.dedup.add_alias(canonical, file_path, {key: chunk.metadata.get(key) for key in ALIAS_METADATA_KEYS})
+        if duplicates:
+            # Cached results carry alternate_sources, which just changed
+            with self.rw_lock.write():
+                self._bump_version()
+        return kept, kept_ids, duplicates
+    def ingest_directory(self, directory_path: str, progress: Callable[[Dict[str, Any]], None] = None):
+        """
+        Serializes ingestion per manager; see _ingest_directory for the sync logic.
+        """
+        with self._ingest_lock:
+            return self._ingest_directory(directory_path, progress)
+
+    def _diff_stage(self, directory_path: str, seen: set, pending_meta: dict, stats: dict, walk_complete: threading.Event):
+        """
+        Stage 1 (walk): yields paths of new/changed files, recording their stat/hash in `pending_meta`.
+        Cheap: stat first, hash only if stat changed. `walk_complete` is set once the whole tree
+        has been walked, i.e. `seen` holds every file on disk.
         """
-        Scans a directory, chunks content, and adds to ChromaDB.
+        for file_path in iter_source_files(directory_path):
+            seen.add(file_path)
+            try:
+                stat = os.stat(file_path)
+                record = self.manifest.get(file_path)
+                
+                # Fast path: stat matches, no need to even read the file
+                # (a record whose hash was cleared by a migration is re-indexed)
+                if record and record["content_hash"] and record["size"] == stat.st_size and record["mtime_ns"] == stat.st_mtime_ns:
+                    stats["unchanged"] += 1
+                    continue
+                
+                content_hash = hash_file(file_path)
+                if record and record["content_hash"] == content_hash:
+                    self.manifest.touch(file_path, stat.st_size, stat.st_mtime_ns)
+                    stats["unchanged"] += 1
+                    continue
+                
+                pending_meta[file_path] = (stat, content_hash, record)
+                yield file_path
+            except Exception as e:
+                print(f"⚠️ Failed to stat {os.path.basename(file_path)}: {e}")
+        walk_complete.set()
+
+    def _split_stage(self, parsed, directory_path: str, pending_meta: dict, emit):
+        """
+        Stage 3 (split): turns each parsed file into (file_path, meta, chunks, signatures),
+        stamping every chunk with the file's filterable metadata. MinHash signatures for
+        near-duplicate detection are computed here, off the embedding thread.
+        """
+        for file_path, documents, error in parsed:
+            meta = pending_meta.pop(file_path)
+            if error is not None:
+                print(f"⚠️ Failed to load {os.path.basename(file_path)}: {error}")
+                emit("file_failed", file=file_path, error=str(error))
+                continue
+            chunks = self.chunker.split(documents)
+            file_metadata = chunk_metadata(file_path, directory_path, meta[0])
+            for chunk in chunks:
+                chunk.metadata.update(file_metadata)
+            signatures = [self.dedup.signature(c.page_content) for c in chunks] if self.dedup_enabled else [None] * len(chunks)
+            yield file_path, meta, chunks, signatures
+
+    def _ingest_directory(self, directory_path: str, progress=None):
+        """
+        Incrementally syncs a directory into the vector store as a streaming pipeline:
+        walk/diff -> parse (process pool) -> split -> [bounded queue] -> embed -> upsert.
+        Only a handful of files are in memory at any time, and each file is durable as soon
+        as it is upserted.
+        - Unchanged files (same size/mtime, or same content hash) are skipped.
+        - Changed files have their old chunks deleted and replaced.
+        - Near-duplicate chunks (drafts, PDF exports of markdown sources) are stored once;
+          the other files are recorded as alternate sources.
+        - Files that disappeared from disk are purged from the collection.
+        `progress` (optional, called from worker threads) receives one dict per event:
+        {"type": "ingest_progress", "event": ..., "directory": ..., "file": ..., "stats": {...}}.
         Smartly skips hidden files and known garbage.
         """
         if not os.path.exists(directory_path):
@@ -46,94 +405,501 @@ class VectorStoreManager:
             
         print(f"📚 RAG: Ingesting directory {directory_path}...")
         
-        documents = []
-        supported_exts = ['.md', '.txt', '.py', '.js', '.ts', '.tsx', '.json', '.html', '.css', '.pdf']
+        stats = {"unchanged": 0, "indexed": 0, "chunks": 0, "duplicates": 0, "failed": 0, "removed": 0}
         
-        # Walk and load
-        for root, _, files in os.walk(directory_path):
-            # Skip hidden folders, but allow the current directory '.'
-            if any((part.startswith('.') and part != '.') or part in ['node_modules', 'venv', 'dist', 'build', '__pycache__'] for part in root.split(os.sep)):
-                continue
+        def emit(event: str, **fields):
+            if event == "file_failed":
+                stats["failed"] += 1
+            if progress is None:
+                return
+            try:
+                progress({"type": "ingest_progress", "event": event, "directory": directory_path,
+                          "stats": dict(stats), **fields})
+            except Exception as e:
+                print(f"⚠️ Ingest progress callback failed: {e}")
+        
+        emit("started")
+        seen = set()
+        walk_complete = threading.Event()
+        pending_meta = {}  # file_path -> (stat, content_hash, previous manifest record)
+        
+        # 1-3. Walk/diff, parse and split run ahead in a background thread, bounded by the queue
+        changed = self._diff_stage(directory_path, seen, pending_meta, stats, walk_complete)
+        parsed = self.loader.iter_load(changed)
+        split = prefetch(
+            self._split_stage(parsed, directory_path, pending_meta, emit),
+            maxsize=int(os.getenv("INGEST_QUEUE_SIZE", "4")),
+            name="ingest-split"
+        )
+        
+        # 4-5. Embed & upsert each file as it comes off the queue
+        for file_path, (stat, content_hash, _), chunks, signatures in split:
+            chunk_ids = []
+            try:
+                # Replace: drop stale vectors before writing the new ones. Re-read the record,
+                # a shared chunk may have been handed over to this file since the diff stage.
+                record = self.manifest.get(file_path)
+                if record:
+                    self._release_chunks(file_path, record["chunk_ids"], directory_path)
                 
-            for file in files:
-                ext = os.path.splitext(file)[1]
-                if ext in supported_exts:
-                    file_path = os.path.join(root, file)
-                    try:
-                        if ext == '.pdf':
-                            loader = PyPDFLoader(file_path)
-                            documents.extend(loader.load())
-                        else:
-                            # Generic text loader
-                            loader = TextLoader(file_path, encoding='utf-8', autodetect_encoding=True)
-                            documents.extend(loader.load())
-                    except Exception as e:
-                        print(f"⚠️ Failed to load {file}: {e}")
-        
-        if not documents:
-            return "No valid documents found to index."
-            
-        # Chunking
-        print(f"✂️  RAG: Splitting {len(documents)} documents...")
-        chunks = self.text_splitter.split_documents(documents)
+                total_chunks = len(chunks)
+                chunks, chunk_ids, duplicates = self._dedup_chunks(file_path, directory_path, chunks, signatures)
+                if chunks:
+                    self.embedding_pipeline.run(chunks, chunk_ids, vector_store=self._store_for(directory_path))
+                    with self.rw_lock.write():
+                        self.lexical_index.add(chunk_ids, [c.page_content for c in chunks], [c.metadata for c in chunks])
+                        self._bump_version()
+                
+                self.manifest.upsert(file_path, stat.st_size, stat.st_mtime_ns, content_hash, chunk_ids)
+                self.catalog.upsert(
+                    file_path, directory_path, stat.st_size, stat.st_mtime_ns,
+                    total_chunks, chunks[0].page_content if chunks else ""
+                )
+                stats["indexed"] += 1
+                stats["chunks"] += len(chunks)
+                stats["duplicates"] += duplicates
+                emit("file_indexed", file=file_path, chunks=len(chunks), duplicates=duplicates)
+            except Exception as e:
+                # Forget this attempt's signatures so the retry doesn't match its own ghosts
+                self.dedup.remove(chunk_ids)
+                self.dedup.remove_source_aliases(file_path)
+                print(f"⚠️ Failed to index {os.path.basename(file_path)}: {e}")
+                emit("file_failed", file=file_path, error=str(e))
         
-        if not chunks:
-            return "No content chunks generated."
-
-        # Add to Vector Store
-        # Chroma handles upserting usually, but for simplicity we just add. 
-        # Ideally we'd check for duplicates, but for MVP we might just clear or append.
-        # Here we append.
-        print(f"💾 RAG: Embedding & Storing {len(chunks)} chunks...")
-        self.vector_store.add_documents(chunks)
+        # 6. Purge files that were removed from disk. Only after a full walk: a file the walk
+        # never reached is not in `seen` either, and must not be taken for deleted.
+        stale_paths = []
+        if walk_complete.is_set():
+            stale_paths = [path for path in self.manifest.paths_under(directory_path) if path not in seen]
+        else:
+            print(f"⚠️ RAG: Walk of {directory_path} did not finish, skipping purge of removed files.")
+        for stale_path in stale_paths:
+            record = self.manifest.get(stale_path)
+            if record:
+                self._release_chunks(stale_path, record["chunk_ids"], directory_path)
+            self.manifest.remove(stale_path)
+            self.catalog.remove(stale_path)
+            stats["removed"] += 1
+            emit("file_removed", file=stale_path)
         
-        return f"Successfully indexed {len(chunks)} chunks from {directory_path}."
+        if stats["removed"]:
+            print(f"🗑️  RAG: Purged {stats['removed']} removed files from index.")
+        
+        if stats["indexed"] == 0:
+            if stats["failed"]:
+                # Nothing got in, so the index is not up to date; failed files are retried next run
+                result = f"Failed to index {stats['failed']} changed files in {directory_path} ({stats['unchanged']} unchanged, {stats['removed']} removed)."
+            elif stats["unchanged"] == 0:
+                result = "No valid documents found to index."
+            else:
+                result = f"Index up to date for {directory_path} ({stats['unchanged']} files unchanged, {stats['removed']} removed)."
+        else:
+            print(f"💾 RAG: Embedded & Stored {stats['chunks']} chunks from {stats['indexed']} files ({stats['unchanged']} unchanged, {stats['failed']} failed, {stats['duplicates']} near-duplicate chunks merged).")
+            result = f"Successfully indexed {stats['chunks']} chunks from {directory_path} ({stats['indexed']} files updated, {stats['unchanged']} unchanged, {stats['removed']} removed, {stats['failed']} failed)."
+        
+        emit("finished", result=result)
+        return result
 
-    def similarity_search(self, query: str, k: int = 5) -> str:
+    async def aingest_directory(self, directory_path: str, progress: Callable[[Dict[str, Any]], None] = None):
         """
-        Returns a string context of the top-k most relevant chunks.
+        Async variant for graph nodes / FastAPI handlers: runs ingestion off the event loop.
         """
-        print(f"🔍 RAG: Searching for '{query}'...")
-        results = self.vector_store.similarity_search(query, k=k)
-        
+        return await asyncio.to_thread(self.ingest_directory, directory_path, progress)
+
+    def _format_results(self, results: List[Document]) -> str:
         if not results:
             return "No relevant local documents found via vector search."
             
         context_parts = []
         for i, doc in enumerate(results):
             source = doc.metadata.get('source', 'Unknown')
+            alternates = doc.metadata.get('alternate_sources')
+            if alternates:
+                source += f" (also in: {', '.join(alternates)})"
             content = doc.page_content.replace('\n', ' ')
             context_parts.append(f"Source [{i+1}]: {source}\nContent: {content}\n")
             
         return "\n---\n".join(context_parts)
 
-    def get_file_overviews(self) -> str:
+    def lexical_search(self, query: str, k: int = 5, where: Dict[str, Any] = None) -> List[Document]:
         """
-        Returns a high-level summary (filename + snippet) of what is in the store.
-        Used for initial context setting so the agent knows what files exist.
+        BM25 search over the local inverted index. Never calls the embedding API.
         """
-        # Limiting to avoid huge context, but getting distinct sources
-        # Chroma doesn't facilitate "SELECT DISTINCT source" easily without SQL traversal,
-        # but we can do a dummy search or track ingestion. 
-        # For this MVP, we will rely on a 'list' of files if we just ingested, 
-        # or we just do a broad empty search if possible (not recommended for vector stores).
+        return [
+            Document(page_content=hit["content"], metadata=hit["metadata"])
+            for hit in self.lexical_index.search(query, k=k, where=where)
+        ]
+
+    def vector_search(self, query: str, k: int = 5, where: Dict[str, Any] = None, roots: List[str] = None) -> List[Document]:
+        """
+        Dense search. The query is embedded once; with sharding on, each root's collection is
+        searched in parallel and the hits are merged by distance.
+        """
+        stores = self._stores_for(roots)
+        if not stores:
+            return []
+        # Shards already scope by root, so only the shared collection needs the root filter
+        where = scoped_where(where, None if self.shard_by_root else roots)
+        embedding = self.embedding_model.embed_query(query)
         
-        # Better approach for MVP: return the recently ingested file list if available,
-        # or just advise the agent to search broadly.
-        # But to truly solve the user's request, let's peek at the first 10 chunks to give a flavor.
+        def search(store):
+            return store.search_by_vector(embedding, k=k, where=where)
         
-        results = self.vector_store.similarity_search("Assign context labels", k=10)
-        sources = set()
-        overview_text = []
+        if len(stores) == 1:
+            scored = search(stores[0])
+        else:
+            with ThreadPoolExecutor(max_workers=min(8, len(stores))) as pool:
+                scored = [hit for hits in pool.map(search, stores) for hit in hits]
+        scored.sort(key=lambda hit: hit[1])
+        return [doc for doc, _ in scored[:k]]
+
+    def collection_version(self):
+        """
+        Changes whenever the indexed content changes: local writes bump a counter, and
+        SQLite's data_version on the manifest catches writes from other managers/processes.
+        """
+        return (self._local_version, self.manifest.data_version())
+
+    def _bump_version(self):
+        self._local_version += 1
+        self.results_cache.clear()
+
+    def search_documents(self, query: str, k: int = 5, mode: str = "hybrid", use_cache: bool = True,
+                         where: Dict[str, Any] = None, roots: List[str] = None,
+                         fetch_k: int = None, lambda_mult: float = None) -> List[Document]:
+        """
+        Retrieves the top-k chunks as Documents, served from the results cache when the
+        same (query, k, mode, filters) was already answered for the current collection version.
+        - where: Chroma-style metadata filter, e.g. {"file_type": "pdf"} or
+          {"$and": [{"file_type": {"$in": ["py", "ts"]}}, {"mtime": {"$gte": 1700000000}}]}.
+          Filterable fields: research_root, rel_path, file_type, mtime, page, source. Deduplicated
+          chunks also match through their alternate sources' metadata.
+        - roots: restrict the search to these research folders.
+        - fetch_k / lambda_mult: candidate pool size and relevance/diversity trade-off for mode="mmr"
+          (defaults: RAG_MMR_FETCH_K=max(20, 4k), RAG_MMR_LAMBDA=0.5).
+        """
+        roots = sorted(os.path.abspath(r) for r in roots) if roots else None
+        if mode == "mmr":
+            fetch_k = fetch_k or int(os.getenv("RAG_MMR_FETCH_K", "0")) or max(20, 4 * k)
+            lambda_mult = lambda_mult if lambda_mult is not None else float(os.getenv("RAG_MMR_LAMBDA", "0.5"))
+        key = (query, k, mode, json.dumps(where, sort_keys=True), tuple(roots or ()), fetch_k, lambda_mult,
+               self.collection_version())
+        if use_cache:
+            cached = self.results_cache.get(key)
+            if cached is not None:
+                print(f"⚡ RAG: Cache hit for '{query[:60]}'.")
+                return list(cached)
         
+        where = self._with_aliases(where)
+        with self.rw_lock.read():
+            if mode == "mmr":
+                results = self.mmr_search(query, k=k, fetch_k=fetch_k, lambda_mult=lambda_mult, where=where, roots=roots)
+            else:
+                results = self._search_uncached(query, k=k, mode=mode, where=where, roots=roots)
+        self._attach_alternates(results)
+        self.results_cache.set(key, tuple(results))
+        return results
+
+    def _with_aliases(self, where: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Widens a metadata filter to canonical chunks whose alternate sources match it: a chunk
+        merged away by dedup still answers e.g. {"rel_path": "draft.md"} through its canonical copy.
+        """
+        if not where or not self.dedup_enabled:
+            return where
+        alias_ids = self.dedup.matching_aliases(where)
+        if not alias_ids:
+            return where
+        return {"$or": [where, {"chunk_id": {"$in": alias_ids}}]}
+
+    def _attach_alternates(self, results: List[Document]):
+        """Adds `alternate_sources` to canonical chunks that also appear in other files."""
+        ids = [d.metadata["chunk_id"] for d in results if d.metadata.get("chunk_id")]
+        alternates = self.dedup.alternates(ids) if ids else {}
         for doc in results:
-            src = doc.metadata.get('source', 'Unknown')
-            if src not in sources:
-                sources.add(src)
-                snippet = doc.page_content[:200].replace('\n', ' ')
-                overview_text.append(f"- File: {os.path.basename(src)}\n  Snippet: {snippet}...")
-                
-        if not overview_text:
+            if doc.metadata.get("chunk_id") in alternates:
+                doc.metadata["alternate_sources"] = alternates[doc.metadata["chunk_id"]]
+
+    def _search_uncached(self, query: str, k: int = 5, mode: str = "hybrid",
+                         where: Dict[str, Any] = None, roots: List[str] = None) -> List[Document]:
+        """
+        Retrieves the top-k chunks as Documents.
+        - mode="vector": dense retrieval through the vector backend only.
+        - mode="lexical": BM25 only (no embedding call).
+        - mode="hybrid": reciprocal-rank fusion of both lists. Identifier-like queries
+          (file names, snake_case, dotted paths) that BM25 already answers in full skip
+          the embedding round-trip.
+        (mode="mmr" is handled by mmr_search on top of a hybrid candidate pool.)
+        """
+        lexical_where = scoped_where(where, roots)
+        if mode == "lexical":
+            return self.lexical_search(query, k=k, where=lexical_where)
+        if mode == "vector":
+            return self.vector_search(query, k=k, where=where, roots=roots)
+        
+        # Fetch deeper lists than k so fusion has something to re-rank
+        pool_k = k * 2
+        lexical_hits = self.lexical_search(query, k=pool_k, where=lexical_where)
+        if len(lexical_hits) >= k and IDENTIFIER_QUERY_RE.match(query.strip()):
+            print("⚡ RAG: Exact identifier match, skipping vector search.")
+            return lexical_hits[:k]
+        
+        vector_hits = self.vector_search(query, k=pool_k, where=where, roots=roots)
+        fused = reciprocal_rank_fusion(
+            [vector_hits, lexical_hits],
+            key=lambda d: (d.metadata.get('source'), d.page_content)
+        )
+        return fused[:k]
+
+    def _stored_vectors(self, docs: List[Document]) -> List[Optional[List[float]]]:
+        """
+        Vectors of already-indexed chunks without calling the embedding API: the embedding
+        cache first, then the vector store itself (by chunk ID) for anything evicted.
+        """
+        model = self.embedding_model
+        hashes = [text_hash(d.page_content) for d in docs]
+        cached = model.cache.get_many(model.model_name, model.task_type, hashes)
+        vectors = [cached.get(h) for h in hashes]
+        
+        missing: Dict[Optional[str], List[int]] = {}
+        for i, (doc, vector) in enumerate(zip(docs, vectors)):
+            if vector is None and doc.metadata.get("chunk_id"):
+                missing.setdefault(doc.metadata.get("research_root"), []).append(i)
+        for root, positions in missing.items():
+            stored = self._store_for(root).get(ids=[docs[i].metadata["chunk_id"] for i in positions], include=["embeddings"])
+            by_id = dict(zip(stored.get("ids") or [], stored.get("embeddings") if stored.get("embeddings") is not None else []))
+            for i in positions:
+                vector = by_id.get(docs[i].metadata["chunk_id"])
+                vectors[i] = list(vector) if vector is not None else None
+        return vectors
+
+    def mmr_search(self, query: str, k: int = 5, fetch_k: int = 20, lambda_mult: float = 0.5,
+                   where: Dict[str, Any] = None, roots: List[str] = None) -> List[Document]:
+        """
+        Maximal-marginal-relevance retrieval: takes a hybrid candidate pool of `fetch_k` chunks
+        and re-ranks it for relevance *and* diversity, so k slots aren't spent on adjacent,
+        overlapping chunks of one file. Candidate vectors are read back, never re-embedded.
+        """
+        candidates = self._search_uncached(query, k=fetch_k, mode="hybrid", where=where, roots=roots)
+        if len(candidates) <= k:
+            return candidates
+        vectors = self._stored_vectors(candidates)
+        scored = [(doc, vector) for doc, vector in zip(candidates, vectors) if vector is not None]
+        if len(scored) < len(candidates):
+            print(f"⚠️ RAG: {len(candidates) - len(scored)} MMR candidates have no stored vector, skipping them.")
+        if not scored:
+            return candidates[:k]
+        picked = mmr_select(self.embedding_model.embed_query(query), [v for _, v in scored], k, lambda_mult)
+        return [scored[i][0] for i in picked]
+
+    def packed_context(self, query: str, token_budget: int, k: int = 20, mode: str = "mmr", **search_kwargs) -> Dict[str, Any]:
+        """
+        Retrieves up to k chunks and packs the best of them into `token_budget` tokens
+        (tiktoken-counted; adjacent chunks of one source merged). Returns the pack_context
+        dict: text, tokens used, included and dropped chunks.
+        """
+        packed = pack_context(self.search_documents(query, k=k, mode=mode, **search_kwargs), token_budget)
+        if packed["dropped"]:
+            print(f"✂️ RAG: Packed {len(packed['included'])} chunks into {packed['tokens']}/{token_budget} tokens, dropped {len(packed['dropped'])}.")
+        return packed
+
+    def similarity_search(self, query: str, k: int = 5, mode: str = "hybrid",
+                          where: Dict[str, Any] = None, roots: List[str] = None,
+                          fetch_k: int = None, lambda_mult: float = None, token_budget: int = None) -> str:
+        """
+        Returns a string context of the top-k most relevant chunks (hybrid retrieval by default),
+        optionally scoped by metadata filter / research roots, or diversified with mode="mmr"
+        (see search_documents). With `token_budget`, the context is packed to fit that many
+        tokens and ends with a note on what was left out.
+        """
+        scope = f", where={where}" if where else ""
+        scope += f", roots={roots}" if roots else ""
+        print(f"🔍 RAG: Searching for '{query}' ({mode}{scope})...")
+        search_kwargs = dict(where=where, roots=roots, fetch_k=fetch_k, lambda_mult=lambda_mult)
+        if token_budget is None:
+            return self._format_results(self.search_documents(query, k=k, mode=mode, **search_kwargs))
+        
+        packed = self.packed_context(query, token_budget, k=k, mode=mode, **search_kwargs)
+        if not packed["included"]:
+            return self._format_results([])
+        text = packed["text"]
+        if packed["dropped"]:
+            sources = ", ".join(dict.fromkeys(os.path.basename(d["source"]) for d in packed["dropped"]))
+            text += f"\n\n({len(packed['dropped'])} lower-ranked chunks omitted to fit the context budget: {sources})"
+        return text
+
+    async def asimilarity_search(self, query: str, **kwargs) -> str:
+        """
+        Async variant for graph nodes: embedding + search run off the event loop.
+        """
+        return await asyncio.to_thread(self.similarity_search, query, **kwargs)
+
+    def get_file_overviews(self, limit: int = 200, offset: int = 0, file_type: str = None, root: str = None) -> str:
+        """
+        Returns a high-level summary (relative path + snippet/summary) of what is in the store.
+        Used for initial context setting so the agent knows what files exist.
+        Reads the source catalog directly: no embedding call, paginated for large libraries.
+        Each entry is a single "- path (...)" line so downstream regexes can pick out the paths.
+        """
+        total = self.catalog.count(file_type=file_type, root=root)
+        entries = self.catalog.list(offset=offset, limit=limit, file_type=file_type, root=root)
+        
+        if not entries:
             return "No files knowledge found yet."
+        
+        overview_text = []
+        for entry in entries:
+            blurb = entry["summary"] or entry["snippet"]
+            overview_text.append(f"- {entry['rel_path']} ({entry['file_type']}, {entry['chunk_count']} chunks): {blurb}...")
+        
+        if total > offset + len(entries):
+            overview_text.append(f"(Showing files {offset + 1}-{offset + len(entries)} of {total}.)")
             
         return "\n".join(overview_text)
+
+    def _probe_vectors(self, referenced: set, samples: int):
+        """A fixed sample of stored chunk vectors (per store) to time searches with, no API calls."""
+        ids = random.Random(0).sample(sorted(referenced), min(samples, len(referenced)))
+        probes = []
+        for store in self._stores_for(None):
+            stored = store.get(ids=ids, include=["embeddings"]) if ids else {}
+            embeddings = stored.get("embeddings")
+            probes.extend((store, list(v)) for v in (embeddings if embeddings is not None else []))
+        return probes
+
+    def _probe_latency_ms(self, probes) -> Optional[float]:
+        timings = []
+        for store, vector in probes:
+            started = time.perf_counter()
+            with self.rw_lock.read():
+                store.search_by_vector(vector, k=10)
+            timings.append((time.perf_counter() - started) * 1000)
+        return round(statistics.median(timings), 2) if timings else None
+
+    def compact(self, probe_samples: int = 20) -> Dict[str, Any]:
+        """
+        Garbage-collects and compacts the index, reconciling it with the filesystem:
+        1. purges files that no longer exist on disk,
+        2. deletes orphaned chunks no manifest record references (interrupted ingests,
+           duplicates from passes that predate deterministic IDs) from the vector store,
+           lexical index and dedup index,
+        3. compacts each vector backend (Chroma: HNSW rebuild; NumPy: matrix rewrite).
+        Holds the ingest lock (the indexer waits) but takes the write lock only in short
+        batches, so searches keep being served. Returns a report with reclaimed space and
+        median search latency before/after on a fixed probe sample.
+        """
+        started = time.time()
+        with self._ingest_lock:
+            bytes_before = directory_bytes(self.persistence_dir)
+            stores = self._stores_for(None)
+            chunks_before = sum(store.count() for store in stores)
+            probes = self._probe_vectors(self.manifest.all_chunk_ids(), probe_samples)
+            latency_before = self._probe_latency_ms(probes)
+            
+            # 1. Files deleted from disk while nothing was indexing
+            purged = 0
+            for path in self.manifest.paths():
+                if os.path.exists(path):
+                    continue
+                record = self.manifest.get(path)
+                entry = self.catalog.get(path)
+                if record:
+                    self._release_chunks(path, record["chunk_ids"], entry["root"] if entry else None)
+                self.manifest.remove(path)
+                self.catalog.remove(path)
+                purged += 1
+            
+            # 2. Orphans
+            referenced = self.manifest.all_chunk_ids()
+            orphans = 0
+            for store in stores:
+                stale = [cid for cid in store.all_ids() if cid not in referenced]
+                for start in range(0, len(stale), 500):
+                    with self.rw_lock.write():
+                        store.delete(stale[start:start + 500])
+                        self._bump_version()
+                orphans += len(stale)
+            lexical_orphans = [cid for cid in self.lexical_index.ids() if cid not in referenced]
+            for start in range(0, len(lexical_orphans), 500):
+                with self.rw_lock.write():
+                    self.lexical_index.delete(lexical_orphans[start:start + 500])
+                    self._bump_version()
+            dedup_orphans = [cid for cid in self.dedup.chunk_ids() if cid not in referenced]
+            self.dedup.remove(dedup_orphans)
+            
+            # 3. Physical compaction
+            backend_reports = [store.compact(guard=self.rw_lock.write) for store in stores]
+            with self.rw_lock.write():
+                self._bump_version()
+            
+            chunks_after = sum(store.count() for store in stores)
+            bytes_after = directory_bytes(self.persistence_dir)
+            latency_after = self._probe_latency_ms(probes)
+        
+        report = {
+            "files_purged": purged,
+            "orphan_chunks_removed": orphans,
+            "lexical_orphans_removed": len(lexical_orphans),
+            "dedup_orphans_removed": len(dedup_orphans),
+            "rows_reclaimed": sum(r.get("rows_reclaimed", 0) for r in backend_reports),
+            "chunks_before": chunks_before,
+            "chunks_after": chunks_after,
+            "bytes_before": bytes_before,
+            "bytes_after": bytes_after,
+            "bytes_reclaimed": bytes_before - bytes_after,
+            "query_latency_ms_before": latency_before,
+            "query_latency_ms_after": latency_after,
+            "duration_s": round(time.time() - started, 2),
+        }
+        print(f"🧹 RAG: Compaction done: {orphans} orphan chunks, {purged} missing files, "
+              f"{report['bytes_reclaimed'] / 1e6:.1f} MB reclaimed, latency {latency_before} -> {latency_after} ms.")
+        return report
+
+    async def acompact(self, probe_samples: int = 20) -> Dict[str, Any]:
+        """Async variant for FastAPI handlers: runs compaction off the event loop."""
+        return await asyncio.to_thread(self.compact, probe_samples)
+
+    def close(self):
+        """Releases the SQLite handles owned by this manager."""
+        with self._ingest_lock, self.rw_lock.write():
+            self.manifest.close()
+            self.catalog.close()
+            self.lexical_index.close()
+            self.dedup.close()
+            self.embedding_model.cache.close()
+            for store in [self.vector_store, *self._shards.values()]:
+                store.close()
+
+
+# --- PROCESS-WIDE REGISTRY ---
+# One shared manager per (persistence dir, collection): a single embedding client and a single
+# Chroma client per directory, instead of every node opening its own on the same files.
+_managers: Dict[tuple, VectorStoreManager] = {}
+_managers_lock = threading.Lock()
+
+def get_vector_store(persistence_dir: str = None) -> VectorStoreManager:
+    """
+    Returns the shared VectorStoreManager for `persistence_dir` (default: backend/data/chroma_db),
+    creating it lazily on first use. Safe to call from any thread.
+    """
+    if persistence_dir is None:
+        persistence_dir = data_path("chroma_db")
+    key = (os.path.abspath(persistence_dir), COLLECTION_NAME)
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            print(f"📚 RAG: Opening vector store at {persistence_dir}...")
+            manager = VectorStoreManager(persistence_dir=persistence_dir)
+            _managers[key] = manager
+        return manager
+
+def shutdown_vector_stores():
+    """Closes every registered manager (called from the FastAPI lifespan on shutdown)."""
+    with _managers_lock:
+        managers = list(_managers.values())
+        _managers.clear()
+    for manager in managers:
+        try:
+            manager.close()
+        except Exception as e:
+            print(f"⚠️ Failed to close vector store {manager.persistence_dir}: {e}")
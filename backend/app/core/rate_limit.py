@@ -0,0 +1,72 @@
+import time
+import threading
+from collections import deque
+
+
+class RateBudget:
+    """
+    Thread-safe sliding-window budget of requests and tokens per minute.
+    `acquire()` blocks until the call fits in the current 60s window.
+    A limit of 0 (or None) disables that dimension.
+    """
+    def __init__(self, requests_per_minute: int = 0, tokens_per_minute: int = 0, window: float = 60.0):
+        self.requests_per_minute = requests_per_minute or 0
+        self.tokens_per_minute = tokens_per_minute or 0
+        self.window = window
+        self._events = deque()  # (timestamp, tokens)
+        self._tokens_in_window = 0
+        self._cond = threading.Condition()
+
+    def _expire(self, now: float):
+        while self._events and now - self._events[0][0] >= self.window:
+            _, tokens = self._events.popleft()
+            self._tokens_in_window -= tokens
+
+    def _wait_time(self, now: float, tokens: int) -> float:
+        """Seconds until a call of `tokens` would fit, 0.0 if it fits now."""
+        wait = 0.0
+        if self.requests_per_minute and len(self._events) >= self.requests_per_minute:
+            oldest = self._events[len(self._events) - self.requests_per_minute][0]
+            wait = max(wait, oldest + self.window - now)
+        if self.tokens_per_minute and self._events and self._tokens_in_window + tokens > self.tokens_per_minute:
+            # Find how many of the oldest events must expire to make room
+            freed = 0
+            for ts, t in self._events:
+                freed += t
+                if self._tokens_in_window - freed + tokens <= self.tokens_per_minute:
+                    wait = max(wait, ts + self.window - now)
+                    break
+        return wait
+
+    def _try_record(self, tokens: int) -> float:
+        # A single call larger than the whole budget is let through on an empty window
+        if self.tokens_per_minute:
+            tokens = min(tokens, self.tokens_per_minute)
+        now = time.monotonic()
+        self._expire(now)
+        wait = self._wait_time(now, tokens)
+        if wait <= 0:
+            self._events.append((now, tokens))
+            self._tokens_in_window += tokens
+        return wait
+
+    def try_acquire(self, tokens: int = 0) -> float:
+        """
+        Non-blocking: records the call and returns 0.0 if it fits now, otherwise returns
+        the seconds to wait before trying again (nothing is recorded).
+        """
+        with self._cond:
+            return max(0.0, self._try_record(tokens))
+
+    def acquire(self, tokens: int = 0):
+        with self._cond:
+            while True:
+                wait = self._try_record(tokens)
+                if wait <= 0:
+                    return
+                self._cond.wait(timeout=wait)
+
+    def usage(self):
+        with self._cond:
+            self._expire(time.monotonic())
+            return {"requests": len(self._events), "tokens": self._tokens_in_window}
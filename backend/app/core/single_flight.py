@@ -0,0 +1,90 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces identical in-flight calls: while a call for `key` is running, later callers
+    with the same key wait for its result instead of issuing their own.
+    `do` (threads) and `ado` (event loop) return (result, shared) - shared is True for
+    callers that got another caller's result. `ajoin` joins without waiting and hands every
+    caller the same per-flight state (e.g. the tokens streamed so far).
+    """
+    def __init__(self):
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._tasks: Dict[Tuple[int, Hashable], Tuple[asyncio.Task, Any]] = {}  # -> (task, state)
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    async def ado(self, key: Hashable, coro_fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        task, _, shared = self.ajoin(key, lambda state: coro_fn())
+        # Shielded: a cancelled caller (e.g. an interrupted graph run) doesn't cancel the shared
+        # request, so a restarted run with the same prompt picks up its result
+        return await asyncio.shield(task), shared
+
+    def ajoin(self, key: Hashable, coro_fn: Callable[[Any], Awaitable[Any]],
+              state_fn: Optional[Callable[[], Any]] = None) -> Tuple[asyncio.Task, Any, bool]:
+        """
+        Starts coro_fn(state) as the flight for `key`, or joins the one in flight, without waiting:
+        returns (task, state, shared). `state_fn()` runs once, for the flight's first caller.
+        Await the task through asyncio.shield, like `ado`.
+        """
+        loop = asyncio.get_running_loop()
+        flight = (id(loop), key)
+        with self._lock:
+            entry = self._tasks.get(flight)
+            shared = entry is not None
+            if shared:
+                self.coalesced += 1
+            else:
+                state = state_fn() if state_fn is not None else None
+                task = loop.create_task(coro_fn(state))
+                entry = self._tasks[flight] = (task, state)
+                task.add_done_callback(lambda t: self._forget(flight, t))
+        return entry[0], entry[1], shared
+
+    def _forget(self, flight, task: asyncio.Task):
+        with self._lock:
+            entry = self._tasks.get(flight)
+            if entry is not None and entry[0] is task:
+                del self._tasks[flight]
+        if not task.cancelled():
+            task.exception()  # retrieved, so an error nobody awaited isn't logged as unhandled
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls) + len(self._tasks)
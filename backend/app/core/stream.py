@@ -0,0 +1,61 @@
+import queue
+import threading
+from typing import Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+_DONE = object()
+
+
+class _Failure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def prefetch(iterable: Iterable[T], maxsize: int = 4, name: str = "stage") -> Iterator[T]:
+    """
+    Runs `iterable` in a background thread and hands its items over through a bounded queue.
+    The producer runs ahead by at most `maxsize` items, so memory stays flat while two
+    pipeline stages overlap. Producer exceptions are re-raised in the consumer.
+    """
+    q = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        # Re-check `stop` periodically so an abandoned producer doesn't block forever
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        iterator = iter(iterable)
+        try:
+            for item in iterator:
+                if not put(item):
+                    break
+        except BaseException as e:
+            put(_Failure(e))
+            return
+        finally:
+            # Let the upstream generator clean up (e.g. shut down its process pool)
+            close = getattr(iterator, "close", None)
+            if close:
+                close()
+        put(_DONE)
+
+    thread = threading.Thread(target=produce, name=f"prefetch-{name}", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = q.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
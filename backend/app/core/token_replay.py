@@ -0,0 +1,127 @@
+import asyncio
+from typing import Any, AsyncIterator, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManager, BaseCallbackHandler, CallbackManager
+from langchain_core.messages import AIMessageChunk, convert_to_messages
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, LLMResult
+from langchain_core.runnables import ensure_config
+
+from app.core.token_stream import chunk_text
+
+
+class TokenTape:
+    """
+    Text chunks streamed by one model call, in order. Several callers can follow it while the
+    call is still running (async); written from the event loop thread, or by a single thread.
+    """
+    def __init__(self):
+        self.tokens: List[str] = []
+        self.closed = False
+        self._waiter: Optional[asyncio.Future] = None
+
+    def append(self, token: str):
+        self.tokens.append(token)
+        self._wake()
+
+    def close(self):
+        self.closed = True
+        self._wake()
+
+    def _wake(self):
+        waiter, self._waiter = self._waiter, None
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    async def follow(self) -> AsyncIterator[str]:
+        """Every chunk from the first one, then new ones as they arrive, until close()."""
+        i = 0
+        while True:
+            while i < len(self.tokens):
+                i += 1
+                yield self.tokens[i - 1]
+            if self.closed:
+                return
+            if self._waiter is None:
+                self._waiter = asyncio.get_running_loop().create_future()
+            # Shielded: a cancelled follower must not cancel the others' wait
+            await asyncio.shield(self._waiter)
+
+
+class TapeRecorder(BaseCallbackHandler):
+    """
+    Records a model call's streamed tokens on a TokenTape (inline, on the event loop).
+    The tap_output_* hooks make it a LangChain streaming handler, so chat models stream
+    (and report tokens) even when it is the only handler attached.
+    """
+    run_inline = True
+
+    def __init__(self, tape: TokenTape):
+        self.tape = tape
+
+    def on_llm_new_token(self, token: str, *, chunk: Any = None, **kwargs: Any):
+        text = chunk_text(getattr(chunk, "message", token))
+        if text:
+            self.tape.append(text)
+
+    def tap_output_aiter(self, run_id, output):
+        return output
+
+    def tap_output_iter(self, run_id, output):
+        return output
+
+
+def _start_run(manager, name: str, messages, config):
+    """on_chat_model_start for the caller's run (a coroutine for an AsyncCallbackManager)."""
+    if not isinstance(messages, list):
+        messages = [messages]
+    return manager.on_chat_model_start({"name": name}, [convert_to_messages(messages)], name=config.get("run_name") or name)
+
+
+def _token_chunk(text: str) -> ChatGenerationChunk:
+    return ChatGenerationChunk(message=AIMessageChunk(content=text))
+
+
+async def areplay(name: str, messages, config, tape: TokenTape, task: asyncio.Future):
+    """
+    Replays a shared model call to this caller's callbacks as its own chat-model run (start,
+    every token on `tape` as it arrives, end), so each astream_events run streams the answer.
+    Returns the call's result; `task` is awaited shielded, cancelling this caller only stops its replay.
+    """
+    config = ensure_config(config)
+    manager = AsyncCallbackManager.configure(
+        config.get("callbacks"), inheritable_tags=config.get("tags"), inheritable_metadata=config.get("metadata")
+    )
+    if not manager.handlers:
+        return await asyncio.shield(task)
+    run = (await _start_run(manager, name, messages, config))[0]
+    try:
+        replayed = False
+        async for token in tape.follow():
+            replayed = True
+            await run.on_llm_new_token(token, chunk=_token_chunk(token))
+        response = await asyncio.shield(task)
+        text = chunk_text(response)
+        if not replayed and text:
+            # The model didn't stream: the whole answer as one chunk
+            await run.on_llm_new_token(text, chunk=_token_chunk(text))
+    except BaseException as e:
+        await run.on_llm_error(e)
+        raise
+    await run.on_llm_end(LLMResult(generations=[[ChatGeneration(message=response)]]))
+    return response
+
+
+def replay(name: str, messages, config, tokens: List[str], response):
+    """Sync counterpart of areplay for a finished call: start, its recorded tokens, end."""
+    config = ensure_config(config)
+    manager = CallbackManager.configure(
+        config.get("callbacks"), inheritable_tags=config.get("tags"), inheritable_metadata=config.get("metadata")
+    )
+    if not manager.handlers:
+        return response
+    run = _start_run(manager, name, messages, config)[0]
+    text = chunk_text(response)
+    for token in tokens or ([text] if text else []):
+        run.on_llm_new_token(token, chunk=_token_chunk(token))
+    run.on_llm_end(LLMResult(generations=[[ChatGeneration(message=response)]]))
+    return response
@@ -0,0 +1,130 @@
+import os
+import time
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+# Metadata keys (set with app.utils.tagged_config) forwarded on every frame
+TAG_KEYS = ("chapter", "chapter_title", "slide")
+
+
+def chunk_text(chunk) -> str:
+    """Text of a streamed AIMessageChunk; Gemini may send a list of parts instead of a str."""
+    content = getattr(chunk, "content", chunk)
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        parts = []
+        for part in content:
+            if isinstance(part, str):
+                parts.append(part)
+            elif isinstance(part, dict) and part.get("type", "text") == "text":
+                parts.append(part.get("text", ""))
+        return "".join(parts)
+    return ""
+
+
+class TokenCoalescer:
+    """
+    Turns astream_events model-token events into WebSocket frames. Tokens are buffered per model
+    call (run_id) and sent every `interval_ms` (STREAM_FRAME_MS, default 50) instead of one
+    message per token:
+    {"type": "token_stream", "stream_id", "node", "chapter", "slide", "content", "done"}
+    start() runs a timer that flushes at the interval even when no further events arrive;
+    close() stops it and sends whatever is left (done=True).
+    """
+    def __init__(self, send: Callable[[Dict[str, Any]], Awaitable[None]], interval_ms: float = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.send = send
+        if interval_ms is None:
+            interval_ms = float(os.getenv("STREAM_FRAME_MS", "50"))
+        self.interval = interval_ms / 1000
+        self.clock = clock
+        self.frames = 0
+        self._streams: Dict[str, Dict[str, Any]] = {}  # run_id -> {"tags", "parts"}
+        self._last_flush = clock()
+        # Frames leave in order even when the timer and an event flush at the same time
+        self._send_lock = asyncio.Lock()
+        self._timer: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._timer is None:
+            self._timer = asyncio.get_running_loop().create_task(self._tick())
+
+    async def _tick(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            if self.pending():
+                try:
+                    await self.flush()
+                except Exception as e:
+                    # Client gone: the graph run notices on its own, the timer just stops
+                    print(f"⚠️ Token stream: Flush failed ({e})")
+                    return
+
+    async def close(self):
+        """Stops the timer and closes every open stream. Never raises (e.g. client already gone)."""
+        if self._timer is not None:
+            self._timer.cancel()
+            try:
+                await self._timer
+            except BaseException:
+                pass
+            self._timer = None
+        try:
+            await self.flush(done=True)
+        except Exception as e:
+            print(f"⚠️ Token stream: Final flush failed ({e})")
+
+    async def handle(self, event: Dict[str, Any]) -> bool:
+        """Feeds one astream_events event; True if it was a model-token event."""
+        kind = event.get("event")
+        if kind == "on_chat_model_stream":
+            text = chunk_text((event.get("data") or {}).get("chunk"))
+            if text:
+                stream = self._stream(event)
+                stream["parts"].append(text)
+            if self.clock() - self._last_flush >= self.interval:
+                await self.flush()
+            return True
+        if kind == "on_chat_model_end":
+            run_id = str(event.get("run_id"))
+            if run_id in self._streams:
+                async with self._send_lock:
+                    await self._send(run_id, done=True)
+            return True
+        return False
+
+    def _stream(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        run_id = str(event.get("run_id"))
+        stream = self._streams.get(run_id)
+        if stream is None:
+            metadata = event.get("metadata") or {}
+            tags = {"node": metadata.get("langgraph_node") or event.get("name")}
+            tags.update({key: metadata.get(key) for key in TAG_KEYS})
+            stream = self._streams[run_id] = {"tags": tags, "parts": []}
+        return stream
+
+    async def _send(self, run_id: str, done: bool = False):
+        # Caller holds _send_lock; the stream may have been closed while it waited for it
+        stream = self._streams.get(run_id)
+        if stream is None:
+            return
+        content = "".join(stream["parts"])
+        stream["parts"] = []
+        if done:
+            del self._streams[run_id]
+        elif not content:
+            return
+        self.frames += 1
+        await self.send({"type": "token_stream", "stream_id": run_id, **stream["tags"], "content": content, "done": done})
+
+    async def flush(self, done: bool = False):
+        """Sends the buffered text of every open stream (and closes them when done=True)."""
+        async with self._send_lock:
+            self._last_flush = self.clock()
+            for run_id in list(self._streams):
+                await self._send(run_id, done=done)
+
+    def pending(self) -> int:
+        """Number of buffered, not yet sent chunks."""
+        return sum(len(s["parts"]) for s in self._streams.values())
@@ -0,0 +1,457 @@
+import abc
+import os
+import json
+import time
+import sqlite3
+import threading
+from contextlib import nullcontext
+from typing import List, Dict, Any, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from app.core.lexical_index import where_to_sql
+
+
+class VectorBackend(abc.ABC):
+    """
+    What VectorStoreManager needs from a vector collection. Distances are "lower is better".
+    """
+    @abc.abstractmethod
+    def add_documents(self, documents: List[Document], ids: List[str]):
+        """Embeds and upserts documents under `ids`."""
+
+    @abc.abstractmethod
+    def delete(self, ids: List[str]):
+        """Removes the chunks stored under `ids`."""
+
+    @abc.abstractmethod
+    def get(self, ids: List[str], include: List[str] = None) -> Dict[str, Any]:
+        """Chroma-style dict with "ids" plus the requested "documents"/"metadatas"/"embeddings"."""
+
+    @abc.abstractmethod
+    def search_by_vector(self, embedding: List[float], k: int = 5,
+                         where: Dict[str, Any] = None) -> List[Tuple[Document, float]]:
+        """Top `k` (document, distance) pairs matching the metadata filter `where`."""
+
+    @abc.abstractmethod
+    def count(self) -> int:
+        """Number of live chunks."""
+
+    @abc.abstractmethod
+    def all_ids(self) -> List[str]:
+        """Ids of every live chunk."""
+
+    def compact(self, guard=None) -> Dict[str, Any]:
+        """
+        Reclaims space left by deleted chunks. `guard` is a context-manager factory held while
+        the compacted data replaces the old one (the manager's write lock).
+        """
+        return {"rows_reclaimed": 0}
+
+    def close(self):
+        pass
+
+
+class ChromaBackend(VectorBackend):
+    """
+    LangChain Chroma collection (HNSW index, persisted by Chroma itself).
+    compact() rebuilds the collection under a new name; collections.json records which
+    physical collection currently backs each logical name.
+    """
+    def __init__(self, persistence_dir: str, collection_name: str, embedding_function: Embeddings):
+        self.persistence_dir = persistence_dir
+        self.collection_name = collection_name
+        self.embedding_function = embedding_function
+        self._pointer_path = os.path.join(persistence_dir, "collections.json")
+        self.store = self._open(self._pointers().get(collection_name, collection_name))
+
+    def _pointers(self) -> Dict[str, str]:
+        if not os.path.exists(self._pointer_path):
+            return {}
+        with open(self._pointer_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _open(self, physical_name: str):
+        from langchain_chroma import Chroma
+        return Chroma(
+            persist_directory=self.persistence_dir,
+            embedding_function=self.embedding_function,
+            collection_name=physical_name
+        )
+
+    def add_documents(self, documents: List[Document], ids: List[str]):
+        self.store.add_documents(documents, ids=ids)
+
+    def delete(self, ids: List[str]):
+        self.store.delete(ids=ids)
+
+    def get(self, ids: List[str], include: List[str] = None) -> Dict[str, Any]:
+        if include is None:
+            return self.store.get(ids=ids)
+        return self.store.get(ids=ids, include=include)
+
+    def search_by_vector(self, embedding: List[float], k: int = 5,
+                         where: Dict[str, Any] = None) -> List[Tuple[Document, float]]:
+        return self.store.similarity_search_by_vector_with_relevance_scores(embedding, k=k, filter=where)
+
+    def count(self) -> int:
+        return self.store._collection.count()
+
+    def all_ids(self) -> List[str]:
+        return self.store.get(include=[])["ids"]
+
+    def compact(self, guard=None) -> Dict[str, Any]:
+        """
+        Rebuilds the HNSW index: copies every live entry (stored vectors, no re-embedding) into a
+        fresh collection while reads keep using the old one, then swaps and drops the old one.
+        Writers must be held off by the caller for the duration.
+        """
+        old = self.store
+        old_name = old._collection.name
+        new_name = f"{self.collection_name}__{int(time.time())}"
+        new = self._open(new_name)
+        total = old._collection.count()
+        for offset in range(0, total, 1000):
+            batch = old.get(limit=1000, offset=offset, include=["embeddings", "documents", "metadatas"])
+            if batch["ids"]:
+                new._collection.add(ids=batch["ids"], embeddings=batch["embeddings"],
+                                    documents=batch["documents"], metadatas=batch["metadatas"])
+        
+        with (guard() if guard else nullcontext()):
+            self.store = new
+            pointers = self._pointers()
+            pointers[self.collection_name] = new_name
+            tmp_path = self._pointer_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(pointers, f)
+            os.replace(tmp_path, self._pointer_path)
+            old.delete_collection()
+        print(f"🧹 Chroma: Rebuilt {self.collection_name} ({total} entries) as {new_name}, dropped {old_name}.")
+        return {"rows_reclaimed": 0, "rebuilt_entries": total}
+
+
+class NumpyBackend(VectorBackend):
+    """
+    In-process exact search: embeddings live in a memory-mapped `.npy` matrix (float32, or
+    int8 with a per-row scale) next to a SQLite table of chunk IDs, texts and metadata.
+    Opening is instant (mmap, nothing is deserialized), and a query is one matrix product per
+    block of rows, so brute-force top-k stays practical up to ~1M chunks.
+    Deleted/replaced rows are tombstoned and reclaimed by compact().
+    - RAG_VECTOR_DTYPE: "float32" (default) or "int8" (4x smaller, ~1% score error)
+    - RAG_NUMPY_BLOCK_ROWS: rows scored per matrix product (bounds temporary memory, default 16384)
+    """
+    def __init__(self, directory: str, embedding_function: Embeddings, dtype: str = None, block_rows: int = None):
+        self.embedding_function = embedding_function
+        self.dtype = dtype or os.getenv("RAG_VECTOR_DTYPE", "float32")
+        if self.dtype not in ("float32", "int8"):
+            raise ValueError(f"Unsupported RAG_VECTOR_DTYPE: {self.dtype}")
+        self.block_rows = block_rows or int(os.getenv("RAG_NUMPY_BLOCK_ROWS", "16384"))
+        self.directory = os.path.join(directory, self.dtype)
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(os.path.join(self.directory, "rows.sqlite"), check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS rows (
+                row INTEGER PRIMARY KEY,
+                chunk_id TEXT NOT NULL,
+                content TEXT NOT NULL,
+                metadata TEXT NOT NULL,
+                alive INTEGER NOT NULL DEFAULT 1
+            );
+            CREATE INDEX IF NOT EXISTS idx_rows_chunk ON rows (chunk_id, alive);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            """
+        )
+        self._conn.commit()
+        self._vectors = None
+        self._scales = None
+        self._load()
+
+    # --- storage ---
+
+    def _paths(self, generation: int):
+        return (os.path.join(self.directory, f"vectors.{generation}.npy"),
+                os.path.join(self.directory, f"scales.{generation}.npy"))
+
+    def _load(self):
+        """Maps the matrix (read/write, no copy) and rebuilds the in-memory liveness mask."""
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()
+        # The generation is flipped in SQLite only after compact() has written the new files
+        self._generation = int(row[0]) if row else 0
+        self._vectors_path, self._scales_path = self._paths(self._generation)
+        self._vectors = self._scales = None
+        if os.path.exists(self._vectors_path):
+            self._vectors = np.load(self._vectors_path, mmap_mode="r+")
+            if self.dtype == "int8":
+                self._scales = np.load(self._scales_path, mmap_mode="r+")
+        self._size = self._conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM rows").fetchone()[0]
+        self._alive = np.zeros(self._capacity(), dtype=bool)
+        alive_rows = [r[0] for r in self._conn.execute("SELECT row FROM rows WHERE alive = 1")]
+        self._alive[alive_rows] = True
+
+    def _capacity(self) -> int:
+        return 0 if self._vectors is None else self._vectors.shape[0]
+
+    def _reserve(self, rows: int, dim: int):
+        """Grows the memory-mapped files (doubling) so `rows` more rows fit."""
+        needed = self._size + rows
+        if self._vectors is not None and needed <= self._capacity():
+            return
+        if self._vectors is not None and self._vectors.shape[1] != dim:
+            raise ValueError(f"Embedding dimension changed ({self._vectors.shape[1]} -> {dim}); rebuild the index.")
+        capacity = max(1024, needed, self._capacity() * 2)
+        vectors = self._grow(self._vectors_path, self._vectors, (capacity, dim), np.int8 if self.dtype == "int8" else np.float32)
+        if self.dtype == "int8":
+            self._scales = self._grow(self._scales_path, self._scales, (capacity,), np.float32)
+        self._vectors = vectors
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:len(self._alive)] = self._alive
+        self._alive = alive
+
+    def _grow(self, path: str, current, shape, dtype):
+        tmp_path = path + ".tmp"
+        grown = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=dtype, shape=shape)
+        if current is not None:
+            grown[:current.shape[0]] = current
+        grown.flush()
+        del grown
+        if current is not None:
+            current.flush()
+        os.replace(tmp_path, path)
+        return np.load(path, mmap_mode="r+")
+
+    def _encode(self, vectors: np.ndarray):
+        """Normalizes rows (cosine distance) and quantizes them if configured."""
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        vectors = (vectors / norms).astype(np.float32)
+        if self.dtype == "float32":
+            return vectors, None
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+
+    def _rows_for(self, ids: List[str]) -> Dict[str, int]:
+        found = {}
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            found.update(self._conn.execute(
+                f"SELECT chunk_id, row FROM rows WHERE alive = 1 AND chunk_id IN ({placeholders})", batch
+            ).fetchall())
+        return found
+
+    def _tombstone(self, ids: List[str]):
+        rows = list(self._rows_for(ids).values())
+        if rows:
+            self._conn.executemany("UPDATE rows SET alive = 0 WHERE row = ?", [(r,) for r in rows])
+            self._alive[rows] = False
+
+    # --- VectorBackend ---
+
+    def add_documents(self, documents: List[Document], ids: List[str]):
+        if not documents:
+            return
+        # Goes through the (cached) embedding function, like Chroma does
+        raw = np.asarray(self.embedding_function.embed_documents([d.page_content for d in documents]), dtype=np.float32)
+        encoded, scales = self._encode(raw)
+        with self._lock:
+            self._tombstone(ids)
+            self._reserve(len(documents), raw.shape[1])
+            start = self._size
+            self._vectors[start:start + len(documents)] = encoded
+            if scales is not None:
+                self._scales[start:start + len(documents)] = scales
+            self._vectors.flush()
+            if scales is not None:
+                self._scales.flush()
+            self._conn.executemany(
+                "INSERT INTO rows (row, chunk_id, content, metadata, alive) VALUES (?, ?, ?, ?, 1)",
+                [(start + i, cid, d.page_content, json.dumps(d.metadata or {})) for i, (cid, d) in enumerate(zip(ids, documents))]
+            )
+            self._conn.commit()
+            self._alive[start:start + len(documents)] = True
+            self._size = start + len(documents)
+
+    def delete(self, ids: List[str]):
+        with self._lock:
+            self._tombstone(ids)
+            self._conn.commit()
+
+    def _row_vectors(self, rows: List[int]) -> np.ndarray:
+        vectors = np.asarray(self._vectors[rows], dtype=np.float32)
+        if self.dtype == "int8":
+            vectors *= np.asarray(self._scales[rows])[:, None]
+        return vectors
+
+    def get(self, ids: List[str], include: List[str] = None) -> Dict[str, Any]:
+        include = include or ["documents", "metadatas"]
+        with self._lock:
+            found = self._rows_for(ids)
+            ordered = [cid for cid in ids if cid in found]
+            result: Dict[str, Any] = {"ids": ordered}
+            if "documents" in include or "metadatas" in include:
+                rows = {cid: self._conn.execute("SELECT content, metadata FROM rows WHERE row = ?", (found[cid],)).fetchone()
+                        for cid in ordered}
+                if "documents" in include:
+                    result["documents"] = [rows[cid][0] for cid in ordered]
+                if "metadatas" in include:
+                    result["metadatas"] = [json.loads(rows[cid][1]) for cid in ordered]
+            if "embeddings" in include:
+                result["embeddings"] = [v.tolist() for v in self._row_vectors([found[cid] for cid in ordered])] if ordered else []
+        return result
+
+    def search_by_vector(self, embedding: List[float], k: int = 5,
+                         where: Dict[str, Any] = None) -> List[Tuple[Document, float]]:
+        query = np.asarray(embedding, dtype=np.float32)
+        query /= (np.linalg.norm(query) or 1.0)
+        while True:
+            # Snapshot under the lock, score without it so concurrent searches don't serialize
+            with self._lock:
+                if self._vectors is None or self._size == 0:
+                    return []
+                generation, vectors, scales, size = self._generation, self._vectors, self._scales, self._size
+                mask = self._alive[:size].copy()
+                if where:
+                    clause, params = where_to_sql(where)
+                    allowed = np.zeros(size, dtype=bool)
+                    allowed[[r[0] for r in self._conn.execute(
+                        f"SELECT row FROM rows WHERE alive = 1 AND row < ? AND {clause}", (size, *params)
+                    )]] = True
+                    mask &= allowed
+
+            best_rows, best_scores = [], []
+            for start in range(0, size, self.block_rows):
+                end = min(size, start + self.block_rows)
+                block_mask = mask[start:end]
+                if not block_mask.any():
+                    continue
+                scores = vectors[start:end] @ query
+                if scales is not None:
+                    scores = scores * scales[start:end]
+                scores = np.where(block_mask, scores, -np.inf)
+                top = min(k, int(block_mask.sum()))
+                idx = np.argpartition(-scores, top - 1)[:top]
+                best_rows.extend((idx + start).tolist())
+                best_scores.extend(scores[idx].tolist())
+
+            order = np.argsort(-np.asarray(best_scores))[:k]
+            with self._lock:
+                if generation != self._generation:
+                    continue  # Rows were renumbered by compact() meanwhile
+                hits = []
+                for i in order:
+                    content, metadata = self._conn.execute(
+                        "SELECT content, metadata FROM rows WHERE row = ?", (best_rows[i],)
+                    ).fetchone()
+                    hits.append((Document(page_content=content, metadata=json.loads(metadata)), 1.0 - float(best_scores[i])))
+            return hits
+
+    def all_ids(self) -> List[str]:
+        with self._lock:
+            return [r[0] for r in self._conn.execute("SELECT chunk_id FROM rows WHERE alive = 1")]
+
+    def compact(self, guard=None) -> Dict[str, int]:
+        """
+        Rewrites the matrix without tombstoned rows. The live rows of a snapshot are copied into
+        the next generation's files without holding the lock; the lock is taken again only to copy
+        rows appended meanwhile and flip the generation in one SQLite commit. Old files are removed
+        after. In-flight searches notice the generation change and retry, so no guard is needed.
+        Returns {"rows_reclaimed", "bytes_before", "bytes_after"}.
+        """
+        with self._lock:
+            bytes_before = self.disk_bytes()
+            dead = self._size - self.count()
+            if self._vectors is None or dead == 0:
+                return {"rows_reclaimed": 0, "bytes_before": bytes_before, "bytes_after": bytes_before}
+            old_paths = (self._vectors_path, self._scales_path)
+            live_rows = [r[0] for r in self._conn.execute("SELECT row FROM rows WHERE alive = 1 ORDER BY row")]
+            snapshot_size, old_vectors, old_scales = self._size, self._vectors, self._scales
+            generation = self._generation + 1
+        
+        # Rows below snapshot_size are never rewritten (adds append, deletes only tombstone),
+        # so they can be copied without the lock
+        vectors_path, scales_path = self._paths(generation)
+        capacity = max(1024, 2 * len(live_rows))
+        vectors = np.lib.format.open_memmap(vectors_path, mode="w+", dtype=old_vectors.dtype,
+                                            shape=(capacity, old_vectors.shape[1]))
+        for start in range(0, len(live_rows), self.block_rows):
+            block = live_rows[start:start + self.block_rows]
+            vectors[start:start + len(block)] = old_vectors[block]
+        vectors.flush()
+        scales = None
+        if old_scales is not None:
+            scales = np.lib.format.open_memmap(scales_path, mode="w+", dtype=np.float32, shape=(capacity,))
+            scales[:len(live_rows)] = old_scales[live_rows]
+            scales.flush()
+        
+        with self._lock:
+            # Rows added while copying go right after the compacted ones
+            appended = list(range(snapshot_size, self._size))
+            needed = len(live_rows) + len(appended)
+            if needed > capacity:
+                vectors.flush()
+                vectors = self._grow(vectors_path, vectors, (needed, vectors.shape[1]), vectors.dtype)
+                if scales is not None:
+                    scales = self._grow(scales_path, scales, (needed,), np.float32)
+            if appended:
+                vectors[len(live_rows):needed] = self._vectors[snapshot_size:self._size]
+                if scales is not None:
+                    scales[len(live_rows):needed] = self._scales[snapshot_size:self._size]
+            vectors.flush()
+            if scales is not None:
+                scales.flush()
+            del vectors, scales
+            
+            mapping = [(new, -old - 1) for new, old in enumerate(live_rows + appended)]
+            with self._conn:
+                # Rows deleted while copying are dropped here too (their copied slot stays dead)
+                self._conn.execute("DELETE FROM rows WHERE alive = 0")
+                # Two passes so the new row numbers never collide with rows not yet moved
+                self._conn.execute("UPDATE rows SET row = -row - 1")
+                self._conn.executemany("UPDATE rows SET row = ? WHERE row = ?", mapping)
+                self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('generation', ?)", (str(generation),))
+            self._load()
+        
+        for path in old_paths:
+            if os.path.exists(path):
+                os.remove(path)
+        # VACUUM on its own connection, so searches don't wait on the lock meanwhile
+        try:
+            vacuum_conn = sqlite3.connect(os.path.join(self.directory, "rows.sqlite"), timeout=30)
+            vacuum_conn.execute("VACUUM")
+            vacuum_conn.close()
+        except sqlite3.Error as e:
+            print(f"⚠️ NumPy backend: VACUUM failed ({e}), space will be reclaimed next time.")
+        return {"rows_reclaimed": dead, "bytes_before": bytes_before, "bytes_after": self.disk_bytes()}
+
+    def disk_bytes(self) -> int:
+        return sum(
+            os.path.getsize(os.path.join(self.directory, name))
+            for name in os.listdir(self.directory)
+            if os.path.isfile(os.path.join(self.directory, name))
+        )
+
+    def count(self) -> int:
+        with self._lock:
+            return int(self._alive[:self._size].sum())
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+            self._vectors = None
+            self._scales = None
+
+
+def make_backend(kind: str, persistence_dir: str, collection_name: str, embedding_function: Embeddings) -> VectorBackend:
+    """
+    Builds the configured vector backend (RAG_VECTOR_BACKEND: "chroma" (default) or "numpy").
+    """
+    if kind == "chroma":
+        return ChromaBackend(persistence_dir, collection_name, embedding_function)
+    if kind == "numpy":
+        return NumpyBackend(os.path.join(persistence_dir, "numpy", collection_name), embedding_function)
+    raise ValueError(f"Unknown RAG_VECTOR_BACKEND: {kind}")
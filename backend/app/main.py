@@ -25,11 +25,25 @@ async def lifespan(app: FastAPI):
     app.state.graph = compiled_graph
     app.state.db_conn = db_conn
     
+    # Background RAG indexer: keeps LOCAL_RESEARCH_DIR indexed off the request path
+    from app.core.indexer import indexer
+    from app.api.endpoints import forward_ingest_progress
+    import asyncio
+    indexer.add_listener(forward_ingest_progress(asyncio.get_running_loop()))
+    indexer.start()
+    
     yield
     
     # Shutdown
     print("INFO: Closing Persistence Connection...")
     await db_conn.close()
+    
+    print("INFO: Stopping Background Indexer...")
+    indexer.stop()
+    
+    print("INFO: Closing Vector Stores...")
+    from app.core.rag import shutdown_vector_stores
+    shutdown_vector_stores()
 
 app = FastAPI(title="Infinite Research Agent Core", version="2026.1.0", lifespan=lifespan)
 
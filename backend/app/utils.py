@@ -1,4 +1,5 @@
 import os
+import time
 import datetime
 
 def save_artifact(name: str, content: str, extension: str = "md", thread_id: str = None):
@@ -45,6 +46,19 @@ def save_artifact(name: str, content: str, extension: str = "md", thread_id: str
 # --- ROBUST LLM WRAPPER (POLYGLOT) ---
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_openai import ChatOpenAI
+from app.core.circuit_breaker import get_breaker
+from app.core.llm_cache import get_llm_cache, cache_key
+from app.core.metering import record_call
+from app.core.provider_limits import get_limiter, provider_of
+from app.core.single_flight import SingleFlight
+from app.core.token_replay import TapeRecorder, TokenTape, areplay, replay
+from app.core.embedding_pipeline import estimate_tokens
+
+def prompt_tokens(messages) -> int:
+    """Rough prompt size (~4 chars/token) for the providers' tokens-per-minute budgets."""
+    if not isinstance(messages, list):
+        messages = [messages]
+    return sum(estimate_tokens(str(getattr(m, "content", m))) for m in messages)
 
 class RobustGemini:
     """
@@ -53,6 +67,8 @@ class RobustGemini:
     1. Gemini Pro (Primary)
     2. OpenAI GPT-5.2 (Secondary - High Quality Fallback)
     3. Gemini Flash (Tertiary - Ultimate Fallback)
+    Models whose circuit is open (see app/core/circuit_breaker.py) are skipped up front, and
+    every call waits for a slot in its provider's shared limiter (app/core/provider_limits.py).
     """
     def __init__(self, pro_model_name="gemini-3-pro-preview", flash_model_name="gemini-3-flash-preview", temperature=0.0):
         self.pro_model_name = pro_model_name
@@ -91,33 +107,85 @@ class RobustGemini:
             google_api_key=self.google_api_key
         )
 
-    def invoke(self, messages):
-        try:
-            # 1. Try Gemini Pro
-            return self.llm_pro.invoke(messages)
-            
-        except Exception as e:
-            error_str = str(e)
-            
-            # Handle Quota / Not Found Errors
-            if "429" in error_str or "ResourceExhausted" in error_str or "404" in error_str:
-                print(f"⚠️ Primary Model Error ({self.pro_model_name}): {error_str.split('}')[0]}...")
-                
-                # 2. Try OpenAI Fallback
-                if self.llm_openai:
-                    print(f"🔄 Switching to Secondary Model: OpenAI GPT-5.2...")
-                    try:
-                        return self.llm_openai.invoke(messages)
-                    except Exception as openai_e:
-                        print(f"⚠️ OpenAI Fallback Failed: {openai_e}. Moving to Flash.")
-                
-                # 3. Try Flash Fallback
-                print(f"⚡ Switching to Tertiary Model: {self.flash_model_name}...")
-                return self.llm_flash.invoke(messages)
-                
-            else:
-                # Other errors (e.g., Validation), re-raise
-                raise e
+        # Fallback chain: (model name, client, any error falls through to the next model).
+        # Health is tracked per model by process-wide circuit breakers shared by every instance,
+        # so once a model is known to be down it is skipped without a failed round-trip.
+        self.chain = [(pro_model_name, self.llm_pro, False)]
+        if self.llm_openai:
+            self.chain.append(("gpt-5.2", self.llm_openai, True))
+        self.chain.append((flash_model_name, self.llm_flash, False))
+
+    def _route(self):
+        """Models to try, in order. Open circuits are skipped; the last model is always the last resort."""
+        last = len(self.chain) - 1
+        for i, (name, llm, tolerant) in enumerate(self.chain):
+            breaker = get_breaker(name)
+            if breaker.allow() or i == last:
+                yield name, llm, tolerant, breaker
+
+    def _handle_error(self, name, breaker, tolerant, error, latency) -> bool:
+        """Records a failed call. Returns True if the next model should be tried."""
+        error_str = str(error)
+        # Quota (429) and Model Not Found (404) open the circuit and move down the chain
+        if "429" in error_str or "ResourceExhausted" in error_str or "404" in error_str:
+            print(f"⚠️ Model Error ({name}): {error_str.split('}')[0]}...")
+            breaker.record_failure(latency, trip=True)
+            return True
+        breaker.record_failure(latency, trip=False)
+        if tolerant:
+            print(f"⚠️ {name} Fallback Failed: {error}. Moving on.")
+        # Other errors (e.g., Validation) are re-raised
+        return tolerant
+
+    def invoke(self, messages, config=None):
+        error, failures = None, 0
+        tokens = prompt_tokens(messages)
+        for name, llm, tolerant, breaker in self._route():
+            if error is not None:
+                print(f"🔄 Switching to Fallback Model: {name}...")
+            started = time.monotonic()
+            try:
+                # Shared per-provider limiter: queue for a slot instead of bursting into 429s
+                with get_limiter(provider_of(llm)).limit(tokens):
+                    started = time.monotonic()
+                    response = llm.invoke(messages, config=config)
+            except Exception as e:
+                if not self._handle_error(name, breaker, tolerant, e, time.monotonic() - started):
+                    raise
+                error, failures = e, failures + 1
+                continue
+            breaker.record_success(time.monotonic() - started)
+            response.response_metadata["served_by"] = name
+            response.response_metadata["fallback_attempts"] = failures
+            return response
+        raise error
+
+    async def ainvoke(self, messages, config=None):
+        """
+        Async variant with the same fallback chain. Uses the clients' native async calls,
+        so no worker thread is held while waiting on the provider.
+        """
+        error, failures = None, 0
+        tokens = prompt_tokens(messages)
+        for name, llm, tolerant, breaker in self._route():
+            if error is not None:
+                print(f"🔄 Switching to Fallback Model: {name}...")
+            started = time.monotonic()
+            try:
+                # Shared per-provider limiter: queue for a slot instead of bursting into 429s
+                async with get_limiter(provider_of(llm)).alimit(tokens):
+                    started = time.monotonic()
+                    response = await llm.ainvoke(messages, config=config)
+            except Exception as e:
+                if not self._handle_error(name, breaker, tolerant, e, time.monotonic() - started):
+                    raise
+                error, failures = e, failures + 1
+                continue
+            breaker.record_success(time.monotonic() - started)
+            response.response_metadata["served_by"] = name
+            response.response_metadata["fallback_attempts"] = failures
+            return response
+        raise error
 
 class DeepResearcher:
     """
@@ -131,8 +199,165 @@ class DeepResearcher:
             google_api_key=os.getenv("GOOGLE_API_KEY")
         )
 
-    def invoke(self, messages):
+    def invoke(self, messages, config=None):
         print("🔍 🧬 ACTIVATING DEEP RESEARCH MODEL (Investigative Mode)...")
         # Note: This model may support specific tools/search in the future if enabled via API.
-        return self.llm.invoke(messages)
+        with get_limiter(provider_of(self.llm)).limit(prompt_tokens(messages)):
+            return self.llm.invoke(messages, config=config)
+
+    async def ainvoke(self, messages, config=None):
+        print("🔍 🧬 ACTIVATING DEEP RESEARCH MODEL (Investigative Mode)...")
+        async with get_limiter(provider_of(self.llm)).alimit(prompt_tokens(messages)):
+            return await self.llm.ainvoke(messages, config=config)
 
+def tagged_config(config, **metadata):
+    """
+    The node's RunnableConfig plus extra metadata (e.g. chapter=2, slide=3). Passed to a model
+    call, the tags show up on its streamed tokens (on_chat_model_stream -> WebSocket).
+    """
+    config = config or {}
+    return {**config, "metadata": {**(config.get("metadata") or {}), **metadata}}
+
+# --- RESPONSE CACHE (OPT-IN) + SINGLE-FLIGHT + METERING ---
+# Identical in-flight requests across all wrapped models, sessions and graph runs
+llm_flights = SingleFlight()
+
+class CachedLLM:
+    """
+    Wraps any chat model (RobustGemini, DeepResearcher, ChatGoogleGenerativeAI, ChatOllama) with the
+    persistent response cache (app/core/llm_cache.py), keyed by (model, temperature, messages).
+    - LLM_CACHE=true enables it (off by default).
+    - LLM_CACHE_MAX_TEMPERATURE: only calls at or below this temperature are cached (default 0.0,
+      i.e. deterministic calls only).
+    - invoke(..., use_cache=False) bypasses it (and request coalescing) for a single call.
+    - invoke(..., config=tagged_config(config, chapter=2)) tags the call's streamed tokens.
+    Responses served by a fallback model are not cached under the primary model's key.
+    Identical deterministic (temperature 0) requests already in flight are coalesced (single-flight):
+    the provider is called once, without any caller's callbacks, and its streamed tokens are
+    recorded; every caller replays them to its own callbacks (app/core/token_replay.py), so each
+    astream_events run still streams the answer, and a cancelled run doesn't stop the others.
+    Every call is metered (app/core/metering.py); coalesced calls and cache hits count as cache hits.
+    """
+    def __init__(self, llm, model: str = None, temperature: float = None):
+        self.llm = llm
+        inner = getattr(llm, "llm", None)
+        self.model = model or getattr(llm, "pro_model_name", None) or getattr(llm, "model", None) or getattr(inner, "model", "unknown")
+        if temperature is None:
+            temperature = getattr(llm, "temperature", None)
+            if temperature is None:
+                temperature = getattr(inner, "temperature", None)
+        self.temperature = temperature if temperature is not None else 0.0
+        self.cacheable = self.temperature <= float(os.getenv("LLM_CACHE_MAX_TEMPERATURE", "0.0"))
+        # RobustGemini / DeepResearcher take provider slots per underlying call themselves
+        self.limits_itself = isinstance(llm, (RobustGemini, DeepResearcher))
+        self.run_name = type(inner or llm).__name__
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+    def _coalescable(self, use_cache: bool, kwargs) -> bool:
+        """
+        Single-flight only for deterministic calls (sampled calls are meant to differ) whose only
+        option is the caller's config, which is applied by the replay instead of the shared call.
+        """
+        return use_cache and self.temperature <= 0 and not set(kwargs) - {"config"}
+
+    def _lookup(self, messages, use_cache: bool):
+        """(cache, key, cached response) - cache is None when caching doesn't apply to this call."""
+        key = cache_key(self.model, self.temperature, messages)
+        cache = get_llm_cache() if use_cache and self.cacheable else None
+        if cache is None:
+            return None, key, None
+        response = cache.get(key)
+        if response is not None:
+            print(f"♻️ LLM Cache HIT ({self.model})")
+        return cache, key, response
+
+    def _record(self, started: float, response=None, cache_hit: bool = False):
+        """Meters one call: the model that actually answered, its token usage, latency and fallbacks."""
+        metadata = getattr(response, "response_metadata", None) or {}
+        usage = getattr(response, "usage_metadata", None) or {}
+        record_call(
+            "chat",
+            metadata.get("served_by") or metadata.get("model_name") or self.model,
+            time.monotonic() - started,
+            input_tokens=usage.get("input_tokens", 0),
+            output_tokens=usage.get("output_tokens", 0),
+            cache_hit=cache_hit,
+            retries=0 if cache_hit else metadata.get("fallback_attempts", 0),
+            error=response is None
+        )
+
+    def _store(self, cache, key, response):
+        served_by = getattr(response, "response_metadata", {}).get("served_by", self.model)
+        if cache is not None and served_by == self.model:
+            cache.put(key, self.model, response)
+
+    def _call(self, messages, cache, key, **kwargs):
+        if self.limits_itself:
+            response = self.llm.invoke(messages, **kwargs)
+        else:
+            with get_limiter(provider_of(self.llm)).limit(prompt_tokens(messages)):
+                response = self.llm.invoke(messages, **kwargs)
+        self._store(cache, key, response)
+        return response
+
+    async def _acall(self, messages, cache, key, **kwargs):
+        if self.limits_itself:
+            response = await self.llm.ainvoke(messages, **kwargs)
+        else:
+            async with get_limiter(provider_of(self.llm)).alimit(prompt_tokens(messages)):
+                response = await self.llm.ainvoke(messages, **kwargs)
+        self._store(cache, key, response)
+        return response
+
+    def _recorded_call(self, messages, cache, key):
+        tape = TokenTape()
+        # Only the recorder: callers' own callbacks get the tokens through replay()
+        response = self._call(messages, cache, key, config={"callbacks": [TapeRecorder(tape)]})
+        return response, tape.tokens
+
+    async def _arecorded_call(self, messages, cache, key, tape: TokenTape):
+        try:
+            return await self._acall(messages, cache, key, config={"callbacks": [TapeRecorder(tape)]})
+        finally:
+            tape.close()
+
+    def invoke(self, messages, use_cache: bool = True, **kwargs):
+        started = time.monotonic()
+        cache, key, response = self._lookup(messages, use_cache)
+        if response is not None:
+            self._record(started, response, cache_hit=True)
+            return response
+        try:
+            if self._coalescable(use_cache, kwargs):
+                # Identical request already in flight: wait for its answer instead of paying twice
+                (response, tokens), shared = llm_flights.do(key, lambda: self._recorded_call(messages, cache, key))
+                response = replay(self.run_name, messages, kwargs.get("config"), tokens, response)
+            else:
+                response, shared = self._call(messages, cache, key, **kwargs), False
+        except Exception:
+            self._record(started)
+            raise
+        self._record(started, response, cache_hit=shared)
+        return response
+
+    async def ainvoke(self, messages, use_cache: bool = True, **kwargs):
+        started = time.monotonic()
+        cache, key, response = self._lookup(messages, use_cache)
+        if response is not None:
+            self._record(started, response, cache_hit=True)
+            return response
+        try:
+            if self._coalescable(use_cache, kwargs):
+                task, tape, shared = llm_flights.ajoin(
+                    key, lambda tape: self._arecorded_call(messages, cache, key, tape), TokenTape
+                )
+                response = await areplay(self.run_name, messages, kwargs.get("config"), tape, task)
+            else:
+                response, shared = await self._acall(messages, cache, key, **kwargs), False
+        except Exception:
+            self._record(started)
+            raise
+        self._record(started, response, cache_hit=shared)
+        return response
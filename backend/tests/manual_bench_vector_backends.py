@@ -0,0 +1,97 @@
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+
+# Add backend directory to sys.path
+# Assuming this script is in backend/tests/
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain_core.documents import Document
+from app.core.vector_backends import NumpyBackend, ChromaBackend
+
+# Benchmarks the vector backends on synthetic vectors (no API calls):
+#   python tests/manual_bench_vector_backends.py --chunks 100000 --dim 768 --queries 200
+
+
+class LookupEmbeddings:
+    """Serves pre-computed vectors by text, like the embedding cache does during ingestion."""
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def embed_documents(self, texts):
+        return [self.vectors[t] for t in texts]
+
+    def embed_query(self, text):
+        return self.vectors[text]
+
+
+def build(name, factory, docs, ids, batch=5000):
+    started = time.perf_counter()
+    backend = factory()
+    for i in range(0, len(docs), batch):
+        backend.add_documents(docs[i:i + batch], ids[i:i + batch])
+    print(f"{name:>14}: ingest {time.perf_counter() - started:7.2f}s")
+    return backend
+
+
+def bench(name, factory, queries, k, truth=None):
+    started = time.perf_counter()
+    backend = factory()
+    open_s = time.perf_counter() - started
+    latencies, results = [], []
+    for q in queries:
+        t = time.perf_counter()
+        results.append([doc.page_content for doc, _ in backend.search_by_vector(q, k=k)])
+        latencies.append((time.perf_counter() - t) * 1000)
+    line = f"{name:>14}: open {open_s * 1000:7.1f}ms | query p50 {np.percentile(latencies, 50):7.2f}ms p95 {np.percentile(latencies, 95):7.2f}ms"
+    if truth is not None:
+        recall = np.mean([len(set(r) & set(t)) / k for r, t in zip(results, truth)])
+        line += f" | recall@{k} {recall:.3f}"
+    print(line)
+    backend.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--skip-chroma", action="store_true")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    matrix = rng.normal(size=(args.chunks, args.dim)).astype(np.float32)
+    vectors = {f"chunk {i}": row for i, row in enumerate(matrix.tolist())}
+    embeddings = LookupEmbeddings(vectors)
+    docs = [Document(page_content=t, metadata={"source": f"file{i % 100}.md"}) for i, t in enumerate(vectors)]
+    ids = [f"c-{i}" for i in range(len(docs))]
+    queries = rng.normal(size=(args.queries, args.dim)).astype(np.float32).tolist()
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        factories = {
+            "numpy-float32": lambda: NumpyBackend(os.path.join(tmp_dir, "numpy"), embeddings, dtype="float32"),
+            "numpy-int8": lambda: NumpyBackend(os.path.join(tmp_dir, "numpy"), embeddings, dtype="int8"),
+        }
+        if not args.skip_chroma:
+            factories["chroma"] = lambda: ChromaBackend(os.path.join(tmp_dir, "chroma"), "bench", embeddings)
+
+        for name, factory in factories.items():
+            build(name, factory, docs, ids).close()
+
+        truth = bench("numpy-float32", factories["numpy-float32"], queries, args.k)
+        for name in list(factories)[1:]:
+            bench(name, factories[name], queries, args.k, truth=truth)
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == "__main__":
+    main()
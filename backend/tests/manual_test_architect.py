@@ -1,5 +1,6 @@
 import sys
 import os
+import asyncio
 from pprint import pprint
 from dotenv import load_dotenv
 
@@ -39,7 +40,7 @@ state = AgentState(
 )
 
 print("🚀 Triggering Architect Agent...")
-result = architect_node(state)
+result = asyncio.run(architect_node(state, {"configurable": {"thread_id": "manual_test"}}))
 print("✅ Architect Agent Finished.")
 print("Generated Code:")
 print(result['slide_code'].get(1, "No code generated"))
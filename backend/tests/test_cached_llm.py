@@ -0,0 +1,106 @@
+import os
+import sys
+import asyncio
+import unittest
+from unittest.mock import patch
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+
+from app.utils import CachedLLM, llm_flights, tagged_config
+from app.core.token_stream import chunk_text
+
+ANSWER = "Gravity is the mutual attraction between masses."
+
+class SlowChat(BaseChatModel):
+    """Streams ANSWER word by word; counts provider calls."""
+    calls: int = 0
+
+    @property
+    def _llm_type(self):
+        return "slow-chat"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=ANSWER))])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        for word in ANSWER.split(" "):
+            await asyncio.sleep(0.02)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+
+def make_graph(llm):
+    """One-node stand-in for the LangGraph app: the node's model call inherits the run's callbacks."""
+    async def researcher(state, config):
+        response = await llm.ainvoke([HumanMessage(content="What is gravity?")],
+                                     config=tagged_config(config, chapter=state["chapter"]))
+        return {"draft": response.content}
+    return RunnableLambda(researcher)
+
+async def stream_run(graph, chapter=1):
+    """Drives the graph like run_graph_execution does; returns (streamed text, chapter tags, output)."""
+    tokens, chapters, output = [], set(), None
+    async for event in graph.astream_events({"chapter": chapter}, version="v2"):
+        if event["event"] == "on_chat_model_stream":
+            tokens.append(chunk_text(event["data"]["chunk"]))
+            chapters.add(event["metadata"].get("chapter"))
+        elif event["event"] == "on_chain_end" and event["parent_ids"] == []:
+            output = event["data"]["output"]
+    return "".join(tokens), chapters, output
+
+class TestCachedLLMSingleFlight(unittest.TestCase):
+    def setUp(self):
+        self.env = patch.dict(os.environ, {"LLM_CACHE": "false", "LLM_METERING": "false"})
+        self.env.start()
+        self.model = SlowChat()
+        self.graph = make_graph(CachedLLM(self.model))
+        self.coalesced = llm_flights.coalesced
+
+    def tearDown(self):
+        self.env.stop()
+
+    def test_concurrent_graph_runs_share_one_call_and_both_stream(self):
+        async def main():
+            return await asyncio.gather(stream_run(self.graph, chapter=1), stream_run(self.graph, chapter=2))
+
+        (text1, chapters1, out1), (text2, chapters2, out2) = asyncio.run(main())
+
+        self.assertEqual(self.model.calls, 1)
+        self.assertEqual(llm_flights.coalesced - self.coalesced, 1)
+        self.assertEqual(text1.strip(), ANSWER)
+        self.assertEqual(text2.strip(), ANSWER)
+        # Each run's tokens carry its own tags
+        self.assertEqual((chapters1, chapters2), ({1}, {2}))
+        self.assertEqual(out1, out2)
+
+    def test_restarted_run_picks_up_the_cancelled_runs_request(self):
+        async def main():
+            first = asyncio.create_task(stream_run(self.graph))
+            await asyncio.sleep(0.07)  # a few tokens in
+            first.cancel()
+            return await stream_run(self.graph)
+
+        text, _, output = asyncio.run(main())
+
+        self.assertEqual(self.model.calls, 1)
+        self.assertEqual(text.strip(), ANSWER)
+        self.assertEqual(output["draft"].strip(), ANSWER)
+
+    def test_plain_calls_still_coalesce(self):
+        llm = CachedLLM(self.model)
+
+        async def main():
+            return await asyncio.gather(*(llm.ainvoke([HumanMessage(content="Same prompt")]) for _ in range(3)))
+
+        responses = asyncio.run(main())
+        self.assertEqual(self.model.calls, 1)
+        self.assertEqual({r.content.strip() for r in responses}, {ANSWER})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.catalog import SourceCatalog
+
+class TestSourceCatalog(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.catalog = SourceCatalog(os.path.join(self.tmp_dir, "catalog.sqlite"))
+        self.root = os.path.join(self.tmp_dir, "research")
+        for i in range(5):
+            self.catalog.upsert(os.path.join(self.root, f"notes_{i}.md"), self.root, 10, 1, 2, f"Note {i}\nbody")
+        self.catalog.upsert(os.path.join(self.root, "papers", "survey.pdf"), self.root, 99, 1, 40, "Survey")
+
+    def tearDown(self):
+        self.catalog.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_pagination_and_filters(self):
+        self.assertEqual(self.catalog.count(), 6)
+        self.assertEqual(self.catalog.count(file_type="pdf"), 1)
+        
+        first_page = self.catalog.list(offset=0, limit=4)
+        second_page = self.catalog.list(offset=4, limit=4)
+        self.assertEqual(len(first_page), 4)
+        self.assertEqual(len(second_page), 2)
+        
+        pdfs = self.catalog.list(file_type=".pdf")
+        self.assertEqual(pdfs[0]["rel_path"], os.path.join("papers", "survey.pdf"))
+        self.assertEqual(pdfs[0]["chunk_count"], 40)
+        self.assertEqual(self.catalog.list(name_contains="notes_3")[0]["snippet"], "Note 3 body")
+
+    def test_summary_survives_only_unchanged_reingest(self):
+        path = os.path.join(self.root, "notes_0.md")
+        self.catalog.set_summary(path, "Meeting notes")
+        
+        self.catalog.upsert(path, self.root, 10, 1, 2, "Note 0")
+        self.assertEqual(self.catalog.get(path)["summary"], "Meeting notes")
+        
+        self.catalog.upsert(path, self.root, 12, 2, 3, "Note 0 edited")
+        self.assertIsNone(self.catalog.get(path)["summary"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import sys
+import unittest
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain_core.documents import Document
+from app.core.chunking import Chunker
+from app.core.context_packing import count_tokens
+
+PYTHON_SOURCE = '''import os
+
+
+@decorated
+def first():
+    return 1
+
+
+class Second:
+    def method(self):
+        return 2
+
+
+def third():
+    return 3
+'''
+
+
+class TestChunking(unittest.TestCase):
+    def test_python_splits_on_definitions(self):
+        # Sized in characters here: each definition alone fits, two together don't
+        chunker = Chunker(chunk_tokens=60, overlap_tokens=0, length_function=len)
+        chunks = chunker.split([Document(page_content=PYTHON_SOURCE, metadata={"source": "mod.py"})])
+        self.assertTrue(any("@decorated\ndef first():" in c.page_content for c in chunks))
+        self.assertFalse(any("def first" in c.page_content and "class Second" in c.page_content for c in chunks))
+        self.assertTrue(any("class Second:" in c.page_content and "return 2" in c.page_content for c in chunks))
+        self.assertIn("third", [c.metadata.get("symbols") for c in chunks])
+        for c in chunks:
+            self.assertEqual(c.metadata["source"], "mod.py")
+
+    def test_python_small_definitions_are_packed(self):
+        chunks = Chunker(chunk_tokens=400).split([Document(page_content=PYTHON_SOURCE, metadata={"source": "mod.py"})])
+        self.assertEqual(len(chunks), 1)
+        self.assertEqual(chunks[0].metadata["symbols"], "first, Second, third")
+
+    def test_markdown_keeps_headings_with_sections(self):
+        text = "# Guide\n\nintro\n\n## Install\n\n" + "pip install things. " * 30 + "\n\n## Usage\n\nrun it"
+        chunks = Chunker(chunk_tokens=60, overlap_tokens=0).split([Document(page_content=text, metadata={"source": "README.md"})])
+        usage = [c for c in chunks if "run it" in c.page_content]
+        self.assertEqual(len(usage), 1)
+        self.assertIn("## Usage", usage[0].page_content)
+        self.assertEqual(usage[0].metadata["section"], "Guide > Usage")
+
+    def test_chunks_respect_token_size_and_pages(self):
+        chunker = Chunker(chunk_tokens=50, overlap_tokens=10)
+        pages = [
+            Document(page_content="alpha beta gamma. " * 40, metadata={"source": "doc.pdf", "page": 0}),
+            Document(page_content="delta epsilon. " * 40, metadata={"source": "doc.pdf", "page": 1}),
+        ]
+        chunks = chunker.split(pages)
+        for c in chunks:
+            self.assertLessEqual(count_tokens(c.page_content), 50)
+            # A chunk never mixes two pages
+            self.assertFalse("gamma" in c.page_content and "delta" in c.page_content)
+        self.assertEqual({c.metadata["page"] for c in chunks}, {0, 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
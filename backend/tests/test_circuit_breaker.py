@@ -0,0 +1,50 @@
+import os
+import sys
+import time
+import unittest
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.circuit_breaker import CircuitBreaker, get_breaker, CLOSED, OPEN, HALF_OPEN
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_open_skips_until_cooldown_then_probes_once(self):
+        breaker = CircuitBreaker("pro", cooldown=0.05, max_cooldown=1)
+        self.assertTrue(breaker.allow())
+        breaker.record_failure(0.1)
+        self.assertEqual(breaker.state, OPEN)
+        self.assertFalse(breaker.allow())
+        
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())   # the probe
+        self.assertEqual(breaker.state, HALF_OPEN)
+        self.assertFalse(breaker.allow())  # only one probe in flight
+        breaker.record_success(0.2)
+        self.assertEqual(breaker.state, CLOSED)
+        self.assertTrue(breaker.allow())
+
+    def test_failed_probe_doubles_cooldown(self):
+        breaker = CircuitBreaker("pro", cooldown=0.05, max_cooldown=0.08)
+        breaker.record_failure(0.1)
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        breaker.record_failure(0.1)
+        self.assertEqual(breaker.state, OPEN)
+        self.assertEqual(breaker.cooldown, 0.08)
+
+    def test_non_tripping_errors_only_count(self):
+        breaker = CircuitBreaker("pro", cooldown=10)
+        breaker.record_success(0.5)
+        breaker.record_failure(0.1, trip=False)
+        stats = breaker.stats()
+        self.assertEqual(stats["state"], CLOSED)
+        self.assertEqual(stats["calls"], 2)
+        self.assertEqual(stats["error_rate"], 0.5)
+        self.assertEqual(stats["p50_latency_s"], 0.5)
+
+    def test_breakers_are_shared_per_model(self):
+        self.assertIs(get_breaker("shared-model"), get_breaker("shared-model"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import os
+import sys
+import unittest
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain_core.documents import Document
+from app.core.context_packing import pack_context, count_tokens, truncate_to_tokens
+
+def chunk(source, index, text):
+    return Document(page_content=text, metadata={"source": source, "chunk_id": f"{source}-{index}", "chunk_index": index})
+
+class TestContextPacking(unittest.TestCase):
+    def test_adjacent_chunks_are_merged_without_overlap(self):
+        docs = [
+            chunk("a.md", 1, "shared overlap text. second part of the report"),
+            chunk("a.md", 0, "first part of the report, shared overlap text."),
+            chunk("b.md", 4, "unrelated notes"),
+        ]
+        packed = pack_context(docs, token_budget=1000)
+        self.assertEqual(packed["dropped"], [])
+        self.assertIn("first part of the report, shared overlap text. second part", packed["text"])
+        self.assertEqual(packed["text"].count("Source ["), 2)
+        self.assertEqual(packed["tokens"], count_tokens(packed["text"]))
+
+    def test_handed_over_chunks_are_not_merged_as_neighbours(self):
+        # A chunk inherited from another file keeps an ID ending in that file's index, but has no position here
+        handed_over = Document(page_content="text from the old file", metadata={"source": "a.md", "chunk_id": "a.md-alt-x-1"})
+        packed = pack_context([chunk("a.md", 0, "first part of a"), handed_over], token_budget=1000)
+        self.assertEqual(packed["text"].count("Source ["), 2)
+
+    def test_budget_drops_chunks_that_do_not_fit(self):
+        docs = [chunk("a.md", 0, "short and relevant"), chunk("big.md", 0, "word " * 500), chunk("c.md", 0, "tiny")]
+        packed = pack_context(docs, token_budget=40)
+        self.assertLessEqual(packed["tokens"], 40)
+        self.assertEqual([d["source"] for d in packed["dropped"]], ["big.md"])
+        self.assertEqual([d["source"] for d in packed["included"]], ["a.md", "c.md"])
+
+    def test_truncate_to_tokens(self):
+        text = "token " * 300
+        self.assertLessEqual(count_tokens(truncate_to_tokens(text, 50)), 50)
+        self.assertEqual(truncate_to_tokens("short", 50), "short")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import sys
+import shutil
+import hashlib
+import tempfile
+import unittest
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.dedup import DedupIndex, MinHasher, similarity, shingles, _MERSENNE_PRIME
+
+REPORT = (
+    "The quarterly report shows that embedding costs dropped by forty percent after the cache "
+    "was introduced, while retrieval latency stayed flat across all research folders and the "
+    "planner produced noticeably shorter prompts for the same set of user goals."
+)
+DRAFT = REPORT.replace("forty percent", "forty two percent")
+OTHER = "Gravity is one of the four fundamental interactions and it governs the motion of planets and galaxies."
+
+class TestDedup(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.index = DedupIndex(os.path.join(self.tmp_dir, "dedup.sqlite"), threshold=0.7)
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_signature_similarity(self):
+        hasher = MinHasher()
+        self.assertEqual(hasher.signature(REPORT), hasher.signature(" ".join(REPORT.upper().split())))
+        self.assertGreater(similarity(hasher.signature(REPORT), hasher.signature(DRAFT)), 0.7)
+        self.assertLess(similarity(hasher.signature(REPORT), hasher.signature(OTHER)), 0.2)
+
+    def test_vectorized_signature_matches_exact_arithmetic(self):
+        # Signatures are persisted, so the NumPy path must equal the big-int definition exactly
+        hasher = MinHasher()
+        hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little") & _MERSENNE_PRIME
+                  for s in shingles(REPORT)]
+        expected = [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in hasher._perms]
+        self.assertEqual(hasher.signature(REPORT), expected)
+
+    def test_find_alias_and_remove(self):
+        self.index.add("r-0", "/lab", "/lab/report.md", self.index.signature(REPORT))
+        
+        self.assertEqual(self.index.find(self.index.signature(DRAFT), "/lab"), "r-0")
+        self.assertIsNone(self.index.find(self.index.signature(DRAFT), "/talks"))  # Scoped per root
+        self.assertIsNone(self.index.find(self.index.signature(OTHER), "/lab"))
+        
+        self.index.add_alias("r-0", "/lab/report_draft.md")
+        self.index.add_alias("r-0", "/lab/report.pdf")
+        self.assertEqual(self.index.alternates(["r-0", "x"]), {"r-0": ["/lab/report.pdf", "/lab/report_draft.md"]})
+        
+        self.index.add_alias("r-0", "/lab/report.pdf", {"rel_path": "report.pdf", "file_type": "pdf"})
+        self.assertEqual(self.index.matching_aliases({"file_type": "pdf"}), ["r-0"])
+        self.assertEqual(self.index.matching_aliases({"rel_path": {"$in": ["other.md"]}}), [])
+        
+        self.index.remove_source_aliases("/lab/report.pdf")
+        self.assertEqual(self.index.alternates(["r-0"]), {"r-0": ["/lab/report_draft.md"]})
+        
+        self.index.remove(["r-0"])
+        self.assertIsNone(self.index.find(self.index.signature(REPORT), "/lab"))
+        self.assertEqual(self.index.stats(), {"canonical_chunks": 0, "aliases": 0})
+
+if __name__ == '__main__':
+    unittest.main()
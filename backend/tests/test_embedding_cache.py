@@ -0,0 +1,58 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.embedding_cache import EmbeddingCache, text_hash
+
+class TestEmbeddingCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, "embeddings.sqlite")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_roundtrip_is_keyed_by_model_and_task(self):
+        cache = EmbeddingCache(self.db_path, max_bytes=1 << 20)
+        h = text_hash("Gravity is a fundamental interaction")
+        cache.put_many("models/embedding-001", "retrieval_document", {h: [0.5, -1.0, 2.0]})
+        
+        self.assertEqual(cache.get("models/embedding-001", "retrieval_document", h), [0.5, -1.0, 2.0])
+        self.assertIsNone(cache.get("models/embedding-001", "retrieval_query", h))
+        self.assertIsNone(cache.get("models/other", "retrieval_document", h))
+        cache.close()
+        
+        # Survives a reopen
+        reopened = EmbeddingCache(self.db_path, max_bytes=1 << 20)
+        self.assertEqual(reopened.get("models/embedding-001", "retrieval_document", h), [0.5, -1.0, 2.0])
+        reopened.close()
+
+    def test_lru_eviction_respects_size_limit(self):
+        # Each 4-dim float32 vector is 16 bytes; allow roughly 3 of them
+        cache = EmbeddingCache(self.db_path, max_bytes=50)
+        cache.put_many("m", "t", {"a": [1.0] * 4})
+        cache.put_many("m", "t", {"b": [2.0] * 4})
+        cache.put_many("m", "t", {"c": [3.0] * 4})
+        cache.get("m", "t", "a")  # 'a' becomes most recently used
+        cache.put_many("m", "t", {"d": [4.0] * 4})
+        
+        self.assertLessEqual(cache.stats()["bytes"], 50)
+        self.assertIsNotNone(cache.get("m", "t", "a"))
+        self.assertIsNone(cache.get("m", "t", "b"))
+        cache.close()
+
+    def test_byte_total_tracks_replaces_and_evictions(self):
+        cache = EmbeddingCache(self.db_path, max_bytes=200)
+        for i in range(20):
+            cache.put_many("m", "t", {f"h{i % 7}": [float(i)] * (i % 5 + 1)})
+        actual = cache._conn.execute("SELECT SUM(LENGTH(vector)) FROM embeddings").fetchone()[0]
+        self.assertEqual(cache.stats()["bytes"], actual)
+        cache.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import sys
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.rate_limit import RateBudget
+from app.core.embedding_pipeline import EmbeddingPipeline
+
+class FakeEmbeddings:
+    def __init__(self, fail_first=0):
+        self.calls = 0
+        self.fail_first = fail_first
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        if self.calls <= self.fail_first:
+            raise Exception("429 ResourceExhausted")
+        return [[float(len(t))] for t in texts]
+
+class FakeStore:
+    def __init__(self):
+        self.ids = []
+
+    def add_documents(self, docs, ids=None):
+        self.ids.extend(ids)
+
+def make_chunks(n):
+    return [SimpleNamespace(page_content=f"chunk {i}") for i in range(n)]
+
+class TestEmbeddingPipeline(unittest.TestCase):
+    def test_commits_every_batch(self):
+        store = FakeStore()
+        embeddings = FakeEmbeddings()
+        pipeline = EmbeddingPipeline(store, embeddings, batch_size=3, max_workers=2, budget=RateBudget())
+        
+        ids = [f"id-{i}" for i in range(10)]
+        committed = pipeline.run(make_chunks(10), ids)
+        
+        self.assertEqual(committed, 10)
+        self.assertEqual(sorted(store.ids), sorted(ids))
+        self.assertEqual(embeddings.calls, 4)
+
+    def test_retries_rate_limit_errors(self):
+        store = FakeStore()
+        pipeline = EmbeddingPipeline(store, FakeEmbeddings(fail_first=1), batch_size=5, budget=RateBudget())
+        
+        with patch("app.core.embedding_pipeline.time.sleep") as sleep:
+            self.assertEqual(pipeline.run(make_chunks(2), ["a", "b"]), 2)
+        self.assertEqual(sleep.call_count, 1)
+
+    def test_budget_blocks_when_window_is_full(self):
+        budget = RateBudget(requests_per_minute=2, window=0.2)
+        start = time.monotonic()
+        for _ in range(3):
+            budget.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.15)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core import extraction
+from app.core.extraction import ExtractionCache, docx_text
+
+class TestExtractionCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.pdf = os.path.join(self.tmp, "paper.pdf")
+        self.write(b"%PDF-1.4 first version")
+        self.parsed = []
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def write(self, data, mtime_ns=None):
+        with open(self.pdf, "wb") as f:
+            f.write(data)
+        if mtime_ns is not None:
+            os.utime(self.pdf, ns=(mtime_ns, mtime_ns))
+
+    def fake_pdf(self, file_path):
+        self.parsed.append(file_path)
+        with open(file_path, "rb") as f:
+            return [f.read().decode(), "page 2"]
+
+    def test_parses_once_until_the_bytes_change(self):
+        cache = ExtractionCache(os.path.join(self.tmp, "extraction.sqlite"))
+        with patch.object(extraction, "_extract_pdf", self.fake_pdf):
+            self.assertEqual(cache.get_pages(self.pdf), ["%PDF-1.4 first version", "page 2"])
+            self.assertEqual(cache.get_text(self.pdf), "%PDF-1.4 first version\npage 2")
+            self.assertEqual(len(self.parsed), 1)
+
+            # Touched, same bytes: still a hit
+            self.write(b"%PDF-1.4 first version", mtime_ns=1_000_000_000)
+            cache.get_pages(self.pdf)
+            self.assertEqual(len(self.parsed), 1)
+
+            self.write(b"%PDF-1.4 second version")
+            self.assertEqual(cache.get_pages(self.pdf)[0], "%PDF-1.4 second version")
+            self.assertEqual(len(self.parsed), 2)
+        cache.close()
+
+    def test_oversized_files_are_refused_without_parsing(self):
+        cache = ExtractionCache(os.path.join(self.tmp, "extraction.sqlite"), max_bytes=10)
+        with patch.object(extraction, "_extract_pdf", self.fake_pdf):
+            with self.assertRaises(ValueError):
+                cache.get_pages(self.pdf)
+        self.assertEqual(self.parsed, [])
+        cache.close()
+
+    def test_max_size_from_env(self):
+        with patch.dict(os.environ, {"EXTRACTION_MAX_MB": "0.5"}):
+            cache = ExtractionCache(os.path.join(self.tmp, "extraction.sqlite"))
+        self.assertEqual(cache.max_bytes, 512 * 1024)
+        cache.close()
+
+class TestDocxText(unittest.TestCase):
+    def table(self, *rows):
+        return SimpleNamespace(rows=[SimpleNamespace(cells=[SimpleNamespace(text=t) for t in row]) for row in rows])
+
+    def test_tables_follow_the_body_order(self):
+        paragraph = lambda text: SimpleNamespace(text=text)
+        blocks = [paragraph("Results"), self.table(["Model", "Score"], ["Merged", "Merged"], ["A", "0.9"]), paragraph("Done.")]
+        doc = SimpleNamespace(iter_inner_content=lambda: iter(blocks))
+
+        self.assertEqual(docx_text(doc), "Results\nModel | Score\nMerged\nA | 0.9\nDone.")
+
+    def test_older_python_docx_appends_tables(self):
+        doc = SimpleNamespace(paragraphs=[SimpleNamespace(text="Intro")], tables=[self.table(["x", "y"])])
+
+        self.assertEqual(docx_text(doc), "Intro\nx | y")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.lexical_index import LexicalIndex, build_match_query, reciprocal_rank_fusion
+
+class TestLexicalIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.index = LexicalIndex(os.path.join(self.tmp_dir, "lexical.sqlite"))
+        self.index.add(
+            ["a-0", "a-1", "b-0"],
+            [
+                "VectorStoreManager.ingest_directory walks the research folder.",
+                "임베딩 모델은 검색 품질을 좌우한다.",
+                "Gravity is a fundamental interaction.",
+            ],
+            [{"source": "rag.md"}, {"source": "rag.md"}, {"source": "space.txt"}]
+        )
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_exact_identifier_and_korean_prefix(self):
+        hits = self.index.search("ingest_directory", k=3)
+        self.assertEqual(hits[0]["chunk_id"], "a-0")
+        
+        # "모델" should match the inflected form "모델은"
+        hits = self.index.search("모델", k=3)
+        self.assertEqual([h["chunk_id"] for h in hits], ["a-1"])
+        self.assertEqual(hits[0]["metadata"]["source"], "rag.md")
+
+    def test_delete_and_replace(self):
+        self.index.delete(["b-0"])
+        self.assertEqual(self.index.search("gravity"), [])
+        
+        self.index.add(["a-0"], ["Rewritten chunk about quotas."], [{"source": "rag.md"}])
+        self.assertEqual(self.index.search("ingest_directory"), [])
+        self.assertEqual(self.index.search("quotas")[0]["chunk_id"], "a-0")
+
+    def test_query_syntax_is_escaped(self):
+        self.assertEqual(build_match_query('foo" OR bar*'), '"foo"* OR "or"* OR "bar"*')
+        self.assertEqual(self.index.search('"):(*'), [])
+
+    def test_where_filter(self):
+        self.index.add(
+            ["c-0", "c-1"],
+            ["Gravity notes from the lab.", "Gravity slides, page two."],
+            [{"source": "lab.md", "research_root": "/lab", "file_type": "md"},
+             {"source": "talk.pdf", "research_root": "/talks", "file_type": "pdf", "page": 2}]
+        )
+        hits = self.index.search("gravity", k=5, where={"research_root": "/lab"})
+        self.assertEqual([h["chunk_id"] for h in hits], ["c-0"])
+        
+        hits = self.index.search("gravity", k=5, where={"$or": [{"file_type": {"$in": ["pdf"]}}, {"source": "space.txt"}]})
+        self.assertEqual({h["chunk_id"] for h in hits}, {"b-0", "c-1"})
+        
+        with self.assertRaises(ValueError):
+            self.index.search("gravity", where={"page') OR 1 --": 1})
+
+    def test_lookups_use_the_chunk_id_index(self):
+        self.assertTrue(self.index.has("a-1"))
+        self.assertEqual(self.index.get("b-0")["metadata"], {"source": "space.txt"})
+        plan = self.index._conn.execute(
+            "EXPLAIN QUERY PLAN SELECT fts_rowid FROM chunk_rows WHERE chunk_id = ?", ("a-1",)
+        ).fetchall()
+        self.assertIn("PRIMARY KEY", str(plan))
+        
+        # An index built before the chunk_id -> rowid map is migrated on open
+        self.index._conn.execute("DROP TABLE chunk_rows")
+        self.index._conn.commit()
+        self.index.close()
+        self.index = LexicalIndex(os.path.join(self.tmp_dir, "lexical.sqlite"))
+        self.assertEqual(sorted(self.index.ids()), ["a-0", "a-1", "b-0"])
+        self.index.delete(["a-0"])
+        self.assertFalse(self.index.has("a-0"))
+        self.assertEqual(self.index.search("ingest_directory"), [])
+
+    def test_reciprocal_rank_fusion_prefers_consensus(self):
+        fused = reciprocal_rank_fusion([["x", "y", "z"], ["y", "w"]], key=lambda item: item)
+        self.assertEqual(fused[0], "y")
+        self.assertEqual(set(fused), {"x", "y", "z", "w"})
+
+if __name__ == '__main__':
+    unittest.main()
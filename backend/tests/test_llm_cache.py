@@ -0,0 +1,67 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import unittest
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from app.core.llm_cache import LLMResponseCache, cache_key
+
+class TestLLMCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, "llm_cache.sqlite")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_key_covers_model_temperature_and_messages(self):
+        messages = [SystemMessage(content="You are the architect."), HumanMessage(content="Blueprint this report.")]
+        key = cache_key("gemini-3-flash-preview", 0.0, messages)
+        # Surrounding whitespace / line endings don't matter
+        self.assertEqual(key, cache_key("gemini-3-flash-preview", 0, [
+            SystemMessage(content="You are the architect.\r\n"), HumanMessage(content="  Blueprint this report.")
+        ]))
+        self.assertNotEqual(key, cache_key("gemini-3-pro-preview", 0.0, messages))
+        self.assertNotEqual(key, cache_key("gemini-3-flash-preview", 0.3, messages))
+        self.assertNotEqual(key, cache_key("gemini-3-flash-preview", 0.0, messages[1:]))
+
+    def test_roundtrip_survives_reopen(self):
+        cache = LLMResponseCache(self.db_path, max_bytes=1 << 20, ttl=60)
+        key = cache_key("m", 0.0, [HumanMessage(content="hi")])
+        cache.put(key, "m", AIMessage(content="안녕하세요", response_metadata={"served_by": "m"}))
+        cache.close()
+        
+        cache = LLMResponseCache(self.db_path, max_bytes=1 << 20, ttl=60)
+        response = cache.get(key)
+        self.assertIsInstance(response, AIMessage)
+        self.assertEqual(response.content, "안녕하세요")
+        self.assertIsNone(cache.get(cache_key("m", 0.0, [HumanMessage(content="bye")])))
+        self.assertEqual(cache.stats()["hits"], 1)
+        cache.close()
+
+    def test_ttl_and_lru_eviction(self):
+        cache = LLMResponseCache(self.db_path, max_bytes=1 << 20, ttl=0.05)
+        cache.put("old", "m", AIMessage(content="stale"))
+        time.sleep(0.06)
+        self.assertIsNone(cache.get("old"))
+        
+        cache.put("probe", "m", AIMessage(content="x" * 100))
+        entry_bytes = cache.stats()["bytes"]
+        cache.clear()
+        
+        # Room for three and a half entries
+        cache = LLMResponseCache(self.db_path, max_bytes=entry_bytes * 7 // 2, ttl=60)
+        for i in range(5):
+            cache.put(f"k{i}", "m", AIMessage(content="x" * 100))
+            cache.get("k0")  # keep k0 recently used
+        self.assertIsNotNone(cache.get("k0"))
+        self.assertIsNone(cache.get("k1"))
+        self.assertLessEqual(cache.stats()["bytes"], entry_bytes * 7 // 2)
+
+if __name__ == '__main__':
+    unittest.main()
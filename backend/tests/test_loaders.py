@@ -0,0 +1,62 @@
+import os
+import sys
+import time
+import unittest
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.loaders import ParallelLoader
+
+# Stand-in parsers (top-level so the worker processes can unpickle them)
+def crashing_load(file_path):
+    if os.path.basename(file_path).startswith("bad"):
+        os._exit(1)  # kills the worker, like a segfaulting PDF parser
+    return [file_path.upper()]
+
+def slow_load(file_path):
+    if os.path.basename(file_path).startswith("slow"):
+        time.sleep(30)
+    return [file_path.upper()]
+
+class TestParallelLoader(unittest.TestCase):
+    def test_crashing_file_only_fails_itself(self):
+        files = ["good1", "good2", "good3", "bad1", "good4", "good5", "good6", "bad2"]
+        loader = ParallelLoader(max_workers=4, timeout=60, load_fn=crashing_load)
+        results = {path: (docs, error) for path, docs, error in loader.iter_load(files)}
+
+        self.assertEqual(sorted(results), sorted(files))
+        for path, (docs, error) in results.items():
+            if path.startswith("bad"):
+                self.assertIsNone(docs)
+                self.assertIsNotNone(error)
+            else:
+                self.assertEqual(docs, [path.upper()])
+                self.assertIsNone(error)
+
+    def test_timeout_fails_only_the_slow_file(self):
+        files = ["a", "slow", "b", "c"]
+        loader = ParallelLoader(max_workers=2, timeout=1, load_fn=slow_load)
+        started = time.monotonic()
+        results = {path: error for path, _, error in loader.iter_load(files)}
+
+        self.assertLess(time.monotonic() - started, 20)
+        self.assertIsInstance(results.pop("slow"), TimeoutError)
+        self.assertEqual(results, {"a": None, "b": None, "c": None})
+
+    def test_source_is_pulled_lazily(self):
+        pulled = []
+
+        def source():
+            for i in range(10):
+                pulled.append(i)
+                yield f"file{i}"
+
+        loader = ParallelLoader(max_workers=2, timeout=60, load_fn=crashing_load)
+        results = loader.iter_load(source())
+        next(results)
+        self.assertLess(len(pulled), 10)
+        self.assertEqual(len(list(results)) + 1, 10)
+
+if __name__ == '__main__':
+    unittest.main()
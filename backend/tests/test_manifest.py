@@ -0,0 +1,61 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.manifest import IngestManifest, hash_file
+
+class TestIngestManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.manifest = IngestManifest(os.path.join(self.tmp_dir, "manifest.sqlite"))
+
+    def tearDown(self):
+        self.manifest.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_upsert_get_and_remove(self):
+        path = os.path.join(self.tmp_dir, "docs", "a.txt")
+        self.manifest.upsert(path, 10, 123, "abc", ["id-0", "id-1"])
+        
+        record = self.manifest.get(path)
+        self.assertEqual(record["content_hash"], "abc")
+        self.assertEqual(record["chunk_ids"], ["id-0", "id-1"])
+        
+        self.manifest.touch(path, 11, 456)
+        self.assertEqual(self.manifest.get(path)["mtime_ns"], 456)
+        
+        self.manifest.remove(path)
+        self.assertIsNone(self.manifest.get(path))
+
+    def test_paths_under_is_scoped_to_root(self):
+        docs = os.path.join(self.tmp_dir, "docs")
+        self.manifest.upsert(os.path.join(docs, "a.txt"), 1, 1, "h1", [])
+        self.manifest.upsert(os.path.join(self.tmp_dir, "docs_old", "b.txt"), 1, 1, "h2", [])
+        
+        self.assertEqual(self.manifest.paths_under(docs), [os.path.join(docs, "a.txt")])
+
+    def test_referenced_chunk_ids_and_clear(self):
+        self.manifest.upsert(os.path.join(self.tmp_dir, "a.txt"), 1, 1, "h1", ["a-0", "a-1"])
+        self.manifest.upsert(os.path.join(self.tmp_dir, "b.txt"), 1, 1, "h2", ["b-0"])
+        self.assertEqual(self.manifest.all_chunk_ids(), {"a-0", "a-1", "b-0"})
+        self.assertEqual(len(self.manifest.paths()), 2)
+        
+        self.manifest.clear()
+        self.assertEqual(self.manifest.paths(), [])
+
+    def test_hash_file_tracks_content(self):
+        path = os.path.join(self.tmp_dir, "c.txt")
+        with open(path, "w") as f:
+            f.write("hello")
+        first = hash_file(path)
+        with open(path, "w") as f:
+            f.write("hello world")
+        self.assertNotEqual(first, hash_file(path))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import sys
+import shutil
+import asyncio
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.metering import UsageMeter, get_meter, metered_node, record_call
+
+class TestMetering(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.meter = UsageMeter(os.path.join(self.tmp_dir, "usage.sqlite"))
+        self.meter.prices = {"gemini-3-pro-preview": [2.0, 12.0]}
+
+    def tearDown(self):
+        self.meter.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_calls_are_attributed_to_the_running_node(self):
+        async def researcher_node(state, config):
+            self.meter.record("chat", "gemini-3-pro-preview", 2.0, input_tokens=1000, output_tokens=500, retries=1)
+            self.meter.record("chat", "gemini-3-pro-preview", 0.01, input_tokens=1000, output_tokens=500, cache_hit=True)
+            return {}
+
+        async def planner_node(state):
+            # Context is copied into worker threads
+            await asyncio.to_thread(self.meter.record, "embedding", "models/embedding-001", 0.2, input_tokens=40)
+            return {}
+
+        config = {"configurable": {"thread_id": "t1"}}
+        asyncio.run(metered_node("RESEARCHER", researcher_node)({}, config))
+        asyncio.run(metered_node("PLANNER", planner_node)({}, config))
+        self.meter.record("embedding", "models/embedding-001", 0.1, input_tokens=10)  # background indexer
+
+        rows = {(r["thread_id"], r["node"], r["model"]): r for r in self.meter.summary()}
+        research = rows[("t1", "RESEARCHER", "gemini-3-pro-preview")]
+        self.assertEqual(research["calls"], 2)
+        self.assertEqual(research["input_tokens"], 2000)
+        self.assertEqual(research["cache_hits"], 1)
+        self.assertEqual(research["retries"], 1)
+        self.assertAlmostEqual(research["cost_usd"], 0.008)  # the cache hit is free
+        self.assertIn(("t1", "PLANNER", "models/embedding-001"), rows)
+        self.assertIn((None, None, "models/embedding-001"), rows)
+
+    def test_summary_filters_and_validates(self):
+        self.meter.record("chat", "m", 1.0, thread_id="a", node="X", input_tokens=5)
+        self.meter.record("chat", "m", 1.0, thread_id="b", node="X", input_tokens=7)
+        self.assertEqual(self.meter.summary(group_by=["node"], thread_id="b")[0]["input_tokens"], 7)
+        self.assertIsNone(self.meter.summary(group_by=["model"])[0]["cost_usd"])
+        with self.assertRaises(ValueError):
+            self.meter.summary(group_by=["thread_id; DROP TABLE calls"])
+
+    def test_shared_meter_follows_the_configured_path(self):
+        db_path = os.path.join(self.tmp_dir, "shared.sqlite")
+        with patch.dict(os.environ, {"LLM_METERING": "true", "LLM_METERING_DB": db_path}):
+            record_call("chat", "m", 0.5, input_tokens=3)
+            meter = get_meter()
+            self.assertEqual(meter.db_path, db_path)
+            self.assertEqual(meter.summary(group_by=["model"])[0]["input_tokens"], 3)
+        with patch.dict(os.environ, {"LLM_METERING": "false"}):
+            self.assertIsNone(get_meter())
+            record_call("chat", "m", 0.5, input_tokens=3)
+        self.assertEqual(meter.summary(group_by=["model"])[0]["calls"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
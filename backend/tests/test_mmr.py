@@ -0,0 +1,32 @@
+import os
+import sys
+import unittest
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.mmr import mmr_select
+
+class TestMMR(unittest.TestCase):
+    def setUp(self):
+        self.query = [1.0, 0.0, 0.0]
+        self.candidates = [
+            [0.95, 0.31, 0.0],   # 0: most relevant
+            [0.94, 0.34, 0.0],   # 1: near-copy of 0
+            [0.80, 0.0, 0.60],   # 2: relevant, different direction
+            [0.0, 1.0, 0.0],     # 3: irrelevant
+        ]
+
+    def test_pure_relevance_matches_ranking(self):
+        self.assertEqual(mmr_select(self.query, self.candidates, k=3, lambda_mult=1.0), [0, 1, 2])
+
+    def test_diversity_skips_near_copies(self):
+        self.assertEqual(mmr_select(self.query, self.candidates, k=2, lambda_mult=0.5), [0, 2])
+
+    def test_edge_cases(self):
+        self.assertEqual(mmr_select(self.query, [], k=3), [])
+        self.assertEqual(sorted(mmr_select(self.query, self.candidates, k=10)), [0, 1, 2, 3])
+        self.assertEqual(mmr_select(self.query, [[0.0, 0.0, 0.0], [1.0, 0.0, 0.0]], k=1), [1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+import unittest
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.provider_limits import ProviderLimiter
+
+class TestProviderLimiter(unittest.TestCase):
+    def test_concurrency_cap_across_threads(self):
+        limiter = ProviderLimiter("google", max_concurrent=2)
+        peak, current, lock = [0], [0], threading.Lock()
+
+        def call(i):
+            with limiter.limit(key=f"session-{i % 3}"):
+                with lock:
+                    current[0] += 1
+                    peak[0] = max(peak[0], current[0])
+                time.sleep(0.01)
+                with lock:
+                    current[0] -= 1
+
+        workers = [threading.Thread(target=call, args=(i,)) for i in range(12)]
+        for w in workers: w.start()
+        for w in workers: w.join()
+        self.assertEqual(peak[0], 2)
+        self.assertEqual(limiter.stats()["granted"], 12)
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_waiting_threads_are_served_round_robin(self):
+        limiter = ProviderLimiter("google", max_concurrent=1)
+        order = []
+
+        async def call(key):
+            async with limiter.alimit(key=key):
+                order.append(key)
+                await asyncio.sleep(0.005)
+
+        async def main():
+            async with limiter.alimit(key="busy"):
+                # A busy session queues 4 calls before a second session queues 2
+                tasks = [asyncio.create_task(call("busy")) for _ in range(4)]
+                await asyncio.sleep(0.01)
+                tasks += [asyncio.create_task(call("other")) for _ in range(2)]
+                await asyncio.sleep(0.01)
+            await asyncio.gather(*tasks)
+
+        asyncio.run(main())
+        self.assertEqual(order, ["busy", "other", "busy", "other", "busy", "busy"])
+
+    def test_requests_per_minute_budget_queues_instead_of_failing(self):
+        limiter = ProviderLimiter("openai", requests_per_minute=2)
+        limiter.budget.window = 0.1
+        started = time.monotonic()
+        for _ in range(3):
+            with limiter.limit():
+                pass
+        self.assertGreaterEqual(time.monotonic() - started, 0.09)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+import unittest
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.single_flight import SingleFlight
+
+class TestSingleFlight(unittest.TestCase):
+    def test_threads_share_one_call(self):
+        flights = SingleFlight()
+        calls, results = [], []
+
+        def slow():
+            calls.append(1)
+            time.sleep(0.05)
+            return "answer"
+
+        def caller():
+            results.append(flights.do("prompt", slow))
+
+        workers = [threading.Thread(target=caller) for _ in range(4)]
+        for w in workers: w.start()
+        for w in workers: w.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(shared for _, shared in results), [False, True, True, True])
+        self.assertEqual(flights.in_flight(), 0)
+
+    def test_errors_reach_every_waiter(self):
+        flights = SingleFlight()
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("429")
+
+        async def main():
+            return await asyncio.gather(*(flights.ado("k", failing) for _ in range(3)), return_exceptions=True)
+
+        errors = asyncio.run(main())
+        self.assertTrue(all(isinstance(e, RuntimeError) for e in errors))
+
+    def test_cancelled_caller_does_not_cancel_the_shared_request(self):
+        flights = SingleFlight()
+        calls = []
+
+        async def slow():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "answer"
+
+        async def main():
+            first = asyncio.create_task(flights.ado("k", slow))
+            await asyncio.sleep(0.01)
+            first.cancel()  # interrupted graph run
+            restarted = await flights.ado("k", slow)
+            return first.cancelled(), restarted
+
+        cancelled, restarted = asyncio.run(main())
+        self.assertTrue(cancelled)
+        self.assertEqual(restarted, ("answer", True))
+        self.assertEqual(len(calls), 1)
+
+    def test_joined_callers_share_the_flight_state(self):
+        flights = SingleFlight()
+
+        async def produce(state):
+            state.append("token")
+            await asyncio.sleep(0.01)
+            return "answer"
+
+        async def main():
+            task, state, shared = flights.ajoin("k", produce, list)
+            joined_task, joined_state, joined = flights.ajoin("k", produce, list)
+            return (await asyncio.shield(task), shared, joined_task is task, joined_state is state, joined, state,
+                    flights.in_flight())
+
+        answer, shared, same_task, same_state, joined, state, in_flight = asyncio.run(main())
+        self.assertEqual((answer, shared, same_task, same_state, joined), ("answer", False, True, True, True))
+        self.assertEqual(state, ["token"])
+        self.assertEqual(in_flight, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import os
+import sys
+import time
+import unittest
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.stream import prefetch
+
+class TestPrefetch(unittest.TestCase):
+    def test_producer_runs_at_most_maxsize_ahead(self):
+        produced = []
+        
+        def source():
+            for i in range(20):
+                produced.append(i)
+                yield i
+        
+        stream = prefetch(source(), maxsize=2)
+        self.assertEqual(next(stream), 0)
+        time.sleep(0.2)
+        # 1 consumed + 2 queued + 1 blocked in put()
+        self.assertLessEqual(len(produced), 4)
+        self.assertEqual(list(stream), list(range(1, 20)))
+
+    def test_producer_errors_are_reraised(self):
+        def source():
+            yield 1
+            raise ValueError("bad pdf")
+        
+        stream = prefetch(source())
+        self.assertEqual(next(stream), 1)
+        with self.assertRaises(ValueError):
+            next(stream)
+
+if __name__ == '__main__':
+    unittest.main()
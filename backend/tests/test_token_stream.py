@@ -0,0 +1,83 @@
+import os
+import sys
+import asyncio
+import unittest
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.token_stream import TokenCoalescer, chunk_text
+
+class FakeChunk:
+    def __init__(self, content):
+        self.content = content
+
+def token(run_id, text, **metadata):
+    return {"event": "on_chat_model_stream", "run_id": run_id, "data": {"chunk": FakeChunk(text)},
+            "metadata": {"langgraph_node": "researcher", **metadata}}
+
+class TestTokenCoalescer(unittest.TestCase):
+    def test_tokens_are_coalesced_into_frames(self):
+        now = [0.0]
+        frames = []
+
+        async def send(frame):
+            frames.append(frame)
+
+        async def main():
+            coalescer = TokenCoalescer(send, interval_ms=50, clock=lambda: now[0])
+            for text in ["Hel", "lo", " wor"]:
+                now[0] += 0.01
+                await coalescer.handle(token("r1", text, chapter=2))
+            self.assertEqual(frames, [])
+            now[0] += 0.05
+            await coalescer.handle(token("r1", "ld", chapter=2))
+            await coalescer.handle(token("r1", "!", chapter=2))
+            await coalescer.handle({"event": "on_chat_model_end", "run_id": "r1", "data": {}})
+            self.assertFalse(await coalescer.handle({"event": "on_chain_end", "data": {}}))
+
+        asyncio.run(main())
+        self.assertEqual([f["content"] for f in frames], ["Hello world", "!"])
+        self.assertEqual([f["done"] for f in frames], [False, True])
+        self.assertEqual((frames[0]["node"], frames[0]["chapter"], frames[0]["slide"]), ("researcher", 2, None))
+
+    def test_final_flush_closes_open_streams(self):
+        frames = []
+
+        async def send(frame):
+            frames.append(frame)
+
+        async def main():
+            coalescer = TokenCoalescer(send, interval_ms=1000)
+            await coalescer.handle(token("a", "x", slide=1))
+            await coalescer.handle(token("b", "y", slide=2))
+            self.assertEqual(coalescer.pending(), 2)
+            await coalescer.flush(done=True)
+            self.assertEqual(coalescer.pending(), 0)
+
+        asyncio.run(main())
+        self.assertEqual([(f["stream_id"], f["slide"], f["content"], f["done"]) for f in frames],
+                         [("a", 1, "x", True), ("b", 2, "y", True)])
+
+    def test_timer_flushes_a_stalled_stream(self):
+        frames = []
+
+        async def send(frame):
+            frames.append(frame)
+
+        async def main():
+            coalescer = TokenCoalescer(send, interval_ms=20)
+            coalescer.start()
+            await coalescer.handle(token("r1", "tail of the answer"))
+            await asyncio.sleep(0.1)  # no further events arrive
+            self.assertEqual([f["content"] for f in frames], ["tail of the answer"])
+            await coalescer.close()
+
+        asyncio.run(main())
+        self.assertEqual(frames[-1]["done"], True)
+
+    def test_chunk_text_handles_content_parts(self):
+        self.assertEqual(chunk_text(FakeChunk([{"type": "text", "text": "a"}, "b", {"type": "image_url"}])), "ab")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import os
+import sys
+import shutil
+import tempfile
+import threading
+import unittest
+
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain_core.documents import Document
+from app.core.vector_backends import NumpyBackend, VectorBackend
+
+class LookupEmbeddings:
+    """Returns pre-computed vectors (the real pipeline serves these from the embedding cache)."""
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def embed_documents(self, texts):
+        return [self.vectors[t] for t in texts]
+
+class TestNumpyBackend(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        rng = np.random.default_rng(7)
+        self.vectors = {f"chunk {i}": rng.normal(size=32).tolist() for i in range(300)}
+        self.embeddings = LookupEmbeddings(self.vectors)
+        self.docs = [Document(page_content=t, metadata={"source": f"f{i % 3}.md", "i": i}) for i, t in enumerate(self.vectors)]
+        self.ids = [f"c-{i}" for i in range(len(self.docs))]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def build(self, dtype):
+        backend = NumpyBackend(self.tmp_dir, self.embeddings, dtype=dtype, block_rows=64)
+        backend.add_documents(self.docs[:200], self.ids[:200])
+        backend.add_documents(self.docs[200:], self.ids[200:])
+        return backend
+
+    def test_exact_top_k_and_filters(self):
+        for dtype in ("float32", "int8"):
+            backend = self.build(dtype)
+            hits = backend.search_by_vector(self.vectors["chunk 123"], k=3)
+            self.assertEqual(hits[0][0].page_content, "chunk 123")
+            self.assertAlmostEqual(hits[0][1], 0.0, places=2)
+            self.assertLessEqual(hits[0][1], hits[1][1])
+            
+            hits = backend.search_by_vector(self.vectors["chunk 123"], k=5, where={"source": "f1.md"})
+            self.assertEqual(len(hits), 5)
+            self.assertTrue(all(doc.metadata["source"] == "f1.md" for doc, _ in hits))
+            backend.close()
+
+    def test_upsert_delete_compact_and_reopen(self):
+        backend = self.build("float32")
+        backend.add_documents([Document(page_content="chunk 5", metadata={"source": "new.md"})], ["c-5"])
+        backend.delete(self.ids[:100])
+        self.assertEqual(backend.count(), 200)
+        self.assertEqual(backend.get(["c-5", "c-150"])["ids"], ["c-150"])
+        
+        report = backend.compact()
+        self.assertEqual(report["rows_reclaimed"], 101)
+        self.assertEqual(backend.search_by_vector(self.vectors["chunk 250"], k=1)[0][0].page_content, "chunk 250")
+        backend.close()
+        
+        reopened = NumpyBackend(self.tmp_dir, self.embeddings, dtype="float32")
+        self.assertEqual(reopened.count(), 200)
+        stored = reopened.get(["c-250"], include=["embeddings", "metadatas"])
+        self.assertEqual(stored["metadatas"][0]["i"], 250)
+        expected = np.asarray(self.vectors["chunk 250"]) / np.linalg.norm(self.vectors["chunk 250"])
+        np.testing.assert_allclose(stored["embeddings"][0], expected, rtol=1e-5)
+        reopened.close()
+
+    def test_compaction_does_not_block_searches_or_writes(self):
+        backend = self.build("int8")
+        backend.delete(self.ids[:100])
+        paths, during = backend._paths, {}
+        
+        def concurrent_work():
+            during["hit"] = backend.search_by_vector(self.vectors["chunk 150"], k=1)[0][0].page_content
+            backend.add_documents([Document(page_content="chunk 7", metadata={"source": "late.md"})], ["c-7"])
+            backend.delete(["c-160"])
+        
+        def paths_then_work(generation):
+            # First call: compact() between its snapshot and the generation swap
+            if during:
+                return paths(generation)
+            worker = threading.Thread(target=concurrent_work)
+            worker.start()
+            worker.join(timeout=5)
+            during["blocked"] = worker.is_alive()
+            return paths(generation)
+        
+        backend._paths = paths_then_work
+        backend.compact()
+        backend._paths = paths
+        
+        self.assertFalse(during["blocked"])
+        self.assertEqual(during["hit"], "chunk 150")
+        self.assertEqual(backend.count(), 200)
+        self.assertEqual(backend.get(["c-7", "c-160"])["ids"], ["c-7"])
+        self.assertEqual(backend.search_by_vector(self.vectors["chunk 7"], k=1)[0][0].metadata["source"], "late.md")
+        self.assertEqual(backend.search_by_vector(self.vectors["chunk 299"], k=1)[0][0].page_content, "chunk 299")
+        backend.close()
+
+class TestVectorBackendInterface(unittest.TestCase):
+    def test_incomplete_backend_fails_at_construction(self):
+        class NoSearch(VectorBackend):
+            def add_documents(self, documents, ids): pass
+            def delete(self, ids): pass
+            def get(self, ids, include=None): return {"ids": []}
+            def count(self): return 0
+            def all_ids(self): return []
+
+        with self.assertRaises(TypeError):
+            NoSearch()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,185 @@
+import os
+import sys
+import shutil
+import hashlib
+import tempfile
+import unittest
+from unittest import mock
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from app.core.rag import VectorStoreManager, get_vector_store, shutdown_vector_stores
+from app.core.loaders import ParallelLoader
+from app.core.embedding_cache import EmbeddingCache
+from app.core.embeddings import CachedEmbeddings
+
+DIM = 32
+
+class FakeEmbeddings(Embeddings):
+    """Deterministic bag-of-words vectors; counts every text that reaches the "API"."""
+    def __init__(self):
+        self.embedded = []
+
+    def _vector(self, text):
+        vector = [0.0] * DIM
+        for word in text.lower().split():
+            vector[int(hashlib.md5(word.encode("utf-8")).hexdigest(), 16) % DIM] += 1.0
+        return vector
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+def isolated_env(tmp):
+    # numpy backend, no real API key, usage rows kept out of backend/data
+    return {"RAG_VECTOR_BACKEND": "numpy", "GOOGLE_API_KEY": "test-key",
+            "LLM_METERING": "false", "LLM_METERING_DB": os.path.join(tmp, "usage.sqlite")}
+
+# Stand-in parser (top-level so the worker processes can unpickle it)
+def fake_load(file_path):
+    with open(file_path, encoding="utf-8") as f:
+        text = f.read()
+    if text.startswith("BROKEN"):
+        raise ValueError("unparseable file")
+    return [Document(page_content=text, metadata={"source": file_path})]
+
+class TestVectorStoreManagerIngest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.data_dir = os.path.join(self.tmp, "research")
+        os.makedirs(self.data_dir)
+        self.env = mock.patch.dict(os.environ, isolated_env(self.tmp))
+        self.env.start()
+
+        self.embedder = FakeEmbeddings()
+        embedding_model = CachedEmbeddings(self.embedder, EmbeddingCache(os.path.join(self.tmp, "embedding_cache.sqlite")))
+        self.rag = VectorStoreManager(persistence_dir=os.path.join(self.tmp, "index"), embedding_model=embedding_model)
+        self.rag.loader = ParallelLoader(max_workers=2, timeout=60, load_fn=fake_load)
+
+        self.write("alpha.txt", "Gravity is a fundamental interaction between all things with mass.")
+        self.write("beta.txt", "Photosynthesis converts light energy into chemical energy in plants.")
+        self.write("gamma.txt", "The Roman aqueducts carried water across valleys on stone arches.")
+
+    def tearDown(self):
+        self.rag.close()
+        self.env.stop()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def write(self, name, text):
+        with open(os.path.join(self.data_dir, name), "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def path(self, name):
+        return os.path.abspath(os.path.join(self.data_dir, name))
+
+    def indexed_text(self, name):
+        record = self.rag.manifest.get(self.path(name))
+        self.assertIsNotNone(record)
+        return " ".join(self.rag.lexical_index.get(cid)["content"] for cid in record["chunk_ids"])
+
+    def test_reingest_without_changes_is_a_no_op(self):
+        self.assertIn("Successfully indexed", self.rag.ingest_directory(self.data_dir))
+        embedded, vectors = len(self.embedder.embedded), self.rag.vector_store.count()
+
+        result = self.rag.ingest_directory(self.data_dir)
+
+        self.assertIn("Index up to date", result)
+        self.assertEqual(len(self.embedder.embedded), embedded)
+        self.assertEqual(self.rag.vector_store.count(), vectors)
+
+    def test_changed_file_replaces_its_chunks(self):
+        self.rag.ingest_directory(self.data_dir)
+        old_ids = self.rag.manifest.get(self.path("beta.txt"))["chunk_ids"]
+        self.embedder.embedded.clear()
+
+        self.write("beta.txt", "Mitochondria produce most of the chemical energy that powers a cell's reactions.")
+        result = self.rag.ingest_directory(self.data_dir)
+
+        self.assertIn("1 files updated, 2 unchanged", result)
+        self.assertEqual(self.embedder.embedded, ["Mitochondria produce most of the chemical energy that powers a cell's reactions."])
+        self.assertIn("Mitochondria", self.indexed_text("beta.txt"))
+        self.assertEqual(self.rag.vector_store.count(), 3)
+        for cid in set(old_ids) - set(self.rag.manifest.get(self.path("beta.txt"))["chunk_ids"]):
+            self.assertFalse(self.rag.lexical_index.has(cid))
+        self.assertEqual(self.rag.lexical_search("photosynthesis"), [])
+
+    def test_deleted_file_is_purged(self):
+        self.rag.ingest_directory(self.data_dir)
+        old_ids = self.rag.manifest.get(self.path("gamma.txt"))["chunk_ids"]
+
+        os.remove(self.path("gamma.txt"))
+        result = self.rag.ingest_directory(self.data_dir)
+
+        self.assertIn("1 removed", result)
+        self.assertIsNone(self.rag.manifest.get(self.path("gamma.txt")))
+        self.assertIsNone(self.rag.catalog.get(self.path("gamma.txt")))
+        self.assertEqual(self.rag.vector_store.get(old_ids)["ids"], [])
+        self.assertFalse(any(self.rag.lexical_index.has(cid) for cid in old_ids))
+        self.assertEqual(self.rag.vector_store.count(), 2)
+
+    def test_parse_failure_mid_run_keeps_the_previous_index(self):
+        progress = []
+        self.rag.ingest_directory(self.data_dir)
+        before = self.indexed_text("beta.txt")
+
+        # beta breaks, gamma changes and a new file appears in the same run
+        self.write("beta.txt", "BROKEN half-written export")
+        self.write("gamma.txt", "Roman aqueducts used gravity alone to carry water over long distances.")
+        self.write("delta.txt", "Tectonic plates drift a few centimetres every year.")
+        result = self.rag.ingest_directory(self.data_dir, progress=progress.append)
+
+        failed = [e["file"] for e in progress if e["event"] == "file_failed"]
+        self.assertEqual(failed, [self.path("beta.txt")])
+        self.assertIn("2 files updated", result)
+        self.assertIn("1 failed", result)
+        self.assertEqual(self.indexed_text("beta.txt"), before)
+        self.assertIn("gravity alone", self.indexed_text("gamma.txt"))
+        self.assertIn("Tectonic", self.indexed_text("delta.txt"))
+        self.assertEqual(self.rag.vector_store.count(), 4)
+
+        # Still broken: a run where every changed file failed is not "up to date"
+        result = self.rag.ingest_directory(self.data_dir)
+        self.assertNotIn("up to date", result)
+        self.assertIn("Failed to index 1 changed files", result)
+
+        # Once fixed, the failed file is picked up by the next run
+        self.write("beta.txt", "Chlorophyll absorbs mostly blue and red light.")
+        self.assertIn("1 files updated", self.rag.ingest_directory(self.data_dir))
+        self.assertIn("Chlorophyll", self.indexed_text("beta.txt"))
+
+class TestVectorStoreRegistry(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.env = mock.patch.dict(os.environ, isolated_env(self.tmp))
+        self.env.start()
+        # Managers built by get_vector_store open the default embedding cache
+        self.data_path = mock.patch("app.core.embedding_cache.data_path", lambda *parts: os.path.join(self.tmp, *parts))
+        self.data_path.start()
+
+    def tearDown(self):
+        shutdown_vector_stores()
+        self.data_path.stop()
+        self.env.stop()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_one_manager_per_persistence_dir(self):
+        first = get_vector_store(os.path.join(self.tmp, "a"))
+        self.assertIs(get_vector_store(os.path.join(self.tmp, "a", "..", "a")), first)
+        self.assertIsNot(get_vector_store(os.path.join(self.tmp, "b")), first)
+
+    def test_shutdown_closes_and_forgets_managers(self):
+        first = get_vector_store(os.path.join(self.tmp, "a"))
+        with mock.patch.object(first, "close", wraps=first.close) as close:
+            shutdown_vector_stores()
+        close.assert_called_once()
+        self.assertIsNot(get_vector_store(os.path.join(self.tmp, "a")), first)
+
+if __name__ == '__main__':
+    unittest.main()
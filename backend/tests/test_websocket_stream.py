@@ -0,0 +1,84 @@
+import os
+import sys
+import json
+import types
+import asyncio
+import unittest
+
+# Add backend to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain_core.messages import AIMessageChunk, SystemMessage
+import app.api.endpoints as endpoints
+
+CLIENT_ID = "ws-test"
+
+def token(text, run_id="run-1", **metadata):
+    return {"event": "on_chat_model_stream", "run_id": run_id, "name": "ChatGoogleGenerativeAI",
+            "data": {"chunk": AIMessageChunk(content=text)},
+            "metadata": {"langgraph_node": "researcher", **metadata}}
+
+class FakeGraph:
+    """Replays a fixed astream_events sequence, optionally hanging afterwards (a model still thinking)."""
+    def __init__(self, events, hang=False):
+        self.events = events
+        self.hang = hang
+
+    async def astream_events(self, input_data, config=None, version=None):
+        for event in self.events:
+            await asyncio.sleep(0)
+            yield event
+        if self.hang:
+            await asyncio.sleep(3600)
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, text):
+        self.sent.append(json.loads(text))
+
+class TestWebSocketTokenStream(unittest.TestCase):
+    def setUp(self):
+        self.graph_module = endpoints.graph_module
+        self.ws = FakeWebSocket()
+        endpoints.manager.active_connections[CLIENT_ID] = self.ws
+
+    def tearDown(self):
+        endpoints.graph_module = self.graph_module
+        endpoints.manager.disconnect(CLIENT_ID)
+
+    def run_graph(self, graph, cancel_after: float = None):
+        endpoints.graph_module = types.SimpleNamespace(graph=graph)
+
+        async def main():
+            task = asyncio.create_task(endpoints.run_graph_execution(CLIENT_ID, "hello"))
+            if cancel_after is not None:
+                await asyncio.sleep(cancel_after)
+                task.cancel()
+            await task
+
+        asyncio.run(main())
+        return [m for m in self.ws.sent if m["type"] == "token_stream"]
+
+    def test_tokens_are_framed_and_closed_before_the_node_summary(self):
+        events = [token("안녕", chapter=1, chapter_title="개요"), token("하세요"),
+                  {"event": "on_chat_model_end", "run_id": "run-1", "data": {}},
+                  {"event": "on_chain_end", "name": "researcher", "run_id": "node-1",
+                   "data": {"output": {"sender": "Researcher", "messages": [SystemMessage(content="Chapter done.")]}}}]
+        frames = self.run_graph(FakeGraph(events))
+
+        self.assertEqual("".join(f["content"] for f in frames), "안녕하세요")
+        self.assertTrue(frames[-1]["done"])
+        self.assertEqual((frames[0]["node"], frames[0]["chapter"], frames[0]["chapter_title"]), ("researcher", 1, "개요"))
+        kinds = [m["type"] for m in self.ws.sent]
+        self.assertLess(max(i for i, k in enumerate(kinds) if k == "token_stream"), kinds.index("agent_message"))
+
+    def test_cancelled_run_flushes_the_tail(self):
+        frames = self.run_graph(FakeGraph([token("partial "), token("answer")], hang=True), cancel_after=0.2)
+
+        self.assertEqual("".join(f["content"] for f in frames), "partial answer")
+        self.assertTrue(frames[-1]["done"])
+
+if __name__ == '__main__':
+    unittest.main()
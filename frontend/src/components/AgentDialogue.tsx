@@ -5,6 +5,7 @@ interface AgentMessage {
     type: 'agent_message';
     sender: string;
     content: string;
+    streamId?: string;
 }
 
 interface AgentDialogueProps {
@@ -9,9 +9,40 @@ type AgentMessage = {
     type: 'agent_message';
     sender: string;
     content: string;
+    streamId?: string; // Set while the entry is filled from token_stream frames
 };
 
-type WebSocketMessage = LogMessage | SlideUpdate | AgentMessage;
+// Model tokens of one LLM call, coalesced server-side into ~50ms frames
+type TokenStream = {
+    type: 'token_stream';
+    stream_id: string;
+    node?: string;
+    chapter?: number;
+    chapter_title?: string;
+    slide?: number;
+    content: string;
+    done: boolean;
+};
+
+type IngestProgress = {
+    type: 'ingest_progress';
+    event: 'started' | 'file_indexed' | 'file_failed' | 'file_removed' | 'finished';
+    directory: string;
+    file?: string;
+    chunks?: number;
+    error?: string;
+    result?: string;
+    stats: { unchanged: number; indexed: number; chunks: number; failed: number; removed: number };
+};
+
+type WebSocketMessage = LogMessage | SlideUpdate | AgentMessage | IngestProgress | TokenStream;
+
+const streamSender = (data: TokenStream) => {
+    const name = data.node ?? 'Agent';
+    if (data.chapter) return `${name} · Ch.${data.chapter}`;
+    if (data.slide) return `${name} · Slide ${data.slide}`;
+    return name;
+};
 
 export function useAgentWebSocket(url: string, threadId: string) {
     const ws = useRef<WebSocket | null>(null);
@@ -48,6 +79,27 @@ export function useAgentWebSocket(url: string, threadId: string) {
                     setDialogue((prev) => [...prev, data]);
                     // Also log it for transparency
                     setLogs((prev) => [...prev, `[${data.sender}] ${data.content.substring(0, 50)}...`]);
+                } else if (data.type === 'token_stream') {
+                    // Grow the dialogue entry of this model call as its tokens arrive
+                    setDialogue((prev) => {
+                        const idx = prev.findIndex((msg) => msg.streamId === data.stream_id);
+                        if (idx === -1) {
+                            if (!data.content) return prev;
+                            return [...prev, { type: 'agent_message', sender: streamSender(data), content: data.content, streamId: data.stream_id }];
+                        }
+                        const next = [...prev];
+                        next[idx] = { ...next[idx], content: next[idx].content + data.content };
+                        return next;
+                    });
+                } else if (data.type === 'ingest_progress') {
+                    const name = data.file ? data.file.split(/[\\/]/).pop() : data.directory;
+                    if (data.event === 'file_indexed') {
+                        setLogs((prev) => [...prev, `[Index] ${name} (${data.chunks} chunks, ${data.stats.indexed} files done)`]);
+                    } else if (data.event === 'file_failed') {
+                        setLogs((prev) => [...prev, `[Index] Failed: ${name} - ${data.error}`]);
+                    } else if (data.event === 'finished') {
+                        setLogs((prev) => [...prev, `[Index] ${data.result}`]);
+                    }
                 }
             } catch (err) {
                 console.error('Failed to parse WS message', err);